@@ -1,7 +1,11 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, g
+from flask.json.provider import DefaultJSONProvider
 import os
 import sys
 import json
+import uuid
+import zlib
+from datetime import date, timedelta
 
 # ROBUST PATH HANDLING
 # Get the absolute path of the directory containing this file (project/)
@@ -14,13 +18,66 @@ if root_dir not in sys.path:
     sys.path.insert(0, root_dir)
 
 # Now we can import from project...
-from project.agents.ai_agent import process_user_message
-from project.agents.task_manager import get_all_tasks, add_task, delete_task, update_task
+from project.models import Task
+from project import metrics, jobs
+from project.chat_history import ChatHistoryStore, CHAT_HISTORY_PATH, CHAT_SESSION_TTL
+from project.agents.ai_agent import process_user_message, process_user_messages, stream_user_message
+from project.agents.prioritizer import get_prioritized_tasks, format_task_list
+from project.agents.ai_summary import generate_summary
+from project.agents.task_importer import split_lines, iter_import, IMPORT_MAX_LINES
+from project.agents.scheduler import (
+    default_start_date, get_incremental_scheduler, get_free_slots, format_free_slots, iter_ics
+)
+from project.agents.task_manager import (
+    get_all_tasks, add_task, delete_task, update_task, upsert_tasks,
+    get_revision, get_changes, apply_changes, query_tasks_page, search_tasks, get_day_view, get_week_view
+)
+
+class TaskJSONProvider(DefaultJSONProvider):
+    # Tasks stay compact objects internally and become dicts only here
+    @staticmethod
+    def default(o):
+        if isinstance(o, Task):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = TaskJSONProvider(app)
+
+# Chat history per session; the session id comes from the request body or a cookie
+CHAT_HISTORY = ChatHistoryStore(path=CHAT_HISTORY_PATH)
+CHAT_SESSION_COOKIE = "chat_session"
+
+@app.before_request
+def _start_request_span():
+    g.request_span = metrics.span("http.request", metrics.HTTP_SECONDS, path=request.path).__enter__()
+
+def _span_labels(status):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    return (request.method, route, str(status))
+
+@app.after_request
+def _label_request_span(resp):
+    span = g.get('request_span')
+    if span is not None:
+        span.labels = _span_labels(resp.status_code)
+        if resp.is_streamed:
+            # The body is produced after teardown; time the span to its end
+            g.pop('request_span')
+            resp.call_on_close(lambda: span.__exit__(None, None, None))
+    return resp
 
-# In-memory history
-CHAT_HISTORY = []
+@app.teardown_request
+def _end_request_span(exc):
+    span = g.pop('request_span', None)
+    if span is not None:
+        if not span.labels:  # after_request didn't run
+            span.labels = _span_labels(500)
+        span.__exit__(type(exc) if exc else None, exc, None)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def home():
@@ -31,46 +88,117 @@ def home():
     except FileNotFoundError:
         return "Error: project/web_ui/dashboard.html not found.", 404
 
-@app.route('/api/tasks', methods=['GET', 'POST'])
+def _not_modified(etag, weak=False):
+    # Cheap revision check so unchanged boards skip the table scan entirely
+    if request.if_none_match.contains_weak(etag) if weak else request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag, weak=weak)
+        return resp
+    return None
+
+@app.route('/api/tasks', methods=['GET', 'POST', 'PATCH'])
 def handle_tasks():
     if request.method == 'GET':
-        tasks = get_all_tasks()
-        return jsonify(tasks)
-    
+        since = request.args.get('since', type=int)
+        revision = get_revision()
+        # Same revision + same query => same body
+        etag = f"{revision}-{zlib.crc32(request.query_string):08x}"
+        cached = _not_modified(etag)
+        if cached:
+            return cached
+
+        query_args = {k: v for k, v in request.args.items() if k != 'since'}
+        if 'columns' in query_args:
+            query_args['columns'] = query_args['columns'].split(',')
+        if since is not None:
+            resp = jsonify(get_changes(since))
+        elif query_args:
+            # Filtered / keyset-paginated listing, e.g. ?status=pending&limit=50&cursor=...
+            try:
+                resp = jsonify(query_tasks_page(**query_args))
+            except (ValueError, TypeError) as e:
+                return jsonify({"error": str(e)}), 400
+        else:
+            resp = jsonify(get_all_tasks())
+        resp.set_etag(etag)
+        resp.headers['X-Revision'] = str(revision)
+        return resp
+
+    if request.method == 'PATCH':
+        # Delta sync: {"upsert": [changed tasks], "delete": [ids]}
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "expected an object with 'upsert' and 'delete' lists"}), 400
+        upserts, deletes = data.get('upsert', []), data.get('delete', [])
+        if not isinstance(upserts, list) or not all(isinstance(t, dict) for t in upserts):
+            return jsonify({"error": "'upsert' must be a list of task objects"}), 400
+        if not isinstance(deletes, list) or not all(isinstance(i, str) for i in deletes):
+            return jsonify({"error": "'delete' must be a list of task ids"}), 400
+        result = apply_changes(upserts, deletes)
+        resp = jsonify(result)
+        resp.headers['X-Revision'] = str(result['revision'])
+        return resp
+
     if request.method == 'POST':
         data = request.json
         if isinstance(data, list):
-            current_ids = {t['id'] for t in get_all_tasks()}
-            for t in data:
-                if t['id'] in current_ids:
-                    update_task(t['id'], {
-                        'task_name': t['task_name'],
-                        'duration_minutes': t.get('duration_minutes'),
-                        'priority': t.get('priority'),
-                        'deadline': t.get('deadline'),
-                        'scheduled_date': t.get('scheduled_date')
-                    })
-                else:
-                    add_task(
-                        task_name=t['task_name'],
-                        duration_minutes=t.get('duration_minutes'),
-                        priority=t.get('priority'),
-                        deadline=t.get('deadline'),
-                        scheduled_date=t.get('scheduled_date')
-                    )
-            return jsonify({"status": "synced"})
+            results = upsert_tasks(data)
+            return jsonify({"status": "synced", "results": results})
         else:
             return jsonify({"status": "ok"})
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
-    data = request.json
-    user_message = data.get('message', '')
-    
-    CHAT_HISTORY.append({'role': 'user', 'text': user_message})
-    
-    parsed = process_user_message(user_message, CHAT_HISTORY)
-    
+def _schedule_args():
+    """(start_date, weeks) from ?start=YYYY-MM-DD&weeks=N, defaulting to next Monday and 1."""
+    start = request.args.get('start')
+    weeks = request.args.get('weeks', 1, type=int)
+    if not 1 <= weeks <= 52:
+        raise ValueError("weeks must be between 1 and 52")
+    return default_start_date(date.fromisoformat(start) if start else None), weeks
+
+@app.route('/api/schedule.ics')
+def schedule_ics():
+    try:
+        start_date, weeks = _schedule_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The placement is a function of the task revision and the horizon. The
+    # tag is weak: each body carries its own DTSTAMP, so equal tags mean the
+    # same calendar, not the same bytes
+    etag = f"{get_revision()}-{start_date.isoformat()}-{weeks}"
+    cached = _not_modified(etag, weak=True)
+    if cached:
+        return cached
+
+    result = get_incremental_scheduler(start_date, 7 * weeks).result()
+    resp = Response(iter_ics(result["events"]), mimetype='text/calendar')
+    resp.set_etag(f"{result['revision']}-{start_date.isoformat()}-{weeks}", weak=True)
+    resp.headers['X-Revision'] = str(result['revision'])
+    resp.headers['Content-Disposition'] = 'inline; filename="schedule.ics"'
+    return resp
+
+@app.route('/api/schedule/free')
+def schedule_free():
+    """Free/busy view: the working time the current schedule leaves open."""
+    try:
+        start_date, weeks = _schedule_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    min_minutes = request.args.get('min_minutes', 0, type=int)
+
+    result = get_incremental_scheduler(start_date, 7 * weeks).result(free_minutes=min_minutes)
+    return jsonify({
+        "revision": result["revision"],
+        "free": [{"start": s["start"].isoformat(), "end": s["end"].isoformat(), "minutes": s["minutes"]}
+                 for s in result["free"]],
+        "busy": [{"start": e["start"].isoformat(), "end": e["end"].isoformat(),
+                  "task_id": e["task_id"], "summary": e["summary"]} for e in result["events"]],
+        "overflow": result["overflow"],
+    })
+
+def _apply_action(parsed):
     action = parsed.get("action")
     params = parsed.get("parameters", {})
     
@@ -84,16 +212,256 @@ def chat():
         )
     elif action == "update_task":
         if params.get("task_id"):
-            update_task(params.get("task_id"), params.get("updates", {}))
-    
+            try:
+                update_task(params.get("task_id"), params.get("updates", {}))
+            except ValueError as e:
+                parsed["response"] = f"I couldn't update that task: {e}"
+    elif action == "delete_task":
+        if params.get("task_id") and not delete_task(params.get("task_id")):
+            parsed["response"] = "I couldn't find that task."
+    elif action == "query_schedule":
+        parsed["response"] = format_task_list(get_prioritized_tasks())
+    elif action == "summarize_week":
+        parsed["response"] = generate_summary()
+    elif action == "get_free_slots":
+        parsed["response"] = format_free_slots(get_free_slots(min_minutes=30))
+    return action
+
+def _chat_session(data):
+    """(session id, is_new) for a chat request."""
+    session_id = data.get('session_id') or request.cookies.get(CHAT_SESSION_COOKIE)
+    if session_id:
+        return str(session_id), False
+    return uuid.uuid4().hex, True
+
+def _with_session(resp, session_id, is_new):
+    if is_new:
+        resp.set_cookie(CHAT_SESSION_COOKIE, session_id, max_age=int(CHAT_SESSION_TTL),
+                        httponly=True, samesite='Lax')
+    return resp
+
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    data = request.json
+    user_message = data.get('message', '')
+    session_id, is_new = _chat_session(data)
+
+    if isinstance(data.get('messages'), list):
+        # Bulk: independent messages (e.g. a pasted task list), parsed together
+        messages = [str(m) for m in data['messages']]
+        results = []
+        for parsed in process_user_messages(messages, CHAT_HISTORY.get(session_id)):
+            action = _apply_action(parsed)
+            results.append({"response": parsed.get("response", "Done."), "action": action})
+        response_text = "\n".join(r["response"] for r in results)
+        CHAT_HISTORY.append(session_id, 'user', "\n".join(messages))
+        CHAT_HISTORY.append(session_id, 'assistant', response_text)
+        return _with_session(jsonify({"response": response_text, "action": "bulk", "results": results}),
+                             session_id, is_new)
+
+    wants_async = data.get('async') or request.args.get('async') == '1'
+    if wants_async:
+        jobs.JOBS.start()
+    # "chat" jobs only run in the process that queued them, so with no
+    # workers here (JOB_WORKERS=0) the reply is computed inline instead
+    if wants_async and jobs.JOBS.running:
+        # Answered by a job worker; poll /api/jobs/<id> for the reply
+        job_id = jobs.JOBS.enqueue("chat", {"message": user_message, "session_id": session_id},
+                                   priority=jobs.PRIORITY_INTERACTIVE, dedupe=False)
+        resp = jsonify({"job_id": job_id, "status": "queued"})
+        resp.status_code = 202
+        resp.headers['Location'] = f"/api/jobs/{job_id}"
+        return _with_session(resp, session_id, is_new)
+
+    return _with_session(jsonify(chat_job(user_message, session_id)), session_id, is_new)
+
+@jobs.job_handler("chat", local=True)
+def chat_job(message, session_id):
+    parsed = process_user_message(message, CHAT_HISTORY.get(session_id))
+    action = _apply_action(parsed)
+
     response_text = parsed.get("response", "Done.")
-    CHAT_HISTORY.append({'role': 'assistant', 'text': response_text})
-    
-    return jsonify({
-        "response": response_text,
-        "action": action
-    })
+    CHAT_HISTORY.append(session_id, 'user', message)
+    CHAT_HISTORY.append(session_id, 'assistant', response_text)
+    return {"response": response_text, "action": action}
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Same contract as /api/chat, but relays the reply as Server-Sent Events:
+    `token` events carry response text as it is generated, and a final
+    `done` event carries {"response", "action"} after the action is applied.
+    """
+    data = request.json
+    user_message = data.get('message', '')
+    session_id, is_new = _chat_session(data)
+    history = CHAT_HISTORY.get(session_id)
+    CHAT_HISTORY.append(session_id, 'user', user_message)
+
+    def generate():
+        for kind, value in stream_user_message(user_message, history):
+            if kind == "token":
+                yield _sse("token", {"text": value})
+            else:
+                action = _apply_action(value)
+                response_text = value.get("response", "Done.")
+                CHAT_HISTORY.append(session_id, 'assistant', response_text)
+                yield _sse("done", {"response": response_text, "action": action})
+
+    resp = Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    return _with_session(resp, session_id, is_new)
+
+def _date_arg(name, default):
+    value = request.args.get(name)
+    return date.fromisoformat(value) if value else default
+
+@app.route('/api/today')
+def today_view():
+    """
+    Today's panel: open tasks planned for ?date= (default today; clients
+    pass their local date), their total minutes, and overdue tasks.
+    ?limit= caps the list (default 50, max 200).
+    """
+    try:
+        day = _date_arg('date', date.today())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    etag = f"{get_revision()}-{day.isoformat()}-{limit}"
+    cached = _not_modified(etag)
+    if cached:
+        return cached
+
+    view = get_day_view(day, limit)
+    resp = jsonify(view)
+    resp.set_etag(f"{view['revision']}-{day.isoformat()}-{limit}")
+    resp.headers['X-Revision'] = str(view['revision'])
+    return resp
+
+@app.route('/api/week')
+def week_view():
+    """
+    The weekly planner: per-day open tasks, counts and minutes for the 7
+    days from ?start= (default this week's Monday), plus overdue totals as
+    of ?today=. ?limit= caps each day's list (default 20, max 100).
+    """
+    try:
+        today = _date_arg('today', date.today())
+        start = _date_arg('start', today - timedelta(days=today.weekday()))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    etag = f"{get_revision()}-{start.isoformat()}-{today.isoformat()}-{limit}"
+    cached = _not_modified(etag)
+    if cached:
+        return cached
+
+    view = get_week_view(start, limit=limit, today=today)
+    resp = jsonify(view)
+    resp.set_etag(f"{view['revision']}-{start.isoformat()}-{today.isoformat()}-{limit}")
+    resp.headers['X-Revision'] = str(view['revision'])
+    return resp
+
+@app.route('/api/tasks/search')
+def tasks_search():
+    """Tasks matching ?q= by name, most relevant first; ?limit= (default 10), ?status= ("open" for not done)."""
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify({"tasks": search_tasks(query, limit, request.args.get('status'))})
+
+@app.route('/api/tasks/import', methods=['POST'])
+def tasks_import():
+    """
+    Bulk import from many lines of text, one task per line: a text/plain
+    body, an uploaded `file`, or JSON {"text"} / {"lines"}. Optional
+    "use_llm": false (or ?llm=0) parses locally only.
+
+    Returns the summary as JSON, or with `Accept: text/event-stream` (or
+    ?stream=1) streams `progress` events while lines are parsed and a final
+    `done` event with the summary.
+    """
+    use_llm = request.args.get('llm', '1') != '0'
+    if 'file' in request.files:
+        text = request.files['file'].read().decode('utf-8', errors='replace')
+    elif request.is_json:
+        data = request.get_json(silent=True) or {}
+        use_llm = bool(data.get('use_llm', use_llm))
+        if isinstance(data.get('lines'), list):
+            text = "\n".join(str(line) for line in data['lines'])
+        else:
+            text = str(data.get('text') or '')
+    else:
+        text = request.get_data(as_text=True)
+
+    lines = split_lines(text)
+    if len(lines) > IMPORT_MAX_LINES:
+        return jsonify({"error": f"at most {IMPORT_MAX_LINES} lines per import"}), 400
+    events = iter_import(lines, use_llm=use_llm)
+
+    if request.args.get('stream') == '1' or request.accept_mimetypes.best == 'text/event-stream':
+        def generate():
+            for kind, payload in events:
+                yield _sse(kind, payload)
+
+        return Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    summary = None
+    for kind, payload in events:
+        if kind == "done":
+            summary = payload
+    resp = jsonify(summary)
+    resp.headers['X-Revision'] = str(summary['revision'])
+    return resp
+
+# Jobs clients may queue through POST /api/jobs, with the args each accepts;
+# the rest (e.g. "chat") are only queued by the server itself
+CLIENT_JOB_KINDS = {"summary": frozenset(), "schedule": frozenset()}
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def handle_jobs():
+    """
+    GET: queue statistics. POST {"kind", "priority"}: queues one of the
+    CLIENT_JOB_KINDS (e.g. {"kind": "summary"}) and answers 202 with its id.
+    """
+    if request.method == 'GET':
+        return jsonify(jobs.JOBS.stats())
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    kind = data.get('kind')
+    if kind not in CLIENT_JOB_KINDS:
+        return jsonify({"error": f"kind must be one of: {', '.join(sorted(CLIENT_JOB_KINDS))}"}), 400
+    args = data.get('args') or {}
+    if not isinstance(args, dict) or set(args) - CLIENT_JOB_KINDS[kind]:
+        return jsonify({"error": f"unexpected args for '{kind}'"}), 400
+    try:
+        priority = int(data.get('priority', jobs.PRIORITY_DEFAULT))
+    except (ValueError, TypeError):
+        return jsonify({"error": "priority must be an integer"}), 400
+    priority = max(jobs.PRIORITY_BACKGROUND, min(priority, jobs.PRIORITY_DEFAULT))
+    jobs.JOBS.start()
+    job_id = jobs.JOBS.enqueue(kind, args, priority=priority)
+    resp = jsonify({"job_id": job_id, "status": "queued"})
+    resp.status_code = 202
+    resp.headers['Location'] = f"/api/jobs/{job_id}"
+    return resp
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """The job's status, and its result once done; ?wait=N waits up to N seconds (max 30) for it to finish."""
+    wait = min(request.args.get('wait', 0, type=float), 30.0)
+    job = jobs.JOBS.wait(job_id, wait) if wait > 0 else jobs.JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
 
 if __name__ == '__main__':
+    # Development server; project/server.py is the production entry point
+    jobs.JOBS.start()
     port = int(os.environ.get('PORT', 8000))
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,62 @@
+"""
+Memory and prompt-building cost of chat history under sustained load:
+many sessions arriving, chatting for a while and going quiet, against the
+old single global list. Reports traced memory as requests accumulate
+(it should level off) and the time to build a prompt from a long history.
+
+Usage: python benchmarks/bench_chat_history.py [REQUESTS] [SESSIONS]   (default 200000 5000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_chat_"), "tasks.db"))
+
+from project.chat_history import ChatHistoryStore  # noqa: E402
+from project.agents.ai_agent import build_prompt  # noqa: E402
+
+MESSAGE = "please move the dentist appointment to friday afternoon and remind me about the report "
+
+def load(n_requests, n_sessions, append, label):
+    rng = random.Random(3)
+    tracemalloc.start()
+    checkpoints = {n_requests * i // 4 for i in range(1, 5)}
+    t0 = time.perf_counter()
+    for i in range(1, n_requests + 1):
+        # Active sessions drift over time, so old ones go idle for good
+        session = f"s{i // 20 + rng.randrange(n_sessions)}"
+        append(session, "user", MESSAGE * rng.randint(1, 3))
+        append(session, "assistant", "Done.")
+        if i in checkpoints:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"  {label:<14} {i:>8} requests  {current / 2**20:8.1f} MiB")
+    tracemalloc.stop()
+    return (time.perf_counter() - t0) / n_requests
+
+def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    global_list = []
+    load(n_requests, n_sessions, lambda s, role, text: global_list.append({"role": role, "text": text}),
+         "global list")
+    del global_list
+
+    store = ChatHistoryStore(max_sessions=n_sessions)
+    per_request = load(n_requests, n_sessions, store.append, "session store")
+    print(f"  session store: {per_request * 1e6:.1f} us per request, {store.stats()}")
+
+    history = [{"role": "user", "text": MESSAGE * 3}] * 1000
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        prompt = build_prompt("what's next?", history)
+    print(f"  build_prompt over 1000 messages: {(time.perf_counter() - t0) * 1000:.1f} us/call, "
+          f"{len(prompt)} chars")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Single-flight coalescing and micro-batching in llm_wrapper, against the
+local stub LLM:
+
+- many concurrent identical calls (dashboard + CLI asking for the same
+  summary) should go upstream once;
+- a pasted list of task lines through ai_agent.process_user_messages
+  should take a few batched requests instead of one per line.
+
+Usage: python benchmarks/bench_coalesce.py [N_LINES] [stub_delay_seconds]
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_coalesce_"), "tasks.db"))
+
+from benchmarks.stub_llm import start_stub_server, DEFAULT_REPLY  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+from project.agents.ai_agent import process_user_message, process_user_messages  # noqa: E402
+
+def reply(prompt):
+    # Batched prompts get a JSON array with one answer per request
+    match = re.search(r"You will now receive (\d+) independent requests", prompt)
+    if match:
+        return json.dumps([json.loads(DEFAULT_REPLY)] * int(match.group(1)))
+    return DEFAULT_REPLY
+
+def counted(fn):
+    before = dict(llm_wrapper.llm_stats())
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    after = llm_wrapper.llm_stats()
+    return elapsed, {k: after[k] - before[k] for k in ("calls", "issued", "coalesced", "batches", "batch_fallbacks")}
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+    server = start_stub_server(delay=delay, reply=reply)
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+    print(f"stub delay {delay}s, LLM_BATCH_MAX {llm_wrapper.LLM_BATCH_MAX}, "
+          f"window {llm_wrapper.LLM_BATCH_WINDOW * 1000:g} ms")
+
+    prompt = "Summarize this week for me, please."
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        elapsed, counts = counted(lambda: list(pool.map(
+            lambda _: llm_wrapper.call_llm_system(prompt, use_cache=False), range(32))))
+    print(f"  32 identical concurrent calls     {elapsed * 1000:7.0f} ms  {counts}")
+
+    # Vague enough that the local parser leaves them to the LLM
+    lines = [f"hmm maybe sort out the thing with supplier #{i} at some point" for i in range(n_lines)]
+    elapsed, counts = counted(lambda: [process_user_message(line + " (one by one)") for line in lines])
+    print(f"  {n_lines} lines one by one              {elapsed * 1000:7.0f} ms  {counts}")
+    with ThreadPoolExecutor(max_workers=n_lines) as pool:
+        elapsed, counts = counted(lambda: list(pool.map(lambda l: process_user_message(l + " (threads)"), lines)))
+    print(f"  {n_lines} lines on {n_lines} threads           {elapsed * 1000:7.0f} ms  {counts}")
+    elapsed, counts = counted(lambda: process_user_messages(lines))
+    print(f"  {n_lines} lines process_user_messages  {elapsed * 1000:7.0f} ms  {counts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares task_manager CRUD throughput on the pooled WAL connection layer
+against the old open/commit/close-per-call pattern.
+
+Usage: python benchmarks/bench_db.py [N]
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP_DIR = tempfile.mkdtemp(prefix="bench_db_")
+os.environ["TASKS_DB_PATH"] = os.path.join(TMP_DIR, "pooled.db")
+
+from project.agents import task_manager  # noqa: E402
+
+LEGACY_DB = Path(TMP_DIR) / "legacy.db"
+
+def legacy_connection():
+    # Mirrors the original get_db_connection(): mkdir + connect on every call
+    LEGACY_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(LEGACY_DB)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def legacy_init():
+    conn = legacy_connection()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY, task_name TEXT NOT NULL, duration_minutes INTEGER,
+            priority TEXT, deadline TEXT, created_at TEXT,
+            status TEXT DEFAULT 'pending', scheduled_date TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+def legacy_add(task_name):
+    conn = legacy_connection()
+    task_id = str(uuid.uuid4())
+    conn.execute(
+        'INSERT INTO tasks (id, task_name, duration_minutes, priority, deadline, created_at, scheduled_date) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (task_id, task_name, 30, "medium", None, datetime.utcnow().isoformat(), None))
+    conn.commit()
+    conn.close()
+    return task_id
+
+def legacy_get(task_id):
+    conn = legacy_connection()
+    row = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def legacy_update(task_id):
+    conn = legacy_connection()
+    conn.execute('UPDATE tasks SET priority = ? WHERE id = ?', ("high", task_id))
+    conn.commit()
+    conn.close()
+
+def legacy_delete(task_id):
+    conn = legacy_connection()
+    conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+    conn.commit()
+    conn.close()
+
+def timed(label, fn, items):
+    start = time.perf_counter()
+    out = [fn(x) for x in items]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<8} {len(items) / elapsed:>10.0f} ops/sec")
+    return out
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    names = [f"task {i}" for i in range(n)]
+
+    print(f"Legacy (connect per call), n={n}")
+    legacy_init()
+    ids = timed("add", legacy_add, names)
+    timed("get", legacy_get, ids)
+    timed("update", legacy_update, ids)
+    timed("delete", legacy_delete, ids)
+
+    print(f"Pooled (WAL, per-thread connection), n={n}")
+    ids = [t["id"] for t in timed("add", lambda name: task_manager.add_task(name, 30), names)]
+    timed("get", task_manager.get_task_by_id, ids)
+    timed("update", lambda i: task_manager.update_task(i, {"priority": "high"}), ids)
+    timed("delete", task_manager.delete_task, ids)
+
+    batch = [{"id": str(uuid.uuid4()), "task_name": name, "duration_minutes": 30} for name in names]
+    print(f"Bulk sync (upsert_tasks, one transaction), n={n}")
+    for label in ("insert", "update"):
+        start = time.perf_counter()
+        task_manager.upsert_tasks(batch)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<8} {n / elapsed:>10.0f} rows/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Bulk import (task_importer.iter_import) of N pasted lines against the
+local stub LLM, compared with the time one blocking round trip per line
+would take. Half the lines are plain enough for the local parser; the
+other half go to the LLM.
+
+Usage: python benchmarks/bench_import.py [N_LINES] [stub_delay_seconds] [concurrency]
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_import_"), "tasks.db"))
+
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+from project.agents.task_importer import split_lines, iter_import  # noqa: E402
+
+TASK_REPLY = {"action": "add_task", "parameters": {"task_name": "supplier follow-up", "duration_minutes": 30,
+                                                   "priority": "medium"}, "response": "Added."}
+
+def reply(prompt):
+    match = re.search(r"You will now receive (\d+) independent requests", prompt)
+    if match:
+        return json.dumps([TASK_REPLY] * int(match.group(1)))
+    return json.dumps(TASK_REPLY)
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    server = start_stub_server(delay=delay, reply=reply)
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+
+    text = "\n".join(
+        f"- write section {i} of the report 45 min high priority" if i % 2 else
+        f"- hmm sort out the thing with supplier #{i} at some point, maybe"
+        for i in range(n_lines))
+    lines = split_lines(text)
+    llm_lines = sum(1 for i in range(n_lines) if not i % 2)
+
+    t0 = time.perf_counter()
+    for kind, payload in iter_import(lines, concurrency=concurrency):
+        if kind == "done":
+            summary = payload
+    elapsed = time.perf_counter() - t0
+
+    print(f"{n_lines} lines, stub delay {delay}s, {llm_lines} need the LLM")
+    print(f"  one round trip per line (estimate) {n_lines * delay:8.1f} s")
+    print(f"  iter_import                        {elapsed:8.2f} s  "
+          f"{summary['imported']} imported, {summary['failed']} failed, {server.requests} LLM requests")
+
+if __name__ == "__main__":
+    main()
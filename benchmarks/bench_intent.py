@@ -0,0 +1,62 @@
+"""
+Runs the intent corpus through ai_agent.process_user_message with and
+without the local fast path. Reports the fast-path hit rate and latency
+percentiles for both paths (the LLM is the local stub with a fixed delay).
+
+Usage: python benchmarks/bench_intent.py [llm_delay_seconds]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+from project.llm_cache import LLMCache  # noqa: E402
+from project.agents import ai_agent  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.txt")
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def report(label, samples):
+    if not samples:
+        print(f"  {label:<10} (no samples)")
+        return
+    print(f"  {label:<10} n={len(samples):<4} p50 {percentile(samples, 0.5) * 1000:>9.3f} ms"
+          f"   p99 {percentile(samples, 0.99) * 1000:>9.3f} ms")
+
+def main():
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.25
+    server = start_stub_server(delay=delay)
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+    llm_wrapper._cache = LLMCache(max_entries=0)  # measure real round trips
+
+    with open(CORPUS, encoding="utf-8") as f:
+        messages = [line.strip() for line in f if line.strip()]
+
+    fast, fallback, llm_only = [], [], []
+    for msg in messages:
+        start = time.perf_counter()
+        hit = ai_agent.fast_path(msg) is not None
+        ai_agent.process_user_message(msg, [])
+        (fast if hit else fallback).append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ai_agent.process_user_message(msg, [], use_fast_path=False)
+        llm_only.append(time.perf_counter() - start)
+
+    print(f"corpus={len(messages)} messages, stub LLM delay={delay}s")
+    print(f"  fast-path hit rate: {len(fast) / len(messages):.0%}")
+    report("fast path", fast)
+    report("fallback", fallback)
+    report("LLM only", llm_only)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+What moving rescheduling and summaries onto the job queue (project/jobs.py)
+saves the caller:
+
+- task writes with a shared schedule of N tasks: repaired inline on the
+  writer's thread (no job workers) against caught up by the "schedule" job;
+- "summarize my week" right after a change, with the LLM taking
+  `llm_delay` seconds: written on the request against precomputed.
+
+Usage: python benchmarks/bench_jobs.py [N] [llm_delay]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_jobs_"), "tasks.db")
+os.environ["JOB_WORKERS"] = "0"  # started below, once the inline run is done
+
+from benchmarks.generate import generate_tasks, START  # noqa: E402
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import jobs, llm_wrapper  # noqa: E402
+from project.agents import ai_summary, scheduler, task_manager  # noqa: E402
+
+WRITES = 200
+
+def write_latencies(ids):
+    samples = []
+    for i in range(WRITES):
+        t0 = time.perf_counter()
+        task_manager.update_task(ids[i * 7 % len(ids)], {"priority": ("high", "low")[i % 2]})
+        samples.append(time.perf_counter() - t0)
+        time.sleep(0.002)  # writes arrive spread out, as from requests
+    return samples
+
+def reset_scheduler():
+    scheduler.reset_incremental_schedulers()
+    return scheduler.get_incremental_scheduler(START, 28)
+
+def report(label, samples):
+    ordered = sorted(samples)
+    print(f"  {label:<34} median {statistics.median(ordered) * 1000:7.2f} ms   "
+          f"p99 {ordered[int(0.99 * len(ordered))] * 1000:7.2f} ms")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    llm_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    tasks = generate_tasks(n, deadline_days=28, with_ids=True)
+    task_manager.upsert_tasks(tasks)
+    ids = [t["id"] for t in tasks]
+
+    server = start_stub_server(delay=llm_delay, reply="A summary of the week.")
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+
+    print(f"update_task with a shared 4-week schedule of {n} tasks, {WRITES} writes")
+    reset_scheduler()
+    report("inline repair (no job workers)", write_latencies(ids))
+    summaries = []
+    for i in range(5):
+        task_manager.update_task(ids[i], {"duration_minutes": 45 + i})
+        t0 = time.perf_counter()
+        ai_summary.generate_summary()
+        summaries.append(time.perf_counter() - t0)
+
+    jobs.JOBS.start(2)
+    placement = reset_scheduler()
+    report("\"schedule\" job (2 workers)", write_latencies(ids))
+    time.sleep(scheduler.SCHEDULE_PRECOMPUTE_DELAY + 1)
+    print(f"  placement caught up to revision {placement.revision} of {task_manager.get_revision()}")
+
+    print(f"summary right after a change, LLM delay {llm_delay}s")
+    report("written on the request", summaries)
+    precomputed = []
+    for i in range(5):
+        task_manager.update_task(ids[i], {"duration_minutes": 60 + i})
+        # A read arriving once the background summary is ready
+        time.sleep(ai_summary.SUMMARY_PRECOMPUTE_DELAY + llm_delay + 1)
+        t0 = time.perf_counter()
+        ai_summary.generate_summary()
+        precomputed.append(time.perf_counter() - t0)
+    report("precomputed by the \"summary\" job", precomputed)
+    print(f"  jobs: {jobs.JOBS.stats()}")
+
+if __name__ == "__main__":
+    main()
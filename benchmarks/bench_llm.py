@@ -0,0 +1,43 @@
+"""
+Drives llm_wrapper against the local stub LLM to show connection reuse
+and the effect of the concurrency limit.
+
+Usage: python benchmarks/bench_llm.py [N] [stub_delay_seconds]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    server = start_stub_server(delay=delay)
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+
+    start = time.perf_counter()
+    for _ in range(n):
+        llm_wrapper.call_llm_system("ping")
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        list(pool.map(llm_wrapper.call_llm_system, ["ping"] * n))
+    concurrent = time.perf_counter() - start
+
+    print(f"n={n}, stub delay={delay}s, LLM_MAX_CONCURRENCY={llm_wrapper.LLM_MAX_CONCURRENCY}")
+    print(f"  sequential  {n / sequential:>8.1f} calls/sec")
+    print(f"  concurrent  {n / concurrent:>8.1f} calls/sec")
+    print(f"  connections opened: {llm_wrapper._pool.opened} for {2 * n} calls")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memory held by a fully loaded task list: the old get_all_tasks result
+([dict(row) for row in rows] over sqlite3.Row) against the Task objects
+task_manager returns now. Sizes are measured with tracemalloc, so they
+include the strings and dates each representation keeps alive.
+
+Usage: python benchmarks/bench_memory.py [N ...]   (default 100000 1000000)
+"""
+import gc
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_mem_"), "tasks.db")
+
+from project.database import db_session  # noqa: E402
+from project.agents import task_manager  # noqa: E402
+
+START = date(2026, 1, 1)
+
+def fill(n, seed=1):
+    rng = random.Random(seed)
+    days = [None] * 3 + [(START + timedelta(days=d)).isoformat() for d in range(365)]
+    with db_session() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.executemany(
+            "INSERT INTO tasks (id, task_name, duration_minutes, priority, deadline, created_at, status, "
+            "scheduled_date, revision) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((f"{i:08x}-0000-4000-8000-000000000000", f"task {i}", rng.choice([15, 30, 60, 90, 120]),
+              rng.choice(["high", "medium", "low"]), rng.choice(days), f"2026-01-01T09:00:{i % 60:02d}.000000",
+              rng.choice(["pending", "pending", "done"]), rng.choice(days), i) for i in range(n)))
+
+def legacy_get_all_tasks():
+    # The previous task_manager.get_all_tasks
+    conn = sqlite3.connect(os.environ["TASKS_DB_PATH"])
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM tasks ORDER BY created_at DESC").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def measure(load):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    tasks = load()
+    elapsed = time.perf_counter() - t0
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return held, peak, elapsed
+
+def run(n):
+    fill(n)
+    print(f"  n={n}")
+    for label, load in (("dict(sqlite3.Row)", legacy_get_all_tasks), ("Task (__slots__)", task_manager.get_all_tasks)):
+        held, peak, elapsed = measure(load)
+        print(f"    {label:<18} {held / n:7.0f} B/task held  {peak / n:7.0f} B/task peak  "
+              f"{held / 2**20:8.1f} MiB  load {elapsed:6.2f} s")
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    for n in sizes:
+        run(n)
+
+if __name__ == "__main__":
+    main()
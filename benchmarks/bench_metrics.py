@@ -0,0 +1,72 @@
+"""
+Overhead of the instrumentation in project/metrics.py: a bare span, a span
+recording into a histogram, the same with span export on, and what query
+counting and the db_operation wrapper add to real task_manager calls.
+
+Usage: python benchmarks/bench_metrics.py [N]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+TMP_DIR = tempfile.mkdtemp(prefix="bench_metrics_")
+os.environ["TASKS_DB_PATH"] = os.path.join(TMP_DIR, "tasks.db")
+
+from project import metrics, database  # noqa: E402
+from project.agents import task_manager  # noqa: E402
+
+def per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    hist = metrics.Histogram("bench_seconds", "bench", ("kind",))
+    labels = ("x",)
+
+    def empty():
+        pass
+
+    def bare():
+        with metrics.span("bench"):
+            pass
+
+    def recorded():
+        with metrics.span("bench", hist, labels):
+            pass
+
+    base = per_call(empty, n)
+    print(f"per span, {n} iterations (loop overhead {base:.2f} us subtracted)")
+    print(f"  span, no histogram            {per_call(bare, n) - base:6.2f} us")
+    print(f"  span + histogram              {per_call(recorded, n) - base:6.2f} us")
+    print(f"  counter inc                   {per_call(lambda: metrics.DB_QUERIES.inc(labels), n) - base:6.2f} us")
+    metrics.TRACE_PATH = os.path.join(TMP_DIR, "spans.jsonl")
+    print(f"  span + histogram + export     {per_call(recorded, n // 4) - base:6.2f} us")
+    metrics.flush_spans()
+    metrics.TRACE_PATH = None
+
+    def insert(prefix):
+        rows = [{"task_name": f"{prefix} {i}", "duration_minutes": 30} for i in range(10_000)]
+        t0 = time.perf_counter()
+        task_manager.upsert_tasks(rows)
+        return (time.perf_counter() - t0) * 1000
+
+    m = n // 10
+    results = {}
+    insert("warm-up")
+    for enabled in (False, True):
+        # The connection picks its cursor class when opened
+        metrics.METRICS_ENABLED = enabled
+        database.close_db_connection()
+        results[enabled] = (per_call(task_manager.get_revision, m), insert(f"run {enabled}"))
+    print("task_manager with metrics off / on")
+    print(f"  get_revision (one query)      {results[False][0]:6.2f} us / {results[True][0]:6.2f} us")
+    print(f"  upsert_tasks, 10k new rows    {results[False][1]:6.0f} ms / {results[True][1]:6.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares the columnar ranking in prioritizer (TaskColumns + argsort /
+argpartition) against the old sort_tasks, which parsed every deadline with
+strptime inside the key function on every sort.
+
+Usage: python benchmarks/bench_ranking.py [N ...]   (default 100000 1000000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# prioritizer imports task_manager, which opens the tasks DB on import
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_rank_"), "tasks.db"))
+
+from project.agents import prioritizer  # noqa: E402
+from project.agents.prioritizer import TaskColumns, rank_order, top_k, score_order  # noqa: E402
+
+K = 100
+
+def legacy_sort_tasks(tasks):
+    # The previous prioritizer.sort_tasks, verbatim
+    def parse_date(d):
+        if not d:
+            return None
+        try:
+            return datetime.strptime(d, "%Y-%m-%d")
+        except:  # noqa: E722
+            return None
+
+    def keyfn(t):
+        dd = parse_date(t.get("deadline"))
+        pr = prioritizer.PRIORITY_RANK.get(t.get("priority", "medium").lower(), 1)
+        dur = t.get("duration_minutes") or 999999
+        has_deadline = 0 if dd else 1
+        return (has_deadline, dd or datetime(9999, 1, 1), pr, dur)
+    return sorted(tasks, key=keyfn)
+
+def make_tasks(n, seed=1):
+    rng = random.Random(seed)
+    start = date(2026, 1, 1)
+    deadlines = [None] * 3 + [(start + timedelta(days=d)).isoformat() for d in range(365)]
+    return [{
+        "id": str(i),
+        "task_name": f"task {i}",
+        "duration_minutes": rng.choice([None, 15, 30, 45, 60, 90, 120, 240]),
+        "priority": rng.choice(["high", "medium", "low", "High", "LOW"]),
+        "deadline": rng.choice(deadlines),
+    } for i in range(n)]
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+def run(n):
+    tasks = make_tasks(n)
+    legacy, legacy_ms = timed(lambda: legacy_sort_tasks(tasks))
+    columns, build_ms = timed(lambda: TaskColumns.from_tasks(tasks))
+    order, rank_ms = timed(lambda: rank_order(columns))
+    top, top_ms = timed(lambda: top_k(columns, K))
+    _, score_ms = timed(lambda: score_order(columns, k=K))
+    _, score_full_ms = timed(lambda: score_order(columns))
+
+    assert [t["id"] for t in legacy] == [tasks[i]["id"] for i in order], "ordering differs from legacy"
+    assert list(top) == list(order[:K]), "top-k differs from the full ranking"
+
+    print(f"  n={n:<8} legacy sort_tasks  {legacy_ms:9.1f} ms")
+    print(f"  {'':10} build columns     {build_ms:9.1f} ms")
+    print(f"  {'':10} full rank         {rank_ms:9.1f} ms   (build + rank {build_ms + rank_ms:.1f} ms)")
+    print(f"  {'':10} top-{K} rank       {top_ms:9.1f} ms")
+    print(f"  {'':10} score full sort   {score_full_ms:9.1f} ms")
+    print(f"  {'':10} score top-{K}      {score_ms:9.1f} ms")
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    print(f"numpy: {'yes' if prioritizer.np is not None else 'no (pure-Python fallback)'}")
+    for n in sizes:
+        run(n)
+
+if __name__ == "__main__":
+    main()
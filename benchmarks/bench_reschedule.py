@@ -0,0 +1,87 @@
+"""
+Compares keeping a schedule current with scheduler.IncrementalScheduler
+(repairs driven by task_manager change events) against recomputing it
+from scratch after every change.
+
+Usage: python benchmarks/bench_reschedule.py [N_TASKS] [N_CHANGES]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_resched_"), "tasks.db")
+
+from project.agents import task_manager  # noqa: E402
+from project.agents.prioritizer import get_prioritized_tasks  # noqa: E402
+from project.agents.scheduler import IncrementalScheduler, schedule_tasks  # noqa: E402
+
+START = date(2026, 1, 5)
+WORKDAYS = {day: [("09:00", "12:30"), ("13:30", "18:00")] for day in range(5)}
+
+def random_change(rng, ids, step):
+    roll = rng.random()
+    if roll < 0.3:
+        task = task_manager.add_task(f"new {step}", rng.choice([30, 60, 90]), priority=rng.choice(["medium", "low"]))
+        ids.append(task["id"])
+    elif roll < 0.5:
+        task_manager.delete_task(ids.pop(rng.randrange(len(ids))))
+    elif roll < 0.8:
+        task_manager.update_task(rng.choice(ids), {"duration_minutes": rng.choice([15, 45, 120])})
+    else:
+        task_manager.update_task(rng.choice(ids), {"status": "done"})
+
+def main():
+    n_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_changes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    # About 80% of the working time in the horizon gets used
+    days = 7 * (n_tasks * 60 // (5 * 465) + 1) * 5 // 4
+    rng = random.Random(7)
+
+    task_manager.upsert_tasks([{
+        "task_name": f"task {i}",
+        "duration_minutes": rng.choice([15, 30, 60, 90, 120]),
+        "priority": rng.choice(["high", "medium", "low"]),
+        "deadline": rng.choice([None, None, f"2026-{rng.randint(2, 12):02d}-15"]),
+    } for i in range(n_tasks)])
+    ids = [t["id"] for t in task_manager.get_all_tasks()]
+    print(f"{n_tasks} tasks over {days} days, {n_changes} changes")
+
+    t0 = time.perf_counter()
+    scheduler = IncrementalScheduler(START, days, WORKDAYS, subscribe=False)
+    print(f"  initial placement     {(time.perf_counter() - t0) * 1000:8.1f} ms")
+
+    # Baseline: the task_manager writes alone, nobody listening
+    t0 = time.perf_counter()
+    for step in range(n_changes):
+        random_change(rng, ids, step)
+    writes = (time.perf_counter() - t0) / n_changes
+
+    # Incremental: the listener repairs the placement inside each write
+    scheduler = IncrementalScheduler(START, days, WORKDAYS)
+    t0 = time.perf_counter()
+    for step in range(n_changes):
+        random_change(rng, ids, step)
+    incremental = (time.perf_counter() - t0) / n_changes - writes
+    result = scheduler.result()
+    problems = scheduler.check(repair=False)
+    scheduler.close()
+    print(f"  incremental repair    {incremental * 1000:8.2f} ms/change "
+          f"(repairs {scheduler.repairs}, fallback rebuilds {scheduler.rebuilds - 1})")
+    print(f"  consistency check     {'ok' if not problems else problems[:3]}")
+
+    # Full recompute after every write
+    t0 = time.perf_counter()
+    for step in range(n_changes):
+        random_change(rng, ids, step)
+        full = schedule_tasks(get_prioritized_tasks(), START, days=days, working_hours=WORKDAYS)
+    recompute = (time.perf_counter() - t0) / n_changes - writes
+    print(f"  full recompute        {recompute * 1000:8.2f} ms/change")
+    print(f"  placed: incremental {len(result['events'])} events, full {len(full['events'])} events")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Exercises the LLM transport (project/llm_transport.py) against the stub
+LLM with injected faults, and checks the expected behavior of each part:
+
+- retries: with 30% of requests failing with 503, calls still succeed;
+- Retry-After: 429 replies are retried no sooner than the header says;
+- circuit breaker: during an outage calls fail fast once it opens, and
+  a probe closes it again after the cooldown once the upstream recovers;
+- hedging: with 5% of requests stalling, p99 latency drops.
+
+Usage: python benchmarks/bench_resilience.py
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_resilience_"), "tasks.db"))
+
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+from project.llm_transport import Transport, CircuitBreaker  # noqa: E402
+
+failed_checks = []
+
+def check(label, ok):
+    print(f"    [{'ok' if ok else 'FAIL'}] {label}")
+    if not ok:
+        failed_checks.append(label)
+
+def use_transport(**kwargs):
+    async def init():
+        llm_wrapper._client_state()
+        llm_wrapper._transport = Transport(**kwargs)
+    llm_wrapper.run_coroutine(init()).result()
+    return llm_wrapper._transport
+
+def call(timeout=None):
+    # Unique prompts: no cache hits, no coalescing
+    t0 = time.perf_counter()
+    text = llm_wrapper.call_llm_system(f"ping {uuid.uuid4().hex}", timeout=timeout, use_cache=False)
+    return not llm_wrapper.is_error_response(text), time.perf_counter() - t0
+
+def run(n, concurrency=8, timeout=None):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda _: call(timeout), range(n)))
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def main():
+    server = start_stub_server(delay=0.02)
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+    no_breaker = CircuitBreaker(threshold=0)
+
+    print("retries, 30% of requests fail with 503")
+    server.fail_rate = 0.3
+    for retries in (0, 2):
+        transport = use_transport(retries=retries, retry_base=0.05, breaker=no_breaker)
+        ok = sum(success for success, _ in run(200))
+        print(f"  retries={retries}: {ok}/200 succeeded, {transport.counters['retries']} retries")
+    check("at least 95% succeed with 2 retries", ok >= 190)
+
+    print("Retry-After on 429")
+    server.fail_rate, server.fail_status, server.retry_after = 1.0, 429, 0.5
+    use_transport(retries=1, retry_base=0.01, breaker=no_breaker)
+    success, elapsed = call()
+    print(f"  two 429s with Retry-After: 0.5 -> gave up after {elapsed:.2f}s")
+    check("waited for Retry-After before retrying", elapsed >= 0.5)
+    server.fail_rate, server.fail_status, server.retry_after = 0.0, 503, None
+
+    print("circuit breaker, full outage")
+    server.fail_rate = 1.0
+    transport = use_transport(retries=0, breaker=CircuitBreaker(threshold=5, cooldown=1.0))
+    before = server.requests
+    results = [call() for _ in range(50)]
+    print(f"  50 calls: {server.requests - before} reached the upstream, "
+          f"{transport.counters['short_circuited']} failed fast, breaker {transport.breaker.state}")
+    check("breaker opened after 5 failures", server.requests - before == 5 and transport.breaker.state == "open")
+    check("open breaker fails fast", max(t for _, t in results[5:]) < 0.05)
+    server.fail_rate = 0.0
+    time.sleep(1.1)
+    success, _ = call()
+    check("probe after the cooldown closes it", success and transport.breaker.state == "closed")
+
+    print("hedging, 5% of requests stall for 1 s")
+    server.slow_rate, server.slow_delay = 0.05, 1.0
+    for hedge in (False, True):
+        transport = use_transport(retries=0, hedge=hedge)
+        run(40)  # warm the latency window
+        latencies = [t for _, t in run(400)]
+        print(f"  hedge={hedge!s:<5}  p50 {percentile(latencies, 0.5) * 1000:6.0f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.0f} ms  {transport.counters['hedged']} hedged, "
+              f"{transport.counters['hedge_wins']} won by the hedge")
+        p99 = percentile(latencies, 0.99)
+    check("hedged p99 under the stall time", p99 < 0.5)
+
+    print("all checks passed" if not failed_checks else f"{len(failed_checks)} checks failed")
+    sys.exit(1 if failed_checks else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Times scheduler.schedule_tasks on synthetic task lists spread over months:
+mixed durations, deadlines, scheduled dates and priorities, with and
+without splitting, plus a few busy blocks per week. Each size runs on a
+horizon sized to hold all the work ("fits") and on a fixed 26 weeks
+("overloaded", most tasks end up in overflow).
+
+Usage: python benchmarks/bench_scheduler.py [N ...]   (default 1000 10000 50000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The scheduler imports task_manager, which opens the tasks DB on import
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_sched_"), "tasks.db"))
+
+from project.agents.scheduler import schedule_tasks  # noqa: E402
+
+START = date(2026, 1, 5)  # a Monday
+HORIZON_DAYS = 26 * 7
+WORKDAYS = {day: [("09:00", "12:30"), ("13:30", "18:00")] for day in range(5)}
+MINUTES_PER_WEEK = 5 * 465 - 180  # minus the busy blocks
+
+def make_tasks(n, horizon_days, seed=1):
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        task = {
+            "id": f"t{i}",
+            "task_name": f"task {i}",
+            "duration_minutes": rng.choice([15, 30, 45, 60, 90, 120, 240, 480]),
+            "priority": rng.choice(["high", "medium", "low"]),
+            "deadline": None,
+            "scheduled_date": None,
+        }
+        roll = rng.random()
+        if roll < 0.4:
+            task["deadline"] = (START + timedelta(days=rng.randrange(horizon_days + 30))).isoformat()
+        elif roll < 0.6:
+            task["scheduled_date"] = (START + timedelta(days=rng.randrange(horizon_days))).isoformat()
+        tasks.append(task)
+    # Same order get_prioritized_tasks produces
+    rank = {"high": 0, "medium": 1, "low": 2}
+    tasks.sort(key=lambda t: (t["deadline"] or "9999-12-31", rank[t["priority"]], t["duration_minutes"]))
+    return tasks
+
+def make_busy(horizon_days):
+    busy = []
+    for week in range(horizon_days // 7):
+        day = datetime.combine(START + timedelta(days=7 * week), datetime.min.time())
+        busy.append((day.replace(hour=10), day.replace(hour=11)))           # Monday standup
+        busy.append((day.replace(hour=14) + timedelta(days=3), day.replace(hour=16) + timedelta(days=3)))
+    return busy
+
+def run(n, label, horizon_days=None):
+    if horizon_days is None:
+        # Enough weeks for the expected load (about 135 min per task) plus slack
+        horizon_days = 7 * (int(n * 135 * 1.15 / MINUTES_PER_WEEK) + 1)
+    tasks = make_tasks(n, horizon_days)
+    busy = make_busy(horizon_days)
+    print(f" {label}: {horizon_days // 7} weeks")
+    for split in (False, True):
+        t0 = time.perf_counter()
+        result = schedule_tasks(tasks, START, days=horizon_days, working_hours=WORKDAYS, busy=busy, split=split)
+        elapsed = time.perf_counter() - t0
+        placed = len({e["task_id"] for e in result["events"]})
+        hours = sum((e["end"] - e["start"]).total_seconds() for e in result["events"]) / 3600
+        print(f"  n={n:<6} split={str(split):<5} {elapsed * 1000:8.1f} ms  placed {placed:>6} "
+              f"({hours:6.0f} h)  events {len(result['events']):>6}  overflow {len(result['overflow']):>6}")
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f"Horizon from {START}, weekdays 09:00-12:30 / 13:30-18:00")
+    for n in sizes:
+        run(n, "fits")
+        run(n, "overloaded", HORIZON_DAYS)
+
+if __name__ == "__main__":
+    main()
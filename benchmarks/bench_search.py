@@ -0,0 +1,57 @@
+"""
+Name search over N tasks: task_manager.search_tasks on the FTS5 index
+against the get_all_tasks() + Python scan it replaces, plus the cost of
+keeping the index up to date on insert.
+
+Usage: python benchmarks/bench_search.py [N]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "tasks.db")
+
+from project.agents import task_manager  # noqa: E402
+
+VERBS = ["write", "review", "call", "email", "plan", "fix", "book", "pay", "prepare", "clean", "buy", "update"]
+OBJECTS = ["report", "invoice", "dentist", "landlord", "slides", "budget", "car", "garden", "groceries",
+           "passport", "contract", "newsletter", "roadmap", "taxes", "website", "backups"]
+QUERIES = ["dentist", "quarterly taxes", "the task about the car insurance", "invo", "landlord 4821"]
+
+def name(rng, i):
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(OBJECTS)} {i}"
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat, result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+    batch = 10_000
+
+    t0 = time.perf_counter()
+    for start in range(0, n, batch):
+        task_manager.upsert_tasks([{"task_name": name(rng, i), "duration_minutes": 30}
+                                   for i in range(start, min(n, start + batch))])
+    print(f"{n} tasks inserted (index kept by triggers) in {time.perf_counter() - t0:.1f}s")
+
+    for query in QUERIES:
+        elapsed, hits = timed(lambda: task_manager.search_tasks(query, 10), 20)
+        elapsed_r, (task, _) = timed(lambda: task_manager.resolve_task_reference(query), 20)
+        print(f"  {query!r:<36} search {elapsed * 1000:7.2f} ms ({len(hits)} hits)   "
+              f"resolve {elapsed_r * 1000:7.2f} ms -> {task.task_name if task else None!r}")
+
+    words = task_manager._search_terms("dentist")
+    elapsed, hits = timed(lambda: [t for t in task_manager.get_all_tasks()
+                                   if all(w in t.task_name.lower() for w in words)][:10], 1)
+    print(f"  get_all_tasks() + scan for 'dentist' {elapsed * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Time-to-first-byte of /api/chat vs /api/chat/stream against the local
+stub LLM, which streams its reply in small chunks with a delay between.
+
+Usage: python benchmarks/bench_stream.py [runs] [chunk_delay_seconds]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_stream_"), "tasks.db")
+
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+import app as flask_app  # noqa: E402
+
+REPLY = json.dumps({
+    "action": "chat",
+    "parameters": {},
+    "response": "You have three tasks due this week: finish the report, book the dentist "
+                "and renew the car insurance. The report is the most urgent."
+})
+
+def measure(client, path):
+    start = time.perf_counter()
+    resp = client.post(path, json={"message": "what's due this week?"})
+    first = None
+    for _ in resp.response:
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    chunk_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    server = start_stub_server(reply=REPLY, chunk_size=8, chunk_delay=chunk_delay)
+    llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    llm_wrapper.LLM_API_KEY = "stub"
+    llm_wrapper.LLM_API_FORMAT = "openai"
+    client = flask_app.app.test_client()
+
+    print(f"runs={runs}, reply={len(REPLY)} chars in 8-char chunks, {chunk_delay}s apart")
+    for path in ("/api/chat", "/api/chat/stream"):
+        llm_wrapper._cache.clear()
+        samples = []
+        for _ in range(runs):
+            llm_wrapper._cache.clear()
+            samples.append(measure(client, path))
+        ttfb = sorted(s[0] for s in samples)[len(samples) // 2]
+        total = sorted(s[1] for s in samples)[len(samples) // 2]
+        print(f"  {path:<18} ttfb p50 {ttfb * 1000:>7.1f} ms   total p50 {total * 1000:>7.1f} ms")
+
+if __name__ == "__main__":
+    main()
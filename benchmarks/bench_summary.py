@@ -0,0 +1,72 @@
+"""
+Cost of building the weekly summary input as the task count grows: the
+old prompt (every task as JSON) against the SQL aggregates sent now, plus
+a check that the SQL aggregates match the generic TaskStore.summary_stats
+scan.
+
+Usage: python benchmarks/bench_summary.py [N ...]   (default 1000 10000 100000)
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_summary_"), "tasks.db")
+
+from project.database import db_session  # noqa: E402
+from project.models import json_default  # noqa: E402
+from project.storage import TaskStore, get_store  # noqa: E402
+from project.agents.task_manager import query_tasks  # noqa: E402
+from project.agents.summary_agent import weekly_stats, compact_stats, format_summary  # noqa: E402
+
+TODAY = date(2026, 3, 2)
+# Rough chars-per-token ratio for English / JSON text
+CHARS_PER_TOKEN = 4
+
+def fill(n, seed=1):
+    rng = random.Random(seed)
+    days = [None] * 2 + [(TODAY + timedelta(days=d)).isoformat() for d in range(-20, 120)]
+    with db_session() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.executemany(
+            "INSERT INTO tasks (id, task_name, duration_minutes, priority, deadline, created_at, status, "
+            "scheduled_date, revision) VALUES (?, ?, ?, ?, ?, '2026-01-01', ?, ?, 0)",
+            ((f"t{i:07d}", f"task number {i}", rng.choice([None, 15, 30, 60, 120]),
+              rng.choice(["high", "medium", "low", "High", None]), rng.choice(days),
+              rng.choice(["pending", "pending", "pending", "done"]), rng.choice(days)) for i in range(n)))
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+def run(n):
+    fill(n)
+    old_prompt, old_ms = timed(lambda: json.dumps(
+        query_tasks(columns=("id", "task_name", "duration_minutes", "deadline", "priority")), default=json_default))
+    stats, stats_ms = timed(lambda: weekly_stats(TODAY))
+    new_prompt = json.dumps(compact_stats(stats), separators=(",", ":"))
+    scanned, scan_ms = timed(lambda: weekly_stats(TODAY, store=ScanStore()))
+    assert format_summary(stats) == format_summary(scanned), "SQL and scanned stats differ"
+
+    print(f"  n={n:<7} old prompt  {len(old_prompt) // CHARS_PER_TOKEN:>9} tokens  {old_ms:8.1f} ms")
+    print(f"  {'':9} aggregates  {len(new_prompt) // CHARS_PER_TOKEN:>9} tokens  {stats_ms:8.1f} ms "
+          f"(python scan {scan_ms:.1f} ms)")
+
+class ScanStore(TaskStore):
+    # The SQLite store without its SQL override: exercises the generic scan
+    def all(self):
+        return get_store("sqlite").all()
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    for n in sizes:
+        run(n)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+What the dashboard panels cost as the task history grows: GET /api/today
+and /api/week (read from the day_totals table and the open-task indexes)
+against the full GET /api/tasks they used to filter client-side.
+
+Usage: python benchmarks/bench_views.py [N ...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TASKS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_views_"), "tasks.db")
+
+from benchmarks.generate import generate_tasks, START  # noqa: E402
+from project.database import db_session  # noqa: E402
+from project.agents import task_manager  # noqa: E402
+import app as flask_app  # noqa: E402
+
+READS = 50
+OPEN = 500  # open tasks, the rest of each size is done history
+
+def measure(client, url):
+    samples, size = [], 0
+    for _ in range(READS):
+        t0 = time.perf_counter()
+        resp = client.get(url)
+        samples.append(time.perf_counter() - t0)
+        assert resp.status_code == 200
+        size = len(resp.data)
+    return statistics.median(samples), size
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 50000]
+    client = flask_app.app.test_client()
+    urls = {
+        "/api/today": f"/api/today?date={START.isoformat()}",
+        "/api/week": f"/api/week?start={START.isoformat()}&today={START.isoformat()}",
+        "/api/tasks": "/api/tasks",
+    }
+    print(f"{OPEN} open tasks, median of {READS} reads")
+    for n in sizes:
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        tasks = generate_tasks(n, deadline_days=14, with_ids=True)
+        for t in tasks[OPEN:]:
+            t["status"] = "done"
+        task_manager.upsert_tasks(tasks)
+        print(f"{n} tasks:")
+        for label, url in urls.items():
+            median, size = measure(client, url)
+            print(f"  {label:<12} {median * 1000:8.2f} ms  {size / 1024:9.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Synthetic task generator for the benchmarks. Produces task dicts in the
+shape upsert_tasks and the /api/tasks POST accept, with configurable
+size and deadline / priority / duration distributions, reproducible
+from `seed`.
+
+Usage: python benchmarks/generate.py N [--seed S] [--deadline-share 0.5] ...  (JSON to stdout)
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import date, timedelta
+
+VERBS = ["write", "review", "call", "email", "plan", "fix", "book", "pay", "prepare", "clean", "buy", "update"]
+OBJECTS = ["report", "invoice", "dentist", "landlord", "slides", "budget", "car", "garden", "groceries",
+           "passport", "contract", "newsletter", "roadmap", "taxes", "website", "backups"]
+DURATIONS = (15, 30, 45, 60, 90, 120, 240)
+START = date(2026, 1, 5)  # a Monday; fixed so runs are comparable
+
+def generate_tasks(n, seed=0, start=START, deadline_share=0.5, deadline_days=60, overdue_share=0.1,
+                   scheduled_share=0.2, priority_weights=(1, 2, 1), durations=DURATIONS,
+                   with_ids=False):
+    """
+    `n` task dicts. A `deadline_share` of them get a deadline up to
+    `deadline_days` after `start` (an `overdue_share` of those before it),
+    a `scheduled_share` of the rest a scheduled date; priorities are drawn
+    high/medium/low with `priority_weights`.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        task = {
+            "task_name": f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {i}",
+            "duration_minutes": rng.choice(durations),
+            "priority": rng.choices(("high", "medium", "low"), priority_weights)[0],
+            "deadline": None,
+            "scheduled_date": None,
+        }
+        if rng.random() < deadline_share:
+            if rng.random() < overdue_share:
+                offset = -rng.randrange(1, 15)
+            else:
+                offset = rng.randrange(deadline_days + 1)
+            task["deadline"] = (start + timedelta(days=offset)).isoformat()
+        elif rng.random() < scheduled_share:
+            task["scheduled_date"] = (start + timedelta(days=rng.randrange(deadline_days + 1))).isoformat()
+        if with_ids:
+            task["id"] = f"bench-{seed}-{i}"
+        tasks.append(task)
+    return tasks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("n", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--deadline-share", type=float, default=0.5)
+    parser.add_argument("--deadline-days", type=int, default=60)
+    parser.add_argument("--overdue-share", type=float, default=0.1)
+    parser.add_argument("--priority-weights", default="1,2,1", help="high,medium,low")
+    args = parser.parse_args()
+    weights = tuple(float(w) for w in args.priority_weights.split(","))
+    json.dump(generate_tasks(args.n, args.seed, deadline_share=args.deadline_share,
+                             deadline_days=args.deadline_days, overdue_share=args.overdue_share,
+                             priority_weights=weights), sys.stdout, indent=1)
+
+if __name__ == "__main__":
+    main()
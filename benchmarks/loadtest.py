@@ -0,0 +1,169 @@
+"""
+Load test for the web app: concurrent keep-alive clients mixing
+GET /api/tasks (board reads) and POST /api/chat (LLM round trips),
+reporting requests/sec and latency percentiles per endpoint.
+
+By default it starts everything itself: the stub LLM (with a fixed
+delay), and project/server.py on temporary databases. Pass --url to
+drive a server that is already running instead.
+
+Usage: python benchmarks/loadtest.py [--workers 4] [--threads 16] [--clients 32]
+                                     [--duration 10] [--chat-ratio 0.2] [--llm-delay 0.2]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(args, llm_url):
+    tmp = tempfile.mkdtemp(prefix="loadtest_")
+    port = free_port()
+    env = dict(os.environ,
+               TASKS_DB_PATH=os.path.join(tmp, "tasks.db"),
+               CHAT_HISTORY_PATH=os.path.join(tmp, "chat.db"),
+               LLM_CACHE_PATH=os.path.join(tmp, "llm_cache.db"),
+               LLM_API_URL=llm_url, LLM_API_KEY="stub", LLM_API_FORMAT="openai")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "project", "server.py"), "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--threads", str(args.threads)],
+        cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            request(http.client.HTTPConnection("127.0.0.1", port, timeout=5), "GET", "/api/tasks?limit=1")
+            return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+def request(conn, method, path, body=None):
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    resp = conn.getresponse()
+    resp.read()
+    if resp.status >= 400:
+        raise OSError(f"HTTP {resp.status}")
+    return resp
+
+def seed(url, n):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    rng = random.Random(1)
+    request(conn, "POST", "/api/tasks", [{
+        "task_name": f"seed task {i}",
+        "duration_minutes": rng.choice([15, 30, 60, 90]),
+        "priority": rng.choice(["high", "medium", "low"]),
+        "deadline": rng.choice([None, "2026-12-01", "2027-01-15"]),
+    } for i in range(n)])
+
+def client(url, args, stop, results, lock, seed_value):
+    parsed = urlparse(url)
+    rng = random.Random(seed_value)
+    session = uuid.uuid4().hex
+    conn = None
+    local = {"tasks": [], "chat": [], "errors": 0}
+    while not stop.is_set():
+        if conn is None:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+        chat = rng.random() < args.chat_ratio
+        t0 = time.perf_counter()
+        try:
+            if chat:
+                # Unique text: misses the fast path and the LLM cache, so every call reaches the LLM
+                request(conn, "POST", "/api/chat",
+                        {"message": f"what do you think about {uuid.uuid4().hex}?", "session_id": session})
+            else:
+                request(conn, "GET", "/api/tasks?limit=50")
+        except (OSError, http.client.HTTPException):
+            local["errors"] += 1
+            conn.close()
+            conn = None
+            continue
+        local["chat" if chat else "tasks"].append(time.perf_counter() - t0)
+    with lock:
+        for key in ("tasks", "chat"):
+            results[key].extend(local[key])
+        results["errors"] += local["errors"]
+
+def report(label, samples, elapsed):
+    if not samples:
+        print(f"  {label:<14} no requests")
+        return
+    print(f"  {label:<14} {len(samples):>7} req  {len(samples) / elapsed:>8.1f} req/s   "
+          f"p50 {percentile(samples, 0.5) * 1000:>7.1f} ms  p90 {percentile(samples, 0.9) * 1000:>7.1f} ms  "
+          f"p99 {percentile(samples, 0.99) * 1000:>7.1f} ms  max {max(samples) * 1000:>7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="drive an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--chat-ratio", type=float, default=0.2)
+    parser.add_argument("--llm-delay", type=float, default=0.2)
+    parser.add_argument("--tasks", type=int, default=500, help="tasks to seed before the run")
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        stub = start_stub_server(delay=args.llm_delay)
+        proc, url = start_server(args, f"http://127.0.0.1:{stub.server_port}/v1/chat/completions")
+        print(f"server: project/server.py --workers {args.workers} --threads {args.threads}, "
+              f"stub LLM delay {args.llm_delay:g}s")
+    try:
+        if args.tasks:
+            seed(url, args.tasks)
+        print(f"{args.clients} clients for {args.duration:g}s, {args.chat_ratio:.0%} chat")
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        results = {"tasks": [], "chat": [], "errors": 0}
+        threads = [threading.Thread(target=client, args=(url, args, stop, results, lock, i))
+                   for i in range(args.clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        report("GET /api/tasks", results["tasks"], elapsed)
+        report("POST /api/chat", results["chat"], elapsed)
+        total = len(results["tasks"]) + len(results["chat"])
+        print(f"  total          {total:>7} req  {total / elapsed:>8.1f} req/s   errors {results['errors']}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
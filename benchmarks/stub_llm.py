@@ -0,0 +1,160 @@
+"""
+Local stand-in for the LLM API, speaking both the Gemini
+(`...:generateContent`) and OpenAI chat-completions response formats.
+
+Paths ending in ":generateContent" get Gemini-shaped replies, everything
+else OpenAI-shaped ones. ":streamGenerateContent" and OpenAI requests with
+"stream": true get the reply as chunked SSE, `chunk_size` characters per
+event with `chunk_delay` seconds between events. Point the wrapper at it with, e.g.:
+
+    LLM_API_URL=http://127.0.0.1:8765/v1/chat/completions LLM_API_KEY=x
+
+Faults can be injected (and changed on the running server's attributes):
+a `fail_rate` share of requests get HTTP `fail_status` (with Retry-After
+when `retry_after` is set), and a `slow_rate` share take `slow_delay`
+seconds extra.
+
+Usage: python benchmarks/stub_llm.py [port] [delay_seconds] [fail_rate] [slow_rate]
+"""
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = json.dumps({
+    "action": "chat",
+    "parameters": {},
+    "response": "Hello from the stub LLM."
+})
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle hold the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _prompt(self, body):
+        if "contents" in body:
+            return body["contents"][0]["parts"][0]["text"]
+        return body["messages"][-1]["content"]
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.requests += 1
+            fail = server.rng.random() < server.fail_rate
+            slow = server.rng.random() < server.slow_rate
+        if server.delay:
+            time.sleep(server.delay)
+        if slow:
+            time.sleep(server.slow_delay)
+        if fail:
+            with server.lock:
+                server.failures += 1
+            data = b'{"error": "injected fault"}'
+            self.send_response(server.fail_status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if server.retry_after is not None:
+                self.send_header("Retry-After", str(server.retry_after))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        text = server.reply(self._prompt(body)) if callable(server.reply) else server.reply
+        path = self.path.split("?")[0]
+        if path.endswith(":streamGenerateContent") or body.get("stream"):
+            try:
+                self._stream(text, gemini=path.endswith(":streamGenerateContent"))
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client stopped reading early
+            return
+        if server.chunk_delay:
+            # Non-streamed replies still take the full generation time
+            time.sleep(server.chunk_delay * -(-len(text) // server.chunk_size))
+        if path.endswith(":generateContent"):
+            payload = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+        else:
+            payload = {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. a hedged request that lost)
+
+    def _stream(self, text, gemini):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data):
+            frame = f"data: {data}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(frame):x}\r\n".encode("ascii") + frame + b"\r\n")
+            self.wfile.flush()
+
+        for i in range(0, len(text), server.chunk_size):
+            piece = text[i:i + server.chunk_size]
+            if gemini:
+                send(json.dumps({"candidates": [{"content": {"parts": [{"text": piece}]}}]}))
+            else:
+                send(json.dumps({"choices": [{"delta": {"content": piece}}]}))
+            if server.chunk_delay:
+                time.sleep(server.chunk_delay)
+        if not gemini:
+            send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+def start_stub_server(port=0, delay=0.0, reply=DEFAULT_REPLY, chunk_size=8, chunk_delay=0.0,
+                      fail_rate=0.0, fail_status=503, retry_after=None, slow_rate=0.0, slow_delay=1.0, seed=0):
+    """
+    Starts the stub in a daemon thread and returns the server; its base
+    URL is f"http://127.0.0.1:{server.server_port}". `reply` is a string
+    or a function of the prompt. `server.requests` and `server.failures`
+    count requests and injected failures.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubLLMHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.reply = reply
+    server.chunk_size = chunk_size
+    server.chunk_delay = chunk_delay
+    server.fail_rate = fail_rate
+    server.fail_status = fail_status
+    server.retry_after = retry_after
+    server.slow_rate = slow_rate
+    server.slow_delay = slow_delay
+    server.rng = random.Random(seed)
+    server.requests = 0
+    server.failures = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    fail_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    slow_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    server = start_stub_server(port, delay, fail_rate=fail_rate, slow_rate=slow_rate)
+    print(f"Stub LLM listening on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,255 @@
+"""
+Benchmark suite for the hot paths, on a temporary database filled by
+benchmarks/generate.py:
+
+- task_manager CRUD: add_task, update_task, delete_tasks, upsert_tasks, get_all_tasks;
+- prioritizer.sort_tasks and scheduler.schedule_week;
+- ICS writing (scheduler.write_ics);
+- GET/POST /api/tasks through Flask's test client;
+- POST /api/chat against the stub LLM (benchmarks/stub_llm.py).
+
+Each case runs `--repeat` times and reports the median. `--json` saves
+the results; `--baseline` compares against a saved run and exits 1 when
+a case got slower by more than `--threshold` (default 20%).
+
+Usage: python benchmarks/suite.py [--size 2000] [--repeat 5] [--only crud,api]
+                                  [--json out.json] [--baseline base.json] [--threshold 0.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+TMP_DIR = tempfile.mkdtemp(prefix="bench_suite_")
+os.environ["TASKS_DB_PATH"] = os.path.join(TMP_DIR, "tasks.db")
+
+from benchmarks.generate import generate_tasks, START  # noqa: E402
+from benchmarks.stub_llm import start_stub_server  # noqa: E402
+from project import llm_wrapper  # noqa: E402
+from project.database import db_session  # noqa: E402
+from project.agents import task_manager, prioritizer, scheduler  # noqa: E402
+import app as flask_app  # noqa: E402
+
+scheduler.OUTPUT_ICS = Path(TMP_DIR) / "schedule.ics"
+SCHEDULE_WEEKS = 4
+API_READS = 20  # GET /api/tasks per repeat
+CHAT_MESSAGES = 50  # POST /api/chat per repeat
+
+CASES = {}
+
+def case(name):
+    """Registers `fn(size, seed)`, which returns (seconds, operations) for one repeat."""
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+def reset_db(tasks=()):
+    with db_session() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM deleted_tasks")
+    if tasks:
+        task_manager.upsert_tasks(tasks)
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+# --- task_manager ---------------------------------------------------------------
+
+@case("crud.add_task")
+def crud_add(size, seed):
+    reset_db()
+    tasks = generate_tasks(size, seed)
+
+    def run():
+        for t in tasks:
+            task_manager.add_task(t["task_name"], duration_minutes=t["duration_minutes"],
+                                  deadline=t["deadline"], priority=t["priority"],
+                                  scheduled_date=t["scheduled_date"])
+    return timed(run), size
+
+@case("crud.update_task")
+def crud_update(size, seed):
+    reset_db(generate_tasks(size, seed, with_ids=True))
+    ids = [f"bench-{seed}-{i}" for i in range(size)]
+
+    def run():
+        for i, task_id in enumerate(ids):
+            task_manager.update_task(task_id, {"priority": ("high", "medium", "low")[i % 3]})
+    return timed(run), size
+
+@case("crud.delete_tasks")
+def crud_delete(size, seed):
+    reset_db(generate_tasks(size, seed, with_ids=True))
+    ids = [f"bench-{seed}-{i}" for i in range(size)]
+    # In batches of 100, as the bulk endpoints send them
+    return timed(lambda: [task_manager.delete_tasks(ids[i:i + 100]) for i in range(0, size, 100)]), size
+
+@case("crud.upsert_tasks")
+def crud_upsert(size, seed):
+    reset_db()
+    tasks = generate_tasks(size, seed)
+    return timed(task_manager.upsert_tasks, tasks), size
+
+@case("crud.get_all_tasks")
+def crud_get_all(size, seed):
+    reset_db(generate_tasks(size, seed))
+    return timed(task_manager.get_all_tasks), 1
+
+# --- prioritizer / scheduler ------------------------------------------------------
+
+@case("prioritizer.sort_tasks")
+def sort_tasks(size, seed):
+    tasks = generate_tasks(size, seed)
+    return timed(prioritizer.sort_tasks, tasks), 1
+
+@case("scheduler.schedule_week")
+def schedule_week(size, seed):
+    reset_db(generate_tasks(size, seed, deadline_days=7 * SCHEDULE_WEEKS, with_ids=True))
+    # Tasks that don't fit are printed; keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed = timed(scheduler.schedule_week, START, SCHEDULE_WEEKS, None, (), True, False)
+    return elapsed, 1
+
+@case("scheduler.write_ics")
+def write_ics(size, seed):
+    tasks = prioritizer.sort_tasks(generate_tasks(size, seed, deadline_days=7 * SCHEDULE_WEEKS, with_ids=True))
+    events = scheduler.schedule_tasks(tasks, START, days=7 * SCHEDULE_WEEKS)["events"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        return timed(scheduler.write_ics, events, os.path.join(TMP_DIR, "bench.ics")), 1
+
+# --- HTTP ---------------------------------------------------------------------------
+
+@case("api.get_tasks")
+def api_get_tasks(size, seed):
+    reset_db(generate_tasks(size, seed))
+    client = flask_app.app.test_client()
+
+    def run():
+        for _ in range(API_READS):
+            resp = client.get("/api/tasks")
+            assert resp.status_code == 200
+    return timed(run), API_READS
+
+@case("api.post_tasks")
+def api_post_tasks(size, seed):
+    reset_db()
+    client = flask_app.app.test_client()
+    tasks = generate_tasks(size, seed)
+
+    def run():
+        resp = client.post("/api/tasks", json=tasks)
+        assert resp.status_code == 200
+    return timed(run), 1
+
+_stub = None
+
+@case("api.chat")
+def api_chat(size, seed):
+    global _stub
+    if _stub is None:
+        _stub = start_stub_server()
+        llm_wrapper.LLM_API_URL = f"http://127.0.0.1:{_stub.server_port}/v1/chat/completions"
+        llm_wrapper.LLM_API_KEY = "stub"
+        llm_wrapper.LLM_API_FORMAT = "openai"
+    client = flask_app.app.test_client()
+    # Open-ended messages go past the local intent parser to the LLM; the
+    # seed keeps them out of the response cache across repeats
+    messages = [f"how does my week look, question {seed}-{i}" for i in range(CHAT_MESSAGES)]
+
+    def run():
+        for message in messages:
+            resp = client.post("/api/chat", json={"message": message})
+            assert resp.status_code == 200
+    return timed(run), CHAT_MESSAGES
+
+# --- Running and comparing ------------------------------------------------------------
+
+def run_suite(names, size, repeat):
+    results = {}
+    for name in names:
+        samples = []
+        for r in range(repeat + 1):
+            elapsed, ops = CASES[name](size, r)
+            if r:  # the first run warms caches and connections
+                samples.append(elapsed)
+        median = statistics.median(samples)
+        results[name] = {"median_ms": round(median * 1000, 3), "min_ms": round(min(samples) * 1000, 3),
+                         "ops": ops, "ops_per_sec": round(ops / median, 1) if median else None}
+        print(f"  {name:<26} {median * 1000:10.2f} ms  (min {min(samples) * 1000:9.2f})  "
+              f"{results[name]['ops_per_sec']:>12,.1f} ops/s")
+    return results
+
+def compare(results, baseline, threshold):
+    """Prints the change against `baseline` per case; returns the names that regressed."""
+    regressed = []
+    print(f"against baseline ({baseline['meta']['date']}, size {baseline['meta']['size']}):")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"  {name:<26} (not in baseline)")
+            continue
+        change = result["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"  {name:<26} {base['median_ms']:10.2f} -> {result['median_ms']:10.2f} ms  {change:+7.1%}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the hot paths")
+    parser.add_argument("--size", type=int, default=2000, help="tasks per case")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="comma-separated case names or prefixes, e.g. crud,api.chat")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    names = list(CASES)
+    if args.only:
+        prefixes = tuple(p.strip() for p in args.only.split(","))
+        names = [n for n in names if n.startswith(prefixes)]
+    if not names:
+        parser.error(f"no cases match {args.only!r}; have {', '.join(CASES)}")
+
+    print(f"{len(names)} cases, {args.size} tasks, median of {args.repeat}")
+    results = run_suite(names, args.size, args.repeat)
+    report = {
+        "meta": {"date": datetime.now().isoformat(timespec="seconds"), "size": args.size,
+                 "repeat": args.repeat, "python": platform.python_version(),
+                 "sqlite": sqlite3.sqlite_version, "machine": platform.machine()},
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"]["size"] != args.size:
+            print(f"warning: baseline was run with --size {baseline['meta']['size']}")
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print(f"{len(regressed)} regressions over {args.threshold:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+        print("no regressions")
+
+if __name__ == "__main__":
+    main()
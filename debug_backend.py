@@ -12,7 +12,7 @@ from project.main import handle_command
 def test_db():
     print("Testing DB Insertion...")
     try:
-        t = add_task("Test Task DB", 30, "2025-12-31", "high")
+        t = add_task("Test Task DB", duration_minutes=30, deadline="2025-12-31", priority="high")
         print(f"Success: Added task {t['id']}")
         
         tasks = get_all_tasks()
@@ -1,6 +1,10 @@
 import json
+import os
 import datetime
-from project.llm_wrapper import call_llm
+import functools
+from project.llm_wrapper import call_llm, call_llm_many, stream_llm_system, is_error_response
+from project.agents.intent_parser import parse_intent, FAST_PATH_THRESHOLD
+from project.agents.task_manager import get_task_by_id, resolve_task_reference
 
 SYSTEM_PROMPT = """
 You are an intelligent Task Management Assistant.
@@ -18,22 +22,22 @@ You can perform the following actions. Return ONLY a JSON object.
    - `scheduled_date`: "YYYY-MM-DD" (optional, if user says "do this ON [date]")
 
 2. **delete_task**:
-   - `task_id`: string (if user provides it, otherwise ask for clarification or list tasks)
-   - Note: If user says "delete the task about X", you might need to search first, but for now just ask for ID or say you can't find it. Actually, better: just return a text response asking for clarification if ID is missing.
+   - `task_id`: string, if the user gives the id
+   - `task_query`: string, instead of `task_id` when the user describes the task ("delete the task about X" -> "X"); it is looked up by name
 
 3. **update_task**:
-   - `task_id`: string
+   - `task_id` or `task_query`: as for delete_task
    - `updates`: object with fields to change
 
 4. **chat**:
    - Just a normal conversation.
 
 **Output Format**:
-{
+{{
     "action": "add_task" | "delete_task" | "update_task" | "chat",
-    "parameters": { ... },
+    "parameters": {{ ... }},
     "response": "A natural language response to the user confirming the action or answering the question."
-}
+}}
 
 **Rules**:
 - If the user says "Schedule X for Friday", calculate the date for the coming Friday based on Current Date and put it in `scheduled_date`.
@@ -42,29 +46,64 @@ You can perform the following actions. Return ONLY a JSON object.
 - Always be helpful and concise.
 """
 
-def process_user_message(user_message, chat_history=[]):
+FALLBACK_RESPONSE = {
+    "action": "chat",
+    "parameters": {},
+    "response": "I'm sorry, I had trouble understanding that. Could you try again?"
+}
+
+# Prompt budget for conversation history, in estimated tokens
+HISTORY_TOKEN_BUDGET = int(os.environ.get("CHAT_HISTORY_TOKENS", "1000"))
+# Rough chars-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+@functools.lru_cache(maxsize=4)
+def system_prompt(current_date):
+    """SYSTEM_PROMPT for the given ISO date; formatted once per day."""
+    return SYSTEM_PROMPT.format(current_date=current_date)
+
+def build_history(chat_history, budget=None):
+    """
+    The most recent messages that fit in `budget` estimated tokens,
+    formatted oldest first as "ROLE: text" lines.
+    """
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    lines = []
+    for msg in reversed(chat_history or ()):
+        line = f"{msg.get('role', 'user').upper()}: {msg.get('text', '')}\n"
+        budget -= estimate_tokens(line)
+        if budget < 0:
+            break
+        lines.append(line)
+    return "".join(reversed(lines))
+
+def build_prompt_parts(user_message, chat_history):
+    """The prompt split into the part shared by every message in a conversation and the message's own part."""
     current_date = datetime.date.today().isoformat()
-    
-    # Format history for context
-    history_text = ""
-    for msg in chat_history[-5:]: # Keep last 5 messages for context
-        role = msg.get('role', 'user')
-        text = msg.get('text', '')
-        history_text += f"{role.upper()}: {text}\n"
-    
-    prompt = f"""
-    {SYSTEM_PROMPT.format(current_date=current_date)}
+    history_text = build_history(chat_history)
+
+    prefix = f"""
+    {system_prompt(current_date)}
 
     Conversation History:
     {history_text}
-
+"""
+    item = f"""
     User: {user_message}
     
     JSON Response:
     """
-    
+    return prefix, item
+
+def build_prompt(user_message, chat_history):
+    prefix, item = build_prompt_parts(user_message, chat_history)
+    return prefix + item
+
+def parse_llm_response(response_text):
     try:
-        response_text = call_llm(prompt)
         # Clean up code blocks if present
         if "```json" in response_text:
             response_text = response_text.split("```json")[1].split("```")[0].strip()
@@ -75,8 +114,203 @@ def process_user_message(user_message, chat_history=[]):
         return parsed
     except Exception as e:
         print(f"Error parsing AI response: {e}")
-        return {
-            "action": "chat",
-            "parameters": {},
-            "response": "I'm sorry, I had trouble understanding that. Could you try again?"
-        }
+        return dict(FALLBACK_RESPONSE)
+
+def fast_path(user_message):
+    """The local parser's result if it is confident enough, else None."""
+    parsed, confidence = parse_intent(user_message)
+    if parsed and confidence >= FAST_PATH_THRESHOLD:
+        return parsed
+    return None
+
+def resolve_references(parsed):
+    """
+    Turns a delete/update that names its task by description (`task_query`,
+    or a `task_id` that isn't an id) into one with the matching task's id,
+    found with a local search. When no task or several similar ones match,
+    the result becomes a chat reply asking the user to be more specific.
+    """
+    if not isinstance(parsed, dict) or parsed.get("action") not in ("delete_task", "update_task"):
+        return parsed
+    params = parsed.get("parameters") or {}
+    query = params.get("task_query")
+    if not query:
+        task_id = params.get("task_id")
+        if not task_id or get_task_by_id(str(task_id)) is not None:
+            return parsed
+        query = str(task_id)
+
+    task, candidates = resolve_task_reference(query)
+    if task is None:
+        if candidates:
+            options = "; ".join(f"'{t.task_name}' (id {t.id})" for t in candidates)
+            message = f"Which task do you mean? {options}"
+        else:
+            message = f"I couldn't find a task matching '{query}'."
+        return {"action": "chat", "parameters": {"response": message}, "response": message}
+
+    params = {k: v for k, v in params.items() if k != "task_query"}
+    params["task_id"] = task.id
+    if parsed["action"] == "delete_task":
+        response = f"Deleted task '{task.task_name}'."
+    elif set(params.get("updates") or {}) == {"status"}:
+        response = f"Marked task '{task.task_name}' as {params['updates']['status']}."
+    else:
+        response = f"Updated task '{task.task_name}'."
+    return dict(parsed, parameters=params, response=response)
+
+def local_fallback(user_message, llm_text):
+    """
+    When the LLM call failed (an error payload), the local parser's best
+    guess at any confidence, so simple commands keep working while the
+    upstream is down; otherwise the parsed LLM reply.
+    """
+    if is_error_response(llm_text):
+        parsed, _ = parse_intent(user_message)
+        if parsed:
+            return parsed
+    return parse_llm_response(llm_text)
+
+def process_user_message(user_message, chat_history=None, use_fast_path=True):
+    if use_fast_path:
+        parsed = fast_path(user_message)
+        if parsed:
+            return resolve_references(parsed)
+
+    prompt = build_prompt(user_message, chat_history)
+    return resolve_references(local_fallback(user_message, call_llm(prompt)))
+
+def process_user_messages(user_messages, chat_history=None, use_fast_path=True):
+    """
+    process_user_message for several independent messages (e.g. a pasted
+    list of tasks), in order. Messages the local parser can't handle are
+    micro-batched into as few LLM requests as possible.
+    """
+    results = [fast_path(m) if use_fast_path else None for m in user_messages]
+    pending = [i for i, parsed in enumerate(results) if not parsed]
+    if pending:
+        prefix = build_prompt_parts("", chat_history)[0]
+        items = [build_prompt_parts(user_messages[i], chat_history)[1] for i in pending]
+        for i, text in zip(pending, call_llm_many(prefix, items)):
+            results[i] = local_fallback(user_messages[i], text)
+    return [resolve_references(parsed) for parsed in results]
+
+class ResponseFieldExtractor:
+    """
+    Incrementally pulls the top-level "response" string out of a JSON
+    object that is still being streamed, so its text can be relayed
+    before the rest of the object (action, parameters) has arrived.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string = None   # the most recent complete string at depth 1
+        self.expect_value = False  # saw `"response":` and wait for its value
+        self.in_value = False
+        self.done = False
+        self.emitted = ""
+
+    def feed(self, chunk):
+        """Consumes more raw text; returns newly decoded response text."""
+        self.buffer += chunk
+        out = []
+        buf = self.buffer
+        i = self.pos
+        while i < len(buf) and not self.done:
+            c = buf[i]
+            if self.in_value:
+                if c == '\\':
+                    if i + 1 >= len(buf):
+                        break
+                    nxt = buf[i + 1]
+                    if nxt == 'u':
+                        if i + 6 > len(buf):
+                            break
+                        try:
+                            out.append(chr(int(buf[i + 2:i + 6], 16)))
+                        except ValueError:
+                            pass
+                        i += 6
+                    else:
+                        out.append(self._ESCAPES.get(nxt, nxt))
+                        i += 2
+                    continue
+                if c == '"':
+                    self.in_value = False
+                    self.done = True
+                else:
+                    out.append(c)
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    self.last_string = buf[self.string_start:i] if self.depth == 1 else None
+            elif c == '"':
+                if self.expect_value:
+                    self.in_value = True
+                    self.expect_value = False
+                else:
+                    self.in_string = True
+                    self.string_start = i + 1
+            elif c == ':':
+                self.expect_value = self.depth == 1 and self.last_string == "response"
+                self.last_string = None
+            elif not c.isspace():
+                if c in '{[':
+                    self.depth += 1
+                elif c in '}]':
+                    self.depth -= 1
+                self.expect_value = False
+                self.last_string = None
+            i += 1
+        self.pos = i
+        text = "".join(out)
+        self.emitted += text
+        return text
+
+def stream_user_message(user_message, chat_history=None, use_fast_path=True):
+    """
+    Streaming variant of process_user_message. Yields ("token", text) as
+    the "response" field arrives, then ("result", parsed) once the whole
+    completion has been parsed.
+    """
+    if use_fast_path:
+        parsed = fast_path(user_message)
+        if parsed:
+            parsed = resolve_references(parsed)
+            yield ("token", parsed["response"])
+            yield ("result", parsed)
+            return
+
+    prompt = build_prompt(user_message, chat_history)
+    extractor = ResponseFieldExtractor()
+    raw = []
+    failure = None
+    for delta in stream_llm_system(prompt):
+        if is_error_response(delta):
+            # Open breaker or a failed stream: answer from the local parser
+            # as process_user_message does; the final "done" text replaces
+            # anything streamed before the failure
+            failure = delta
+            break
+        raw.append(delta)
+        text = extractor.feed(delta)
+        if text:
+            yield ("token", text)
+
+    parsed = local_fallback(user_message, failure) if failure else parse_llm_response("".join(raw))
+    # If the model wrapped or reshaped its JSON, nothing may have streamed yet
+    response = parsed.get("response", "")
+    if isinstance(response, str) and response.startswith(extractor.emitted) and len(response) > len(extractor.emitted):
+        yield ("token", response[len(extractor.emitted):])
+    yield ("result", resolve_references(parsed))
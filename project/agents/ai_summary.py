@@ -1,20 +1,91 @@
 import json
+import os
+import threading
+from datetime import date
 # Adjusted imports
-from project.llm_wrapper import call_llm_system
-from project.agents.task_manager import get_all_tasks
+from project import jobs, llm_wrapper
+from project.llm_wrapper import call_llm_system, is_error_response
+from project.agents.task_manager import get_revision, on_change
+from project.agents.summary_agent import weekly_stats, compact_stats, format_summary
 
 SUMMARY_PROMPT = """
-You are a summarizer. Input: JSON array of tasks (id, task_name, duration_minutes, deadline, priority).
-Output: concise weekly summary (max 6 sentences) listing:
+You are a summarizer. Input: JSON statistics about a task list for the next few days
+(counts and hours by priority, overdue tasks, tasks due in the window, suggested focus).
+Output: concise weekly summary (max 6 sentences) covering:
 - total tasks
-- urgent deadlines in next 7 days (list)
+- urgent deadlines in the window (list)
 - estimated hours this week
 - top 3 suggested tasks to focus on
-Respond only with the summary text.
+Use only the numbers and tasks given. Respond only with the summary text.
 """
 
-def generate_summary():
-    tasks = get_all_tasks()
-    prompt = SUMMARY_PROMPT + "\n\n" + json.dumps(tasks)
-    text = call_llm_system(prompt)
+# "llm" narrates the local stats through the LLM; "local" never calls it
+SUMMARY_MODE = os.environ.get("SUMMARY_MODE", "llm")
+# Past this the local summary is returned instead of waiting on the LLM
+SUMMARY_LLM_TIMEOUT = float(os.environ.get("SUMMARY_LLM_TIMEOUT", "10"))
+# After a task change the summary is rewritten in the background this many
+# seconds later, so a burst of changes costs one LLM call
+SUMMARY_PRECOMPUTE_DELAY = float(os.environ.get("SUMMARY_PRECOMPUTE_DELAY", "2"))
+
+# Last summary, valid while the task table revision and the day are unchanged
+_summary_cache = {"key": None, "text": None}
+_summary_lock = threading.Lock()
+
+def _llm_summary(stats):
+    """(text, ok): the LLM's write-up of `stats`, or the local text if it failed."""
+    prompt = SUMMARY_PROMPT + "\n\n" + json.dumps(compact_stats(stats), separators=(",", ":"))
+    text = call_llm_system(prompt, timeout=SUMMARY_LLM_TIMEOUT)
+    if is_error_response(text):
+        return format_summary(stats), False
+    return text, True
+
+def generate_summary(mode=None):
+    """
+    Weekly summary. The numbers are always computed locally (summary_agent);
+    in "llm" mode only their compact form is sent to the LLM to be written
+    up as prose, falling back to the local text if the LLM fails or times out.
+
+    A summary precomputed by the "summary" job for the current revision is
+    returned without calling the LLM.
+    """
+    if (mode or SUMMARY_MODE) == "local":
+        return format_summary(weekly_stats())
+
+    key = (get_revision(), date.today())
+    with _summary_lock:
+        if _summary_cache["key"] == key:
+            return _summary_cache["text"]
+
+    ready = jobs.JOBS.latest("summary")
+    if ready and (ready["result"]["revision"], ready["result"]["date"]) == (key[0], key[1].isoformat()):
+        text = ready["result"]["text"]
+    else:
+        stats = weekly_stats()
+        if not stats["open"] and not stats["done"]:
+            return "No tasks found."
+        text, ok = _llm_summary(stats)
+        if not ok:
+            return text
+
+    with _summary_lock:
+        _summary_cache["key"] = key
+        _summary_cache["text"] = text
     return text
+
+@jobs.job_handler("summary")
+def summary_job():
+    revision, today = get_revision(), date.today()
+    stats = weekly_stats(today)
+    if not stats["open"] and not stats["done"]:
+        text, ok = "No tasks found.", True
+    else:
+        text, ok = _llm_summary(stats)
+    if not ok:
+        # Leave it to the next read to try the LLM again
+        raise RuntimeError("LLM unavailable, summary not precomputed")
+    return {"revision": revision, "date": today.isoformat(), "text": text}
+
+@on_change
+def _precompute_summary(kind, ids, revision):
+    if jobs.JOBS.running and SUMMARY_MODE == "llm" and llm_wrapper.LLM_API_URL and llm_wrapper.LLM_API_KEY:
+        jobs.JOBS.enqueue("summary", priority=jobs.PRIORITY_BACKGROUND, delay=SUMMARY_PRECOMPUTE_DELAY)
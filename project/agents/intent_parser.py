@@ -0,0 +1,289 @@
+import re
+import datetime
+
+# Local rule-based parser for common task commands. It returns the same
+# {action, parameters, response} structure the LLM produces, plus a
+# confidence score; ai_agent only trusts it above FAST_PATH_THRESHOLD.
+
+FAST_PATH_THRESHOLD = 0.8
+
+DEFAULT_DURATION = 60
+DEFAULT_PRIORITY = "medium"
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# Short forms that double as ordinary words ("sun", "sat", "wed", "mon") are left out
+_WEEKDAY_ALIASES = {"tue": 1, "tues": 1, "thu": 3, "thur": 3, "thurs": 3, "fri": 4}
+_WEEKDAY_ALIASES.update({name: i for i, name in enumerate(WEEKDAYS)})
+_WEEKDAY_RE = "|".join(sorted(_WEEKDAY_ALIASES, key=len, reverse=True))
+
+# Server uuids, or the 7-char ids the dashboard generates (must contain a digit)
+_ID_RE = r"(?P<id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|(?=[a-z]*\d)[a-z0-9]{7})"
+
+_DATE_EXPR = (
+    r"(?:\d{4}-\d{2}-\d{2}"
+    r"|today|tonight|tomorrow|day after tomorrow"
+    r"|in \d+ (?:days?|weeks?)"
+    r"|(?:next |this )?(?:" + _WEEKDAY_RE + r")"
+    r"|next week)"
+)
+
+# End of a date word: not part of a longer word or a possessive ("today's paper")
+_DATE_END = r"(?![\w'\u2019])"
+
+_DEADLINE_RE = re.compile(r"\b(?:due(?: on| by)?|by|deadline(?: is| of)?|before)\s+(" + _DATE_EXPR + r")" + _DATE_END, re.I)
+_SCHEDULED_RE = re.compile(r"\b(?:(?:on|for|at)\s+)?(" + _DATE_EXPR + r")" + _DATE_END, re.I)
+
+_DURATION_RE = re.compile(
+    r"\b(?:for\s+|taking\s+|lasting\s+)?"
+    r"(?:(?P<h>\d+(?:\.\d+)?)\s*(?:h|hr|hrs|hours?)\s*(?:and\s+)?)?"
+    r"(?:(?P<m>\d+)\s*(?:m|min|mins|minutes?))?\b",
+    re.I)
+_PRIORITY_RE = re.compile(
+    r"\b(?:(?:with\s+)?(?P<a>high|medium|low|normal)[\s-]+priority"
+    r"|priority\s*(?:is\s+|of\s+|=\s*|:\s*)?(?P<b>high|medium|low|normal)"
+    r"|(?P<urgent>urgent|asap|important))\b",
+    re.I)
+
+# Constructs the rules don't model; their presence hands the message to the LLM
+_AMBIGUOUS_RE = re.compile(
+    r"\b(?:every|each|daily|weekly|monthly|unless|except|if|and then|or)\b"
+    r"|\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|\bat \d",
+    re.I)
+
+# Only explicit imperatives: "new ...", "i need to ...", "put ..." and
+# "schedule ..." are as often questions or plain notes as they are adds
+_ADD_RE = re.compile(
+    r"^(?:please\s+)?(?:"
+    r"add(?:\s+(?:a|an|the))?(?:(?:\s+new)?\s+(?:task|todo|to-do|item|reminder))?"
+    r"|create(?:\s+(?:a|an|the))?(?:\s+new)?\s+(?:task|todo|to-do|item|reminder)"
+    r"|remind me to)\b"
+    r"(?:\s+(?:to|for|called|named|:))?\s*",
+    re.I)
+# Date and quantity wording the rules don't resolve ("by the 1st", "oct 3",
+# "2 m of rope"); left in a name, it means the parse was only partial
+_UNPARSED_DATE_RE = re.compile(
+    r"\b(?:\d{1,2}(?:st|nd|rd|th)|\d{1,2}/\d{1,2}|until|till|weekend|end of"
+    r"|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|jun(?:e)?|jul(?:y)?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b"
+    r"|\b(?:by|on|before|due)\s+the\b",
+    re.I)
+# "2 m" or "3 h" (spaced single-letter units) may be metres or a count, and
+# "2 hours of" is a quantity; neither is trusted as a duration
+_BARE_UNIT_RE = re.compile(r"\d\s+[mh]\s*$|^\s*of\b", re.I)
+_LIST_RE = re.compile(
+    r"^(?:please\s+)?(?:(?:list|show|display|view)(?: me)?(?: all)?(?: my)?(?: the)?"
+    r"\s+(?:tasks|todos|to-dos|schedule|agenda|plan)"
+    r"|what(?:'s| is) (?:on )?my (?:schedule|agenda|plan|list)"
+    r"|what do i have(?: to do)?)\W*$",
+    re.I)
+_SUMMARY_RE = re.compile(r"^(?:please\s+)?(?:summari[sz]e|give me a summary of|recap)(?: my)?(?: the)? week\W*$", re.I)
+_DELETE_RE = re.compile(r"^(?:please\s+)?(?:delete|remove|drop|cancel)(?: the)?(?: task)?(?: with id)?\s+" + _ID_RE + r"\W*$", re.I)
+_DONE_RE = re.compile(r"^(?:please\s+)?(?:mark|set)(?: task)?\s+" + _ID_RE + r"\s+(?:as\s+)?(?P<status>done|complete|completed|finished|pending)\W*$", re.I)
+_SET_PRIORITY_RE = re.compile(
+    r"^(?:please\s+)?(?:set|change|make)(?: the)? priority (?:of|for)(?: task)?\s+" + _ID_RE
+    + r"\s+(?:to\s+)?(?P<priority>high|medium|low)\W*$", re.I)
+_MOVE_RE = re.compile(
+    r"^(?:please\s+)?(?:move|reschedule|schedule)(?: task)?\s+" + _ID_RE
+    + r"\s+(?:to|for|on)\s+(?P<date>" + _DATE_EXPR + r")\W*$", re.I)
+_SET_DEADLINE_RE = re.compile(
+    r"^(?:please\s+)?(?:set|change|move)(?: the)? deadline (?:of|for)(?: task)?\s+" + _ID_RE
+    + r"\s+(?:to\s+)?(?P<date>" + _DATE_EXPR + r")\W*$", re.I)
+
+# Tasks named by description instead of id; ai_agent looks the description
+# up with task_manager.resolve_task_reference ("task_query" parameter)
+_DELETE_REF_RE = re.compile(
+    r"^(?:please\s+)?(?:delete|remove|drop|cancel)\s+(?:the\s+|my\s+)?"
+    r"(?:(?:task|todo|item)\s+(?:about|called|named|for)\s+(?P<query>.+?)|(?P<query2>.+?)\s+(?:task|todo))\W*$",
+    re.I)
+_DONE_REF_RE = re.compile(
+    r"^(?:please\s+)?(?:mark|set)\s+(?:the\s+|my\s+)?(?:(?:task|todo|item)\s+(?:about|called|named|for)\s+)?"
+    r"(?P<query>.+?)(?:\s+(?:task|todo))?\s+(?:as\s+)?(?P<status>done|complete|completed|finished|pending)\W*$",
+    re.I)
+
+# Connective words left dangling at either end of the name once dates,
+# durations and priorities have been cut out ("call mom on" -> "call mom")
+_EDGE_FILLERS = {"please", "for", "on", "by", "due", "with", "priority", "task", "at", "and", "to", "a"}
+
+def resolve_date(expr, today=None):
+    """
+    Resolves a relative date expression to a date.
+
+    A bare weekday ("friday", "this friday") is its next occurrence after
+    today; "next friday" is the Friday of the following Monday-based week.
+    """
+    today = today or datetime.date.today()
+    expr = expr.strip().lower()
+
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", expr):
+        return datetime.date.fromisoformat(expr)
+    if expr in ("today", "tonight"):
+        return today
+    if expr == "tomorrow":
+        return today + datetime.timedelta(days=1)
+    if expr == "day after tomorrow":
+        return today + datetime.timedelta(days=2)
+    if expr == "next week":
+        return today + datetime.timedelta(days=7 - today.weekday())
+
+    m = re.fullmatch(r"in (\d+) (day|week)s?", expr)
+    if m:
+        n = int(m.group(1)) * (7 if m.group(2) == "week" else 1)
+        return today + datetime.timedelta(days=n)
+
+    m = re.fullmatch(r"(next |this )?(\w+)", expr)
+    if m and m.group(2) in _WEEKDAY_ALIASES:
+        target = _WEEKDAY_ALIASES[m.group(2)]
+        if m.group(1) == "next ":
+            next_monday = today + datetime.timedelta(days=7 - today.weekday())
+            return next_monday + datetime.timedelta(days=target)
+        days_ahead = (target - today.weekday()) % 7 or 7
+        return today + datetime.timedelta(days=days_ahead)
+
+    raise ValueError(f"Unrecognized date expression '{expr}'")
+
+def _parse_duration(text):
+    """(minutes, span, certain); certain is False for a quantity like "2 m" or "3 h of"."""
+    for m in _DURATION_RE.finditer(text):
+        if m.group("h") or m.group("m"):
+            minutes = float(m.group("h") or 0) * 60 + int(m.group("m") or 0)
+            certain = not (_BARE_UNIT_RE.search(m.group(0)) or _BARE_UNIT_RE.search(text[m.end():]))
+            return int(round(minutes)), m.span(), certain
+    return None, None, True
+
+def _parse_priority(text):
+    m = _PRIORITY_RE.search(text)
+    if not m:
+        return None, None
+    if m.group("urgent"):
+        return "high", m.span()
+    value = (m.group("a") or m.group("b")).lower()
+    return ("medium" if value == "normal" else value), m.span()
+
+def _cut(text, span):
+    return text[:span[0]] + " " + text[span[1]:]
+
+def _chat(parameters, response, action):
+    return {"action": action, "parameters": parameters, "response": response}
+
+def _parse_add(text, today):
+    m = _ADD_RE.match(text)
+    if not m:
+        return None, 0.0
+    body = text[m.end():]
+    confidence = 0.95
+
+    if _AMBIGUOUS_RE.search(body):
+        confidence = 0.4
+
+    duration, span, certain = _parse_duration(body)
+    if span:
+        body = _cut(body, span)
+    if not certain:
+        confidence = min(confidence, 0.5)
+    priority, span = _parse_priority(body)
+    if span:
+        body = _cut(body, span)
+
+    deadline = scheduled_date = None
+    dm = _DEADLINE_RE.search(body)
+    if dm:
+        deadline = resolve_date(dm.group(1), today).isoformat()
+        body = _cut(body, dm.span())
+    sm = _SCHEDULED_RE.search(body)
+    if sm:
+        scheduled_date = resolve_date(sm.group(1), today).isoformat()
+        body = _cut(body, sm.span())
+        if _SCHEDULED_RE.search(body):
+            confidence = min(confidence, 0.5)  # more than one date
+
+    words = re.sub(r"\s+", " ", body).strip(" ,.;:!-").split()
+    while words and words[-1].lower() in _EDGE_FILLERS:
+        words.pop()
+    while words and words[0].lower() in _EDGE_FILLERS:
+        words.pop(0)
+    name = " ".join(words).strip(" ,.;:!-")
+    if not name:
+        return None, 0.0
+    if len(name.split()) > 8:
+        confidence = min(confidence, 0.6)  # long free text: let the LLM read it
+    if re.search(r"(?:^|\s)['\u2019]", name):
+        confidence = min(confidence, 0.5)  # a cut left a dangling fragment like "'s"
+    if _UNPARSED_DATE_RE.search(name):
+        confidence = min(confidence, 0.5)  # a date the rules only half understood
+
+    params = {
+        "task_name": name,
+        "duration_minutes": duration or DEFAULT_DURATION,
+        "priority": priority or DEFAULT_PRIORITY,
+    }
+    details = [f"{params['duration_minutes']} min", f"{params['priority']} priority"]
+    if scheduled_date:
+        params["scheduled_date"] = scheduled_date
+        details.insert(0, f"on {scheduled_date}")
+    if deadline:
+        params["deadline"] = deadline
+        details.insert(0, f"due {deadline}")
+    response = f"Added task '{name}' ({', '.join(details)})."
+    return _chat(params, response, "add_task"), confidence
+
+def parse_intent(message, today=None):
+    """
+    Parses `message` with local rules. Returns (parsed, confidence) where
+    parsed matches the LLM's output schema, or (None, 0.0) if no rule fits.
+    """
+    try:
+        return _parse(message, today)
+    except ValueError:
+        return None, 0.0  # a date that looks right but isn't ("2026-02-30")
+
+def _parse(message, today):
+    text = re.sub(r"\s+", " ", message).strip()
+    if not text:
+        return None, 0.0
+
+    if _LIST_RE.match(text):
+        return _chat({}, "Here is your schedule.", "query_schedule"), 0.95
+    if _SUMMARY_RE.match(text):
+        return _chat({}, "Here is your weekly summary.", "summarize_week"), 0.95
+
+    m = _DELETE_RE.match(text)
+    if m:
+        return _chat({"task_id": m.group("id").lower()}, f"Deleted task {m.group('id')}.", "delete_task"), 0.95
+
+    m = _DONE_RE.match(text)
+    if m:
+        status = "pending" if m.group("status").lower() == "pending" else "done"
+        return _chat({"task_id": m.group("id"), "updates": {"status": status}},
+                     f"Marked task {m.group('id')} as {status}.", "update_task"), 0.95
+
+    m = _SET_PRIORITY_RE.match(text)
+    if m:
+        priority = m.group("priority").lower()
+        return _chat({"task_id": m.group("id"), "updates": {"priority": priority}},
+                     f"Set priority of task {m.group('id')} to {priority}.", "update_task"), 0.95
+
+    m = _SET_DEADLINE_RE.match(text)
+    if m:
+        deadline = resolve_date(m.group("date"), today).isoformat()
+        return _chat({"task_id": m.group("id"), "updates": {"deadline": deadline}},
+                     f"Moved the deadline of task {m.group('id')} to {deadline}.", "update_task"), 0.95
+
+    m = _MOVE_RE.match(text)
+    if m:
+        scheduled = resolve_date(m.group("date"), today).isoformat()
+        return _chat({"task_id": m.group("id"), "updates": {"scheduled_date": scheduled}},
+                     f"Moved task {m.group('id')} to {scheduled}.", "update_task"), 0.95
+
+    m = _DELETE_REF_RE.match(text)
+    if m:
+        query = m.group("query") or m.group("query2")
+        return _chat({"task_query": query}, f"Deleted the task matching '{query}'.", "delete_task"), 0.85
+
+    m = _DONE_REF_RE.match(text)
+    if m:
+        status = "pending" if m.group("status").lower() == "pending" else "done"
+        query = m.group("query")
+        return _chat({"task_query": query, "updates": {"status": status}},
+                     f"Marked the task matching '{query}' as {status}.", "update_task"), 0.85
+
+    return _parse_add(text, today)
@@ -1,6 +1,12 @@
-from datetime import datetime
+import heapq
+from datetime import date, datetime
 # Adjusted import
-from project.agents.task_manager import get_all_tasks
+from project.agents.task_manager import query_tasks
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
 
 PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
 
@@ -13,11 +19,189 @@ def parse_date(d):
         return None
 
 def sort_tasks(tasks):
-    def keyfn(t):
-        dd = parse_date(t.get("deadline"))
-        pr = PRIORITY_RANK.get(t.get("priority", "medium").lower(), 1)
-        dur = t.get("duration_minutes") or 999999
-        # sort by (has_deadline_flag, deadline_date or far future, priority, duration)
-        has_deadline = 0 if dd else 1
-        return (has_deadline, dd or datetime(9999,1,1), pr, dur)
-    return sorted(tasks, key=keyfn)
+    """Orders task dicts by (deadline, priority, duration); ties keep their input order."""
+    return rank_tasks(tasks)
+
+def get_prioritized_tasks(limit=None, score=None, **filters):
+    """
+    Same ordering as sort_tasks, but evaluated by SQLite (backed by the
+    idx_tasks_rank index) so only the requested rows are materialized.
+    Accepts the filters of task_manager.query_tasks.
+
+    With a `score` function (see default_score) the filtered tasks are
+    ranked in memory by descending score instead, keeping the top `limit`.
+    """
+    if score is not None:
+        return rank_tasks(query_tasks(**filters), k=limit, score=score)
+    return query_tasks(order="priority", limit=limit, **filters)
+
+def rank_key(task):
+    """Python equivalent of the SQL ordering used by get_prioritized_tasks (RANK_KEYS, then id)."""
+    return (
+        task.get("deadline") or "9999-12-31",
+        PRIORITY_RANK.get((task.get("priority") or "").lower(), 1),
+        task.get("duration_minutes") if task.get("duration_minutes") is not None else 999999,
+        task.get("id") or "",
+    )
+
+def format_task_list(tasks):
+    if not tasks:
+        return "No tasks found."
+    lines = [f"{t['task_name']} - {t.get('deadline') or 'no deadline'} - {t.get('priority')}" for t in tasks]
+    return "\n".join(lines)
+
+# --- Columnar ranking -----------------------------------------------------------
+# Large in-memory task lists are ranked on compact columns instead of
+# per-task key functions: deadlines are parsed once into epoch days and the
+# three sort keys are packed into one int64 per task, so a full ranking is a
+# single stable argsort and top-k is an argpartition.
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NO_DEADLINE = date(9999, 12, 31).toordinal() - EPOCH_ORDINAL
+NO_DURATION = 999999
+_DURATION_BITS = 20  # NO_DURATION < 2**20
+_PRIORITY_BITS = 2
+
+# Default score weights (see default_score)
+PRIORITY_WEIGHT = (3.0, 2.0, 1.0)  # indexed by PRIORITY_RANK code
+NO_DEADLINE_DAYS = 30  # tasks without a deadline score as if due in a month
+
+def _epoch_day(value, cache):
+    day = cache.get(value)
+    if day is None:
+        try:
+            day = date.fromisoformat(value[:10]).toordinal() - EPOCH_ORDINAL
+        except (TypeError, ValueError):
+            day = NO_DEADLINE
+        cache[value] = day
+    return day
+
+class TaskColumns:
+    """
+    Column-oriented view of a task list for ranking: deadline (epoch days),
+    priority code, duration and the packed sort key, as NumPy arrays (plain
+    lists without NumPy). `tasks` keeps the original dicts for lookups.
+    """
+
+    def __init__(self, tasks, deadline, priority, duration):
+        self.tasks = tasks
+        self.deadline = deadline
+        self.priority = priority
+        self.duration = duration
+        if np is not None:
+            self.key = ((deadline.astype(np.int64) << (_PRIORITY_BITS + _DURATION_BITS))
+                        | (priority.astype(np.int64) << _DURATION_BITS)
+                        | np.clip(duration, 0, (1 << _DURATION_BITS) - 1).astype(np.int64))
+        else:
+            self.key = [(d << (_PRIORITY_BITS + _DURATION_BITS)) | (p << _DURATION_BITS)
+                        | min(max(m, 0), (1 << _DURATION_BITS) - 1)
+                        for d, p, m in zip(deadline, priority, duration)]
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        tasks = list(tasks)
+        dates = {}
+        ranks = {}
+        deadline, priority, duration = [], [], []
+        for t in tasks:
+            d = t.get("deadline")
+            deadline.append(_epoch_day(d, dates) if d else NO_DEADLINE)
+            p = t.get("priority") or "medium"
+            code = ranks.get(p)
+            if code is None:
+                code = ranks[p] = PRIORITY_RANK.get(p.lower(), 1)
+            priority.append(code)
+            m = t.get("duration_minutes")
+            duration.append(NO_DURATION if m is None else int(m))
+        if np is not None:
+            return cls(tasks, np.array(deadline, dtype=np.int32), np.array(priority, dtype=np.int8),
+                       np.array(duration, dtype=np.int32))
+        return cls(tasks, deadline, priority, duration)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def select(self, order):
+        return [self.tasks[i] for i in order]
+
+def rank_order(columns):
+    """Indexes of all tasks in priority order (stable)."""
+    if np is not None:
+        return np.argsort(columns.key, kind="stable")
+    return sorted(range(len(columns)), key=columns.key.__getitem__)
+
+def top_k(columns, k):
+    """Indexes of the first `k` tasks in priority order, without sorting the rest."""
+    n = len(columns)
+    if k >= n:
+        return rank_order(columns)
+    if k <= 0:
+        return []
+    if np is not None:
+        return _smallest_k(columns.key, k)
+    return heapq.nsmallest(k, range(n), key=lambda i: (columns.key[i], i))
+
+def _smallest_k(values, k):
+    """Indexes of the k smallest values in order, ties broken by position like a stable sort."""
+    kth = np.partition(values, k - 1)[k - 1]
+    # Everything strictly below the k-th value is in; ties on it go by position
+    below = np.flatnonzero(values < kth)
+    ties = np.flatnonzero(values == kth)[:k - len(below)]
+    chosen = np.concatenate([below, ties])
+    return chosen[np.argsort(values[chosen], kind="stable")]
+
+def default_score(columns, today=None):
+    """
+    urgency x priority x duration weighting, higher is more important:
+    urgency is 1 / (1 + days until the deadline) (overdue counts as due
+    today), priority weights come from PRIORITY_WEIGHT, and shorter tasks
+    get a mild boost of (60 / duration) ** 0.25 with duration in 15..480.
+    """
+    today = (today or date.today()).toordinal() - EPOCH_ORDINAL
+    if np is not None:
+        days = np.where(columns.deadline == NO_DEADLINE, NO_DEADLINE_DAYS, columns.deadline - today)
+        urgency = 1.0 / (1.0 + np.clip(days, 0, None))
+        weight = np.asarray(PRIORITY_WEIGHT)[columns.priority]
+        minutes = np.where(columns.duration == NO_DURATION, 60, columns.duration)
+        return urgency * weight * (60.0 / np.clip(minutes, 15, 480)) ** 0.25
+    scores = []
+    for d, p, m in zip(columns.deadline, columns.priority, columns.duration):
+        days = NO_DEADLINE_DAYS if d == NO_DEADLINE else d - today
+        minutes = 60 if m == NO_DURATION else m
+        scores.append(1.0 / (1.0 + max(days, 0)) * PRIORITY_WEIGHT[p] * (60.0 / min(max(minutes, 15), 480)) ** 0.25)
+    return scores
+
+def score_order(columns, score=default_score, k=None, today=None):
+    """
+    Indexes ordered by descending `score(columns, today)`; with `k`, only
+    the best k (selected with argpartition / a heap, not a full sort).
+    """
+    scores = score(columns, today)
+    n = len(columns)
+    if np is not None:
+        neg = -np.asarray(scores, dtype=np.float64)
+        if k is None or k >= n:
+            return np.argsort(neg, kind="stable")
+        if k <= 0:
+            return []
+        return _smallest_k(neg, k)
+    if k is None or k >= n:
+        return sorted(range(n), key=lambda i: -scores[i])
+    if k <= 0:
+        return []
+    return heapq.nsmallest(k, range(n), key=lambda i: (-scores[i], i))
+
+def rank_tasks(tasks, k=None, score=None, today=None):
+    """
+    Ranks task dicts in memory. Without `score` the order matches
+    get_prioritized_tasks; with one (e.g. default_score) tasks are ordered
+    by descending score. `k` limits the result to the first k tasks.
+    """
+    columns = tasks if isinstance(tasks, TaskColumns) else TaskColumns.from_tasks(tasks)
+    if score is not None:
+        order = score_order(columns, score, k, today)
+    elif k is not None:
+        order = top_k(columns, k)
+    else:
+        order = rank_order(columns)
+    return columns.select(order)
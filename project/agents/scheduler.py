@@ -1,98 +1,787 @@
-from datetime import datetime, timedelta
+import os
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 from pathlib import Path
 # Adjusted imports
-from project.agents.prioritizer import sort_tasks
-from project.agents.task_manager import get_all_tasks
+from project import jobs
+from project.agents.prioritizer import get_prioritized_tasks, rank_key
+from project.agents.task_manager import (get_revision, get_changes, get_tasks_by_ids, on_change,
+                                         remove_change_listener)
 
 WEEK_START_HOUR = 9
 WEEK_END_HOUR = 18
 # Using relative path from project root
 OUTPUT_ICS = Path("data/schedule.ics")
 
+DEFAULT_DURATION = 60
+# Split tasks are never cut into pieces shorter than this (unless less remains)
+MIN_CHUNK_MINUTES = 30
+# weekday (0 = Monday) -> list of ("HH:MM", "HH:MM") working windows; days
+# missing from the mapping are days off
+WORKING_HOURS = {day: [(f"{WEEK_START_HOUR:02d}:00", f"{WEEK_END_HOUR:02d}:00")] for day in range(7)}
+
+MINUTES_PER_DAY = 24 * 60
+# IncrementalScheduler repairs at least this many changed tasks before
+# preferring a full rebuild when catching up (see _catch_up)
+CATCH_UP_LIMIT = 1000
+# After a task change the shared placement is caught up by a background job
+# this many seconds later, so a burst of changes is applied in one go
+SCHEDULE_PRECOMPUTE_DELAY = float(os.environ.get("SCHEDULE_PRECOMPUTE_DELAY", "0.2"))
+# Incremental schedulers kept for distinct settings (start date, days, hours, ...)
+INCREMENTAL_SCHEDULERS = int(os.environ.get("INCREMENTAL_SCHEDULERS", "4"))
+
 def to_ical_datetime(dt):
     return dt.strftime("%Y%m%dT%H%M%S")
 
-def schedule_week(start_date=None):
+def _parse_hhmm(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def _to_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+class _DayTree:
     """
-    Schedules tasks for the week starting from start_date.
-    If start_date is None, defaults to the next Monday.
+    Segment tree over day indexes holding, per day, the longest free
+    interval and the total free minutes. Finds the first day at or after a
+    given one with a free interval of at least n minutes in O(log days).
+    """
+
+    def __init__(self, size):
+        self.size = 1
+        while self.size < max(size, 1):
+            self.size *= 2
+        self.longest = [0] * (2 * self.size)
+        self.total = [0] * (2 * self.size)
+
+    def build(self, leaves):
+        """Fills the tree from a list of (longest, total) per day in O(days)."""
+        for day, (longest, total) in enumerate(leaves):
+            self.longest[day + self.size] = longest
+            self.total[day + self.size] = total
+        for i in range(self.size - 1, 0, -1):
+            self.longest[i] = max(self.longest[2 * i], self.longest[2 * i + 1])
+            self.total[i] = self.total[2 * i] + self.total[2 * i + 1]
+
+    def update(self, day, longest, total):
+        longest_at, total_at = self.longest, self.total
+        i = day + self.size
+        delta = total - total_at[i]
+        longest_at[i] = longest
+        total_at[i] = total
+        i //= 2
+        while i:
+            total_at[i] += delta
+            left, right = longest_at[2 * i], longest_at[2 * i + 1]
+            longest_at[i] = left if left > right else right
+            i //= 2
+
+    def first_fit(self, lo, minutes):
+        """Smallest day >= lo whose longest free interval is >= minutes, or -1."""
+        if self.longest[1] < minutes:
+            return -1
+        return self._descend(1, 0, self.size - 1, lo, minutes)
+
+    def _descend(self, node, left, right, lo, minutes):
+        if right < lo or self.longest[node] < minutes:
+            return -1
+        if left == right:
+            return left
+        mid = (left + right) // 2
+        found = self._descend(2 * node, left, mid, lo, minutes)
+        if found == -1:
+            found = self._descend(2 * node + 1, mid + 1, right, lo, minutes)
+        return found
+
+    def free_between(self, lo, hi):
+        """Total free minutes on days lo..hi inclusive."""
+        result = 0
+        lo += self.size
+        hi += self.size + 1
+        while lo < hi:
+            if lo & 1:
+                result += self.total[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result += self.total[hi]
+            lo //= 2
+            hi //= 2
+        return result
+
+class FreeTimeIndex:
+    """
+    Free time over a horizon of whole days, as sorted, non-overlapping
+    [start, end) intervals in minutes from the horizon's first midnight.
+
+    Each day keeps its own sorted interval list (searched with bisect) and
+    a _DayTree indexes the days, so reserving time and finding the first
+    slot of a given length are O(log n) plus the few intervals of one day.
+    """
+
+    def __init__(self, start_date, days, working_hours=None):
+        self.start_date = start_date
+        self.days = days
+        self.origin = datetime.combine(start_date, datetime.min.time())
+        self.tree = _DayTree(days)
+        self.starts = []
+        self.ends = []
+        hours = WORKING_HOURS if working_hours is None else working_hours
+        for i in range(days):
+            base = i * MINUTES_PER_DAY
+            day = start_date + timedelta(days=i)
+            windows = sorted((base + _parse_hhmm(s), base + _parse_hhmm(e))
+                             for s, e in hours.get(day.weekday(), ()))
+            self.starts.append([s for s, e in windows if e > s])
+            self.ends.append([e for s, e in windows if e > s])
+        self.tree.build([self._summary(i) for i in range(days)])
+
+    # -- conversions -------------------------------------------------------
+
+    def to_minutes(self, dt):
+        return int((dt - self.origin).total_seconds() // 60)
+
+    def to_datetime(self, minutes):
+        return self.origin + timedelta(minutes=minutes)
+
+    def _day_of(self, minutes):
+        return min(max(minutes // MINUTES_PER_DAY, 0), self.days - 1)
+
+    def _summary(self, day):
+        lengths = [e - s for s, e in zip(self.starts[day], self.ends[day])]
+        return max(lengths, default=0), sum(lengths)
+
+    def _refresh(self, day):
+        self.tree.update(day, *self._summary(day))
+
+    # -- queries -------------------------------------------------------------
+
+    def intervals(self, start=0, end=None):
+        """Yields free (start, end) minute pairs clipped to [start, end)."""
+        end = self.days * MINUTES_PER_DAY if end is None else end
+        if end <= start or self.days == 0:
+            return
+        for day in range(self._day_of(start), self._day_of(end - 1) + 1):
+            starts, ends = self.starts[day], self.ends[day]
+            for i in range(bisect_right(ends, start), len(starts)):
+                if starts[i] >= end:
+                    break
+                yield max(starts[i], start), min(ends[i], end)
+
+    def free_minutes(self, start, end):
+        """Free minutes in [start, end); whole days in between come from the tree."""
+        if end <= start or self.days == 0:
+            return 0
+        first, last = self._day_of(start), self._day_of(end - 1)
+        if first == last:
+            return sum(e - s for s, e in self.intervals(start, end))
+        total = sum(e - s for s, e in self.intervals(start, (first + 1) * MINUTES_PER_DAY))
+        total += sum(e - s for s, e in self.intervals(last * MINUTES_PER_DAY, end))
+        if last - first > 1:
+            total += self.tree.free_between(first + 1, last - 1)
+        return total
+
+    def find_slot(self, minutes, start, end):
+        """Start of the earliest free run of `minutes` inside [start, end), or None."""
+        if end - start < minutes or self.days == 0:
+            return None
+        first, last = self._day_of(start), self._day_of(end - 1)
+        day = first
+        while day != -1 and day <= last:
+            # Only the first and last days can be clipped by the window
+            for s, e in self.intervals(max(start, day * MINUTES_PER_DAY), min(end, (day + 1) * MINUTES_PER_DAY)):
+                if e - s >= minutes:
+                    return s
+            day = self.tree.first_fit(day + 1, minutes)
+        return None
+
+    def find_pieces(self, minutes, start, end, min_chunk=MIN_CHUNK_MINUTES):
+        """
+        Earliest set of free (start, end) pieces inside [start, end) adding up
+        to `minutes`, each at least min_chunk long except possibly the last.
+        Returns None (without reserving anything) if the window can't hold it.
+        """
+        if self.free_minutes(start, end) < minutes:
+            return None
+        pieces = []
+        remaining = minutes
+        first, last = self._day_of(start), self._day_of(end - 1)
+        day = first
+        while remaining and day != -1 and day <= last:
+            for s, e in self.intervals(max(start, day * MINUTES_PER_DAY), min(end, (day + 1) * MINUTES_PER_DAY)):
+                length = min(e - s, remaining)
+                if length >= min_chunk or length == remaining:
+                    pieces.append((s, s + length))
+                    remaining -= length
+                    if not remaining:
+                        break
+            # Skip days that only have fragments shorter than a usable chunk
+            day = self.tree.first_fit(day + 1, min(min_chunk, remaining)) if remaining else day
+        return pieces if not remaining else None
+
+    # -- updates -------------------------------------------------------------
+
+    def reserve(self, start, end):
+        """Removes [start, end) from the free time (partly busy ranges are fine)."""
+        if end <= start or self.days == 0 or end <= 0 or start >= self.days * MINUTES_PER_DAY:
+            return
+        for day in range(self._day_of(start), self._day_of(end - 1) + 1):
+            starts, ends = self.starts[day], self.ends[day]
+            lo = bisect_right(ends, start)
+            hi = bisect_left(starts, end)
+            if lo >= hi:
+                continue
+            keep_starts, keep_ends = [], []
+            if starts[lo] < start:
+                keep_starts.append(starts[lo])
+                keep_ends.append(start)
+            if ends[hi - 1] > end:
+                keep_starts.append(end)
+                keep_ends.append(ends[hi - 1])
+            starts[lo:hi] = keep_starts
+            ends[lo:hi] = keep_ends
+            self._refresh(day)
+
+    def release(self, start, end):
+        """Returns a previously reserved [start, end) to the free time."""
+        for day in range(self._day_of(start), self._day_of(end - 1) + 1):
+            s = max(start, day * MINUTES_PER_DAY)
+            e = min(end, (day + 1) * MINUTES_PER_DAY)
+            if e <= s:
+                continue
+            starts, ends = self.starts[day], self.ends[day]
+            i = bisect_left(starts, s)
+            # Merge with touching neighbours so long runs stay whole
+            if i > 0 and ends[i - 1] == s:
+                i -= 1
+                s = starts.pop(i)
+                ends.pop(i)
+            if i < len(starts) and starts[i] == e:
+                starts.pop(i)
+                e = ends.pop(i)
+            starts.insert(i, s)
+            ends.insert(i, e)
+            self._refresh(day)
+
+def _event(task, start, end, part=None, parts=None):
+    uid, summary = task["id"], task["task_name"]
+    if parts and parts > 1:
+        uid, summary = f"{uid}-{part}", f"{summary} ({part}/{parts})"
+    return {"uid": uid, "task_id": task["id"], "start": start, "end": end, "summary": summary}
+
+def _is_open(task):
+    return (task.get("status") or "pending") != "done"
+
+def _placement_key(task):
+    # Pinned tasks have the narrowest windows, so they go first; then rank order
+    return (_to_date(task.get("scheduled_date")) is None, rank_key(task))
+
+def _new_index(start_date, days, working_hours, busy):
+    index = FreeTimeIndex(start_date, days, working_hours)
+    for busy_start, busy_end in busy:
+        index.reserve(index.to_minutes(busy_start), index.to_minutes(busy_end))
+    return index
+
+def _window(index, task):
+    """(minutes, earliest, latest) for `task` in minutes from the index origin."""
+    minutes = int(task.get("duration_minutes") or DEFAULT_DURATION)
+    earliest, latest = 0, index.days * MINUTES_PER_DAY
+
+    scheduled = _to_date(task.get("scheduled_date"))
+    if scheduled:
+        earliest = max(earliest, (scheduled - index.start_date).days * MINUTES_PER_DAY)
+    deadline = _to_date(task.get("deadline"))
+    if deadline:
+        latest = min(latest, (deadline - index.start_date).days * MINUTES_PER_DAY + MINUTES_PER_DAY)
+    return minutes, earliest, latest
+
+def _place(index, task, split, min_chunk):
+    """
+    Reserves room for `task` in `index`. Returns (pieces, None) with the
+    reserved (start, end) minute ranges, or (None, reason) if it can't fit.
+    """
+    horizon_end = index.days * MINUTES_PER_DAY
+    minutes, earliest, latest = _window(index, task)
+    deadline = _to_date(task.get("deadline"))
+
+    if deadline and deadline < index.start_date:
+        return None, "deadline passed"
+    if earliest >= horizon_end:
+        return None, "scheduled after horizon"
+
+    slot = index.find_slot(minutes, earliest, latest)
+    if slot is not None:
+        pieces = [(slot, slot + minutes)]
+    elif split:
+        pieces = index.find_pieces(minutes, earliest, latest, min_chunk)
+    else:
+        pieces = None
+    if not pieces:
+        return None, "no room before deadline" if deadline and latest < horizon_end else "no room in horizon"
+
+    for s, e in pieces:
+        index.reserve(s, e)
+    return pieces, None
+
+def _overflow_entry(task, reason):
+    return {
+        "task_id": task["id"],
+        "task_name": task["task_name"],
+        "duration_minutes": int(task.get("duration_minutes") or DEFAULT_DURATION),
+        "deadline": task.get("deadline"),
+        "reason": reason,
+    }
+
+def _events_for(index, task, pieces):
+    return [_event(task, index.to_datetime(s), index.to_datetime(e), n, len(pieces))
+            for n, (s, e) in enumerate(pieces, 1)]
+
+def schedule_tasks(tasks, start_date, days=7, working_hours=None, busy=(), split=True,
+                   min_chunk=MIN_CHUNK_MINUTES):
+    """
+    Places `tasks` (in the order given, i.e. by priority) into working hours
+    over `days` days from `start_date`, avoiding the (start, end) datetime
+    ranges in `busy`.
+
+    Tasks with a scheduled_date are placed first, no earlier than that day;
+    tasks with a deadline must finish by the end of that day. With `split`,
+    a task that doesn't fit in one free slot is spread over several pieces
+    of at least `min_chunk` minutes. Tasks that can't be placed are
+    returned in `overflow` with the reason, never silently dropped.
+
+    Returns {"events": [...], "overflow": [...]}; events are sorted by start.
+    """
+    index = _new_index(start_date, days, working_hours, busy)
+    pending = [t for t in tasks if _is_open(t)]
+    # Stable sort keeps the given order within the pinned and unpinned groups
+    pending.sort(key=lambda t: _to_date(t.get("scheduled_date")) is None)
+
+    events, overflow = [], []
+    for task in pending:
+        pieces, reason = _place(index, task, split, min_chunk)
+        if pieces:
+            events.extend(_events_for(index, task, pieces))
+        else:
+            overflow.append(_overflow_entry(task, reason))
+
+    events.sort(key=lambda e: e["start"])
+    return {"events": events, "overflow": overflow}
+
+class IncrementalScheduler:
     """
+    Keeps a placement in memory and repairs it from task_manager change
+    events instead of re-placing every task.
+
+    A changed task releases its old slots and is placed into the current
+    free time; if it doesn't fit, lower-ranked tasks holding time in its
+    window are evicted (lowest first) until it does, and re-placed. Freed
+    time is offered to overflowing tasks in rank order. Other tasks never
+    move, so the calendar stays stable. Changes it wasn't notified of
+    (a revision gap, or writes by another worker process) are replayed
+    from the change feed; it falls back to a full recompute (rebuild) when
+    that is a large share of the tasks or check() finds the placement
+    inconsistent.
+    """
+
+    def __init__(self, start_date, days=7, working_hours=None, busy=(), split=True,
+                 min_chunk=MIN_CHUNK_MINUTES, subscribe=True):
+        self.start_date = start_date
+        self.days = days
+        self.working_hours = working_hours
+        self.busy = tuple(busy)
+        self.split = split
+        self.min_chunk = min_chunk
+        self.revision = None
+        self.rebuilds = 0
+        self.repairs = 0
+        self._lock = threading.RLock()
+        self._events = None
+        self.rebuild()
+        self._subscribed = subscribe
+        if subscribe:
+            on_change(self._on_change)
+
+    def close(self):
+        if self._subscribed:
+            remove_change_listener(self._on_change)
+            self._subscribed = False
+
+    def rebuild(self):
+        """Full recompute from the database."""
+        with self._lock:
+            while True:
+                revision = get_revision()
+                tasks = get_prioritized_tasks()
+                if get_revision() == revision:
+                    break
+            self._index = _new_index(self.start_date, self.days, self.working_hours, self.busy)
+            self._tasks = {}
+            self._keys = {}
+            self._pieces = {}
+            self._overflow = {}
+            self._waiting = []  # sorted (placement key, id) of overflowing tasks
+            for task in sorted((t for t in tasks if _is_open(t)), key=_placement_key):
+                self._add(task)
+                self._try_place(task)
+            self.revision = revision
+            self.rebuilds += 1
+            self._events = None
+
+    def _add(self, task):
+        self._tasks[task["id"]] = task
+        self._keys[task["id"]] = _placement_key(task)
+
+    def _try_place(self, task):
+        task_id = task["id"]
+        pieces, reason = _place(self._index, task, self.split, self.min_chunk)
+        if pieces:
+            self._pieces[task_id] = pieces
+            self._unwait(task_id)
+            return True
+        if task_id not in self._overflow:
+            _, earliest, latest = _window(self._index, task)
+            insort(self._waiting, (self._keys[task_id], task_id, earliest, latest))
+        self._overflow[task_id] = _overflow_entry(task, reason)
+        return False
+
+    def _unwait(self, task_id):
+        if self._overflow.pop(task_id, None) is not None:
+            i = bisect_left(self._waiting, (self._keys[task_id], task_id))
+            del self._waiting[i]
+
+    def _remove(self, task_id):
+        """Forgets a task; returns the (start, end) ranges it gave back to the free time."""
+        if task_id not in self._tasks:
+            return []
+        self._unwait(task_id)
+        self._tasks.pop(task_id)
+        self._keys.pop(task_id)
+        pieces = self._pieces.pop(task_id, None) or []
+        for s, e in pieces:
+            self._index.release(s, e)
+        return pieces
+
+    def _refill(self, freed):
+        """
+        Offers the freed ranges to overflowing tasks in rank order. Every
+        overflowing task already failed to fit in the rest of the free
+        time, so only tasks whose window meets a freed range are retried,
+        and only until the freed ranges are taken again.
+        """
+        for _, task_id, earliest, latest in list(self._waiting):
+            if any(s < latest and e > earliest for s, e in freed) and self._try_place(self._tasks[task_id]):
+                if not any(self._index.free_minutes(s, e) for s, e in freed):
+                    break
+
+    def _make_room(self, task):
+        """
+        Evicts lower-ranked tasks overlapping `task`'s window until it fits.
+        Returns (task, freed ranges) per evicted task; the caller re-places them.
+        """
+        key = self._keys[task["id"]]
+        _, earliest, latest = _window(self._index, task)
+        victims = [i for i, pieces in self._pieces.items()
+                   if self._keys[i] > key and pieces[0][0] < latest and pieces[-1][1] > earliest]
+        victims.sort(key=self._keys.get, reverse=True)
+
+        evicted = []
+        for victim_id in victims:
+            victim = self._tasks[victim_id]
+            evicted.append((victim, self._remove(victim_id)))
+            self._add(victim)
+            if self._try_place(task):
+                break
+        return evicted
+
+    def _on_change(self, kind, ids, revision):
+        with self._lock:
+            if revision <= self.revision:
+                return  # already covered by a rebuild
+            if revision != self.revision + 1:
+                self._catch_up()
+                return
+            self._apply(get_tasks_by_ids(ids) if kind == "upsert" else [], ids, revision)
+
+    def _catch_up(self):
+        """
+        Brings the placement up to the database revision from the change
+        feed, e.g. after writes made by another worker process; rebuilds
+        if too much changed for a repair to be cheaper.
+        """
+        if get_revision() == self.revision:
+            return
+        changes = get_changes(self.revision)
+        ids = [t["id"] for t in changes["tasks"]] + changes["deleted"]
+        if len(ids) > max(CATCH_UP_LIMIT, len(self._tasks) // 4):
+            self.rebuild()
+        else:
+            self._apply(changes["tasks"], ids, changes["revision"])
+
+    def _apply(self, changed, ids, revision):
+        """Repairs the placement for tasks `ids`, of which `changed` are the ones still present."""
+        freed = []
+        for task_id in ids:
+            freed.extend(self._remove(task_id))
+        evicted = []
+        for task in sorted((t for t in changed if _is_open(t)), key=_placement_key):
+            self._add(task)
+            if not self._try_place(task):
+                evicted.extend(self._make_room(task))
+        for task, pieces in sorted(evicted, key=lambda item: self._keys[item[0]["id"]]):
+            freed.extend(pieces)
+            self._try_place(task)
+        if freed and any(self._index.free_minutes(s, e) for s, e in freed):
+            self._refill(freed)
+
+        self.revision = revision
+        self.repairs += 1
+        self._events = None
+
+    def result(self, free_minutes=None):
+        """
+        {"events", "overflow"} like schedule_tasks for the current placement,
+        plus the task revision it reflects. With `free_minutes`, also
+        "free": the free slots of at least that many minutes (see free_slots).
+        """
+        with self._lock:
+            self._catch_up()  # changed by another process or a missed event
+            if self._events is None:
+                events = []
+                for task_id, pieces in self._pieces.items():
+                    events.extend(_events_for(self._index, self._tasks[task_id], pieces))
+                events.sort(key=lambda e: e["start"])
+                self._events = events
+            overflow = [self._overflow[task_id] for _, task_id, _, _ in self._waiting]
+            result = {"events": list(self._events), "overflow": overflow, "revision": self.revision}
+            if free_minutes is not None:
+                result["free"] = self.free_slots(free_minutes)
+            return result
+
+    def free_slots(self, min_minutes=0):
+        """Free intervals of at least `min_minutes`, as {"start", "end", "minutes"}."""
+        with self._lock:
+            self._catch_up()
+            return [{"start": self._index.to_datetime(s), "end": self._index.to_datetime(e), "minutes": e - s}
+                    for s, e in self._index.intervals() if e - s >= min_minutes]
+
+    def check(self, repair=True):
+        """
+        Validates the placement against the database and the free-time
+        model: every open task is either placed or in overflow, pieces add
+        up to the duration, stay inside working hours, deadlines and
+        scheduled dates, and don't overlap. Returns a list of problems;
+        with `repair`, rebuilds when there are any.
+        """
+        with self._lock:
+            problems = []
+            db_tasks = {t["id"]: t for t in get_prioritized_tasks() if _is_open(t)}
+            if set(db_tasks) != set(self._tasks):
+                problems.append("task set differs from the database")
+            for task_id, task in self._tasks.items():
+                if db_tasks.get(task_id, task) != task:
+                    problems.append(f"task {task_id} is stale")
+                if (task_id in self._pieces) == (task_id in self._overflow):
+                    problems.append(f"task {task_id} is neither placed nor in overflow exactly once")
+
+            fresh = _new_index(self.start_date, self.days, self.working_hours, self.busy)
+            for task_id, pieces in self._pieces.items():
+                task = self._tasks[task_id]
+                if sum(e - s for s, e in pieces) != int(task.get("duration_minutes") or DEFAULT_DURATION):
+                    problems.append(f"task {task_id} pieces don't add up to its duration")
+                scheduled = _to_date(task.get("scheduled_date"))
+                deadline = _to_date(task.get("deadline"))
+                for s, e in pieces:
+                    if fresh.free_minutes(s, e) != e - s:
+                        problems.append(f"task {task_id} overlaps busy time or another task")
+                    fresh.reserve(s, e)
+                    day = self.start_date + timedelta(days=s // MINUTES_PER_DAY)
+                    if scheduled and day < scheduled or deadline and day > deadline:
+                        problems.append(f"task {task_id} is placed outside its window")
+
+            if problems and repair:
+                self.rebuild()
+            return problems
+
+# Shared incremental schedulers behind schedule_week and free_slots, one per
+# settings, least recently used first
+_incremental = OrderedDict()
+_incremental_lock = threading.Lock()
+
+def get_incremental_scheduler(start_date, days=7, working_hours=None, busy=(), split=True):
+    """
+    Returns the shared IncrementalScheduler for these settings, building it
+    if it isn't among the INCREMENTAL_SCHEDULERS most recently used. While
+    the job workers run, they aren't repaired on the writer's thread: the
+    "schedule" job catches them up after each change instead.
+    """
+    key = (start_date, days, repr(working_hours), tuple(busy), split)
+    with _incremental_lock:
+        scheduler = _incremental.get(key)
+        if scheduler is None:
+            scheduler = _incremental[key] = IncrementalScheduler(start_date, days, working_hours, busy, split,
+                                                                 subscribe=not jobs.JOBS.running)
+            while len(_incremental) > INCREMENTAL_SCHEDULERS:
+                _incremental.popitem(last=False)[1].close()
+        _incremental.move_to_end(key)
+        return scheduler
+
+def reset_incremental_schedulers():
+    """Closes and forgets all shared schedulers."""
+    with _incremental_lock:
+        for scheduler in _incremental.values():
+            scheduler.close()
+        _incremental.clear()
+
+@jobs.job_handler("schedule", local=True)
+def schedule_job():
+    """Brings the shared placements up to date (the default week if there are none yet)."""
+    with _incremental_lock:
+        schedulers = list(_incremental.values())
+    if not schedulers:
+        schedulers = [get_incremental_scheduler(default_start_date())]
+    placements = []
+    for scheduler in schedulers:
+        result = scheduler.result()
+        placements.append({"revision": result["revision"], "start": scheduler.start_date.isoformat(),
+                           "days": scheduler.days, "events": len(result["events"]),
+                           "overflow": len(result["overflow"])})
+    return {"schedulers": placements}
+
+@on_change
+def _precompute_schedule(kind, ids, revision):
+    if jobs.JOBS.running:
+        jobs.JOBS.enqueue("schedule", priority=jobs.PRIORITY_BACKGROUND, delay=SCHEDULE_PRECOMPUTE_DELAY)
+
+def default_start_date(start_date=None):
+    """`start_date` as a date; None means the next Monday."""
     if start_date is None:
         now = datetime.now()
         days_ahead = 0 - now.weekday()
         if days_ahead <= 0:
             days_ahead += 7
         start_date = now + timedelta(days=days_ahead)
-        # Ensure it's a date object if it was datetime
-        if isinstance(start_date, datetime):
-            start_date = start_date.date()
-
-    tasks = get_all_tasks()
-    tasks = sort_tasks(tasks)
-    
-    # build available slots: each day from start_date for 7 days, from 09:00 to 18:00
-    slots = []
-    for i in range(7):
-        day = start_date + timedelta(days=i)
-        # Create datetime from date
-        slot_start = datetime.combine(day, datetime.min.time()).replace(hour=WEEK_START_HOUR)
-        slot_end = slot_start.replace(hour=WEEK_END_HOUR)
-        slots.append([slot_start, slot_end])
-        
-    events = []
-    for t in tasks:
-        dur = t.get("duration_minutes")
-        if not dur:
-            dur = 60 # Default duration
-        else:
-            dur = int(dur)
-            
-        # find first slot where this duration fits
-        placed = False
-        for s in slots:
-            start, end = s
-            available_minutes = int((end - start).total_seconds()//60)
-            if available_minutes >= dur:
-                ev_start = start
-                ev_end = start + timedelta(minutes=dur)
-                events.append({
-                    "uid": t["id"],
-                    "start": ev_start,
-                    "end": ev_end,
-                    "summary": t["task_name"]
-                })
-                # move slot start forward
-                s[0] = ev_end
-                placed = True
-                break
-        if not placed:
-            # no slot in week; skip or add as overflow at end of week
-            pass
-            
-    write_ics(events)
-    return events
-
-def write_ics(events):
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//simple-scheduler//EN"
-    ]
+    # Ensure it's a date object if it was datetime
+    if isinstance(start_date, datetime):
+        start_date = start_date.date()
+    return start_date
+
+# (revision, settings) of the last schedule_week output written to OUTPUT_ICS
+_written = {"key": None}
+
+def schedule_week(start_date=None, weeks=1, working_hours=None, busy=(), split=True, incremental=True):
+    """
+    Schedules tasks for `weeks` weeks starting from start_date.
+    If start_date is None, defaults to the next Monday.
+    Returns the placed events; tasks that don't fit are reported.
+
+    By default the placement is kept up to date incrementally as tasks
+    change, and the ICS file is only rewritten when it changed;
+    incremental=False recomputes and rewrites it from scratch.
+    """
+    start_date = default_start_date(start_date)
+
+    if incremental:
+        scheduler = get_incremental_scheduler(start_date, 7 * weeks, working_hours, busy, split)
+        result = scheduler.result()
+        key = (result["revision"], start_date, 7 * weeks, repr(working_hours), tuple(busy), split)
+    else:
+        result = schedule_tasks(get_prioritized_tasks(), start_date, days=7 * weeks,
+                                working_hours=working_hours, busy=busy, split=split)
+        key = None
+
+    for item in result["overflow"]:
+        print(f"Could not schedule '{item['task_name']}' ({item['duration_minutes']} min): {item['reason']}")
+
+    if key is None or key != _written["key"] or not OUTPUT_ICS.exists():
+        write_ics(result["events"])
+        _written["key"] = key
+    return result["events"]
+
+def get_free_slots(start_date=None, weeks=1, min_minutes=0):
+    """
+    Free working time left by the current schedule, as a list of
+    {"start", "end", "minutes"} with datetimes. Read straight from the
+    shared scheduler's free-time index, which placements keep up to date.
+    """
+    start_date = default_start_date(start_date)
+    return get_incremental_scheduler(start_date, 7 * weeks).free_slots(min_minutes)
+
+def format_free_slots(slots):
+    if not slots:
+        return "No free time left in this period."
+    days = {}
+    for slot in slots:
+        days.setdefault(slot["start"].date(), []).append(f"{slot['start']:%H:%M}-{slot['end']:%H:%M}")
+    return "\n".join(f"{day:%a %Y-%m-%d}: {', '.join(ranges)}" for day, ranges in days.items())
+
+# --- ICS export ---------------------------------------------------------------
+
+def _ics_text(value):
+    # RFC 5545 TEXT escaping
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _ics_line(line):
+    """Folds a content line at 75 octets, as RFC 5545 requires."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a multi-byte UTF-8 sequence
+        while cut > 0 and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+def iter_ics(events, dtstamp=None):
+    """Yields the calendar as text chunks (one per event) for files or HTTP responses."""
+    stamp = to_ical_datetime(dtstamp or datetime.utcnow())
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//simple-scheduler//EN\r\n"
     for e in events:
-        lines += [
-            "BEGIN:VEVENT",
-            f"UID:{e['uid']}",
-            f"DTSTAMP:{to_ical_datetime(datetime.utcnow())}",
-            f"DTSTART:{to_ical_datetime(e['start'])}",
-            f"DTEND:{to_ical_datetime(e['end'])}",
-            f"SUMMARY:{e['summary']}",
-            "END:VEVENT"
-        ]
-    lines.append("END:VCALENDAR")
-    
+        yield "".join([
+            "BEGIN:VEVENT\r\n",
+            _ics_line(f"UID:{e['uid']}"),
+            f"DTSTAMP:{stamp}Z\r\n",
+            f"DTSTART:{to_ical_datetime(e['start'])}\r\n",
+            f"DTEND:{to_ical_datetime(e['end'])}\r\n",
+            _ics_line(f"SUMMARY:{_ics_text(e['summary'])}"),
+            "END:VEVENT\r\n",
+        ])
+    yield "END:VCALENDAR\r\n"
+
+def write_ics(events, path=None):
+    """
+    Streams the calendar to `path` (default OUTPUT_ICS) through a temporary
+    file in the same directory that replaces the old file atomically, so
+    readers never see a half-written calendar.
+    """
+    path = Path(path or OUTPUT_ICS)
     # Ensure directory exists
-    OUTPUT_ICS.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(OUTPUT_ICS, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-    print(f"Schedule written to {OUTPUT_ICS}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            for chunk in iter_ics(events):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    print(f"Schedule written to {path}")
@@ -1,47 +1,88 @@
-from project.utils.file_utils import load_json
-from datetime import datetime
+import json
+from datetime import date, timedelta
+from project.storage import get_store
 
-DATA_FILE = 'project/data/tasks.json'
+SUMMARY_DAYS = 7
+# Entries kept in each task list of the summary
+SUMMARY_LIST_SIZE = 5
+# Upper bound on the JSON handed to the LLM (see compact_stats)
+SUMMARY_MAX_CHARS = 1500
+NAME_MAX_CHARS = 60
 
-def generate_summary():
+def weekly_stats(today=None, days=SUMMARY_DAYS, store=None):
+    """Summary aggregates for the `days` starting `today`, from the task store."""
+    today = today or date.today()
+    stats = (store or get_store()).summary_stats(
+        today.isoformat(), (today + timedelta(days=days)).isoformat(), SUMMARY_LIST_SIZE)
+    stats["today"] = today.isoformat()
+    stats["days"] = days
+    return stats
+
+def _brief(task):
+    name = task.task_name or ""
+    if len(name) > NAME_MAX_CHARS:
+        name = name[:NAME_MAX_CHARS - 3] + "..."
+    return {"name": name, "deadline": task.deadline, "priority": task.priority, "minutes": task.duration_minutes}
+
+def compact_stats(stats, max_chars=SUMMARY_MAX_CHARS):
     """
-    Generates a text summary of tasks:
-    - Total tasks
-    - Tasks by priority
-    - Upcoming deadlines
+    The stats as a small JSON-ready dict for the LLM prompt. Task lists are
+    trimmed from the end until the JSON fits in `max_chars`, so the prompt
+    size stays flat however many tasks there are.
     """
-    tasks = load_json(DATA_FILE)
-    
-    if not tasks:
+    compact = {
+        "today": stats["today"],
+        "days": stats["days"],
+        "open_tasks": stats["open"],
+        "done_tasks": stats["done"],
+        "open_hours": round(stats["open_minutes"] / 60, 1),
+        "hours_due_or_scheduled_in_window": round(stats["week_minutes"] / 60, 1),
+        "by_priority": stats["by_priority"],
+        "due_in_window": {"count": stats["due_soon"]["count"],
+                          "tasks": [_brief(t) for t in stats["due_soon"]["tasks"]]},
+        "overdue": {"count": stats["overdue"]["count"],
+                    "tasks": [_brief(t) for t in stats["overdue"]["tasks"]]},
+        "suggested_focus": [_brief(t) for t in stats["focus"]],
+    }
+    lists = [compact["suggested_focus"], compact["overdue"]["tasks"], compact["due_in_window"]["tasks"]]
+    while len(json.dumps(compact, separators=(",", ":"))) > max_chars and any(lists):
+        max(lists, key=len).pop()
+    return compact
+
+def format_summary(stats):
+    """Plain-text summary of weekly_stats(), no LLM involved."""
+    if not stats["open"] and not stats["done"]:
         return "No tasks found."
-        
-    total_tasks = len(tasks)
-    priority_counts = {"high": 0, "medium": 0, "low": 0}
-    
-    for task in tasks:
-        p = task.get('priority', 'low').lower()
-        if p in priority_counts:
-            priority_counts[p] += 1
-            
-    # Sort by deadline for upcoming
-    def sort_key(task):
-        try:
-            return datetime.strptime(task['deadline'], "%Y-%m-%d")
-        except ValueError:
-            return datetime.max
-            
-    sorted_tasks = sorted(tasks, key=sort_key)
-    upcoming = sorted_tasks[:3]
-    
+
     summary = []
     summary.append("=== Task Summary ===")
-    summary.append(f"Total Tasks: {total_tasks}")
+    summary.append(f"Total Tasks: {stats['open'] + stats['done']} ({stats['open']} open, {stats['done']} done)")
     summary.append("By Priority:")
-    for p, count in priority_counts.items():
-        summary.append(f"  - {p.capitalize()}: {count}")
-        
-    summary.append("Upcoming Deadlines:")
-    for t in upcoming:
-        summary.append(f"  - {t['name']} (Due: {t['deadline']})")
-        
+    for p, group in stats["by_priority"].items():
+        summary.append(f"  - {p.capitalize()}: {group['count']} ({group['minutes'] / 60:.1f} h)")
+    summary.append(f"Estimated hours in the next {stats['days']} days: {stats['week_minutes'] / 60:.1f}")
+
+    if stats["overdue"]["count"]:
+        summary.append(f"Overdue: {stats['overdue']['count']}")
+        for t in stats["overdue"]["tasks"]:
+            summary.append(f"  - {t.task_name} (Due: {t.deadline})")
+
+    summary.append(f"Upcoming Deadlines: {stats['due_soon']['count']}")
+    for t in stats["due_soon"]["tasks"]:
+        summary.append(f"  - {t.task_name} (Due: {t.deadline})")
+
+    summary.append("Suggested Focus:")
+    for t in stats["focus"][:3]:
+        summary.append(f"  - {t.task_name} ({t.priority or 'medium'}, {t.deadline or 'no deadline'})")
+
     return "\n".join(summary)
+
+def generate_summary(today=None):
+    """
+    Generates a text summary of tasks:
+    - Total tasks
+    - Tasks and hours by priority
+    - Overdue and upcoming deadlines
+    - Suggested focus
+    """
+    return format_summary(weekly_stats(today))
@@ -1,8 +1,5 @@
-import uuid
-from datetime import datetime
-from project.utils.file_utils import load_json, save_json
-
-DATA_FILE = 'project/data/tasks.json'
+from project.models import Task
+from project.storage import get_store
 
 def add_task(task_name, duration_minutes, deadline_date, priority):
     """
@@ -14,17 +11,11 @@ def add_task(task_name, duration_minutes, deadline_date, priority):
         deadline_date (str): YYYY-MM-DD
         priority (str): high, medium, or low
     """
-    tasks = load_json(DATA_FILE)
-    
-    new_task = {
-        "id": str(uuid.uuid4()),
-        "name": task_name,
-        "duration": int(duration_minutes),
-        "deadline": deadline_date,
-        "priority": priority.lower(),
-        "created_at": datetime.now().isoformat()
-    }
-    
-    tasks.append(new_task)
-    save_json(DATA_FILE, tasks)
+    task = get_store().add(Task(
+        task_name=task_name,
+        duration_minutes=int(duration_minutes),
+        deadline=deadline_date,
+        priority=priority.lower()
+    ))
     print(f"Task '{task_name}' added successfully.")
+    return task
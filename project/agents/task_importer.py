@@ -0,0 +1,140 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from project.llm_wrapper import LLM_BATCH_MAX
+from project.agents.ai_agent import process_user_messages
+from project.agents.intent_parser import parse_intent, FAST_PATH_THRESHOLD, DEFAULT_DURATION, DEFAULT_PRIORITY
+from project.agents.task_manager import upsert_tasks, get_revision
+
+# Worker threads parsing lines at once; each holds at most one LLM request
+IMPORT_CONCURRENCY = int(os.environ.get("IMPORT_CONCURRENCY", "8"))
+# Lines per worker job: one LLM micro-batch, and one progress event
+IMPORT_CHUNK_SIZE = LLM_BATCH_MAX
+IMPORT_MAX_LINES = int(os.environ.get("IMPORT_MAX_LINES", "5000"))
+
+PRIORITIES = ("high", "medium", "low")
+
+# "- ", "* ", "1. ", "2) ", "[ ] " and similar list markers
+_BULLET_RE = re.compile(r"^\s*(?:(?:[-*+•]|\d+[.)]|\[[ xX]?\])\s+)+")
+# The imperatives intent_parser accepts as an add; any other line gets "add " in front
+_ADD_VERB_RE = re.compile(
+    r"^(?:please\s+)?(?:add|create(?:\s+(?:a|an|the))?(?:\s+new)?\s+(?:task|todo|to-do|item|reminder)|remind me to)\b",
+    re.I)
+
+def split_lines(text):
+    """(line_number, text) for each non-blank line, without list markers."""
+    lines = []
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = _BULLET_RE.sub("", raw).strip()
+        if line:
+            lines.append((number, line))
+    return lines
+
+def _as_add(line):
+    # Every import line is a task, whether or not it says "add"
+    return line if _ADD_VERB_RE.match(line) else f"add {line}"
+
+def parse_line(line, use_llm=True):
+    """
+    The local parser's add_task for one line, or None. With the LLM
+    available only confident parses are kept; without it any parse is.
+    """
+    parsed, confidence = parse_intent(_as_add(line))
+    if parsed and parsed.get("action") == "add_task" and (confidence >= FAST_PATH_THRESHOLD or not use_llm):
+        return parsed
+    return None
+
+def _parse_chunk(chunk, use_llm, use_fast_path):
+    results = [parse_line(text, use_llm) if use_fast_path or not use_llm else None for _, text in chunk]
+    pending = [i for i, parsed in enumerate(results) if parsed is None]
+    if pending and use_llm:
+        # The rest of the chunk goes to the LLM as one micro-batch
+        messages = [_as_add(chunk[i][1]) for i in pending]
+        for i, parsed in zip(pending, process_user_messages(messages, use_fast_path=False)):
+            results[i] = parsed
+    return results
+
+def _to_task(parsed):
+    """(task dict, None) for an add_task result, else (None, error message)."""
+    if not isinstance(parsed, dict) or parsed.get("action") != "add_task":
+        reason = parsed.get("response") if isinstance(parsed, dict) else None
+        return None, f"not understood as a task{': ' + reason if reason else ''}"
+    params = parsed.get("parameters") or {}
+    name = str(params.get("task_name") or "").strip()
+    if not name:
+        return None, "no task name"
+    try:
+        duration = int(params.get("duration_minutes") or DEFAULT_DURATION)
+    except (TypeError, ValueError):
+        duration = DEFAULT_DURATION
+    priority = str(params.get("priority") or DEFAULT_PRIORITY).lower()
+    return {
+        "task_name": name,
+        "duration_minutes": duration,
+        "priority": priority if priority in PRIORITIES else DEFAULT_PRIORITY,
+        "deadline": params.get("deadline"),
+        "scheduled_date": params.get("scheduled_date"),
+    }, None
+
+def iter_import(lines, use_llm=True, use_fast_path=True, concurrency=None):
+    """
+    Imports (line_number, text) pairs as tasks. Lines are parsed in chunks
+    on a pool of `concurrency` threads; all parsed tasks are then inserted
+    in one transaction.
+
+    Yields ("progress", {"done", "total", "lines"}) as each chunk finishes,
+    then ("done", {"total", "imported", "failed", "revision", "results"})
+    where results has one {"line", "text", "status", "id" | "error"} per line.
+    """
+    if len(lines) > IMPORT_MAX_LINES:
+        raise ValueError(f"at most {IMPORT_MAX_LINES} lines per import")
+    total = len(lines)
+    results = {}  # line number -> result
+    tasks = {}    # line number -> task dict
+    chunks = [lines[i:i + IMPORT_CHUNK_SIZE] for i in range(0, total, IMPORT_CHUNK_SIZE)]
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency or IMPORT_CONCURRENCY))
+    try:
+        futures = {pool.submit(_parse_chunk, chunk, use_llm, use_fast_path): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                parsed_chunk = future.result()
+            except Exception as e:
+                parsed_chunk = [{"action": "chat", "response": f"parse failed ({e})"}] * len(chunk)
+            events = []
+            for (number, text), parsed in zip(chunk, parsed_chunk):
+                task, error = _to_task(parsed)
+                if task:
+                    tasks[number] = task
+                    results[number] = {"line": number, "text": text, "status": "parsed",
+                                       "task_name": task["task_name"]}
+                else:
+                    results[number] = {"line": number, "text": text, "status": "error", "error": error}
+                events.append(results[number])
+            yield "progress", {"done": len(results), "total": total, "lines": events}
+    finally:
+        # A client that stops listening shouldn't keep the pool busy
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    numbers = sorted(tasks)
+    if numbers:
+        for number, saved in zip(numbers, upsert_tasks([tasks[n] for n in numbers])):
+            result = results[number]
+            if saved["status"] == "error":
+                result.update(status="error", error=saved.get("error"))
+            else:
+                result.update(status="created", id=saved["id"])
+    ordered = [results[n] for n in sorted(results)]
+    imported = sum(1 for r in ordered if r["status"] == "created")
+    yield "done", {"total": total, "imported": imported, "failed": total - imported,
+                   "revision": get_revision(), "results": ordered}
+
+def import_tasks(text, use_llm=True, use_fast_path=True, concurrency=None):
+    """iter_import over the lines of `text`; returns the final summary."""
+    summary = None
+    for kind, payload in iter_import(split_lines(text), use_llm, use_fast_path, concurrency):
+        if kind == "done":
+            summary = payload
+    return summary
@@ -1,84 +1,573 @@
+import base64
+import json
+import re
 import uuid
-from datetime import datetime
-from project.database import get_db_connection
+from datetime import date, datetime, timedelta
+from project.database import (db_session, after_commit, task_row_factory, RANK_KEYS, FTS_AVAILABLE,
+                              OPEN_CONDITION, PLAN_DAY)
+from project.models import Task
+from project.metrics import db_operation
 
+# Callables notified after every committed change as callback(kind, ids, revision),
+# where kind is "upsert" (tasks added or updated) or "delete"
+_change_listeners = []
+
+def on_change(callback):
+    """Subscribes `callback` to task changes; returns it so it can be used as a decorator."""
+    _change_listeners.append(callback)
+    return callback
+
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+def _notify(kind, ids, revision):
+    def run():
+        for callback in list(_change_listeners):
+            try:
+                callback(kind, ids, revision)
+            except Exception as e:
+                print(f"Error in task change listener: {e}")
+    after_commit(run)
+
+def _bump_revision(conn):
+    """Advances the global change-feed revision and returns the new value."""
+    conn.execute('UPDATE sync_state SET revision = revision + 1 WHERE id = 0')
+    return conn.execute('SELECT revision FROM sync_state WHERE id = 0').fetchone()[0]
+
+@db_operation
+def get_revision():
+    with db_session() as conn:
+        return conn.execute('SELECT revision FROM sync_state WHERE id = 0').fetchone()[0]
+
+@db_operation
 def add_task(task_name, duration_minutes=None, deadline=None, priority="medium", scheduled_date=None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     task_id = str(uuid.uuid4())
     created_at = datetime.utcnow().isoformat()
-    
-    cursor.execute('''
-        INSERT INTO tasks (id, task_name, duration_minutes, priority, deadline, created_at, scheduled_date)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (task_id, task_name, duration_minutes, priority, deadline, created_at, scheduled_date))
-    
-    conn.commit()
-    conn.close()
-    
-    return {
-        "id": task_id,
-        "task_name": task_name,
-        "duration_minutes": duration_minutes,
-        "deadline": deadline,
-        "priority": priority,
-        "created_at": created_at,
-        "scheduled_date": scheduled_date
-    }
+
+    with db_session() as conn:
+        revision = _bump_revision(conn)
+        conn.execute('''
+            INSERT INTO tasks (id, task_name, duration_minutes, priority, deadline, created_at, scheduled_date, revision)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (task_id, task_name, duration_minutes, priority, deadline, created_at, scheduled_date, revision))
+        _notify("upsert", [task_id], revision)
+
+    return Task(id=task_id, task_name=task_name, duration_minutes=duration_minutes, priority=priority,
+                deadline=deadline, created_at=created_at, scheduled_date=scheduled_date, revision=revision)
 
 def delete_task(task_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
-    rows_affected = cursor.rowcount
-    
-    conn.commit()
-    conn.close()
-    
-    return rows_affected > 0
+    return delete_tasks([task_id]) > 0
+
+@db_operation
+def delete_tasks(task_ids):
+    """Deletes the given ids in one transaction, leaving tombstones for the change feed."""
+    if not task_ids:
+        return 0
+    with db_session() as conn:
+        # Ids that matched nothing get no tombstone and no change event
+        deleted = [i for i in dict.fromkeys(task_ids)
+                   if conn.execute('DELETE FROM tasks WHERE id = ?', (i,)).rowcount]
+        if not deleted:
+            return 0
+        revision = _bump_revision(conn)
+        conn.executemany('INSERT OR REPLACE INTO deleted_tasks (id, revision) VALUES (?, ?)',
+                         [(i, revision) for i in deleted])
+        _notify("delete", deleted, revision)
+
+    return len(deleted)
 
+@db_operation
 def update_task(task_id, updates: dict):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    # Keys become column names in the statement, so only known ones pass
+    unknown = set(updates) - set(UPDATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields {sorted(unknown)}")
     # Dynamic update query
     fields = []
     values = []
     for k, v in updates.items():
         fields.append(f"{k} = ?")
         values.append(v)
-    
+
     if not fields:
         return None
-        
-    values.append(task_id)
-    query = f"UPDATE tasks SET {', '.join(fields)} WHERE id = ?"
-    
-    cursor.execute(query, values)
-    conn.commit()
-    conn.close()
-    
-    # Return updated task (fetch it back)
-    return get_task_by_id(task_id)
 
-def get_task_by_id(task_id):
-    conn = get_db_connection()
+    with db_session() as conn:
+        # The row takes the next revision, which is only claimed if it exists
+        fields.append("revision = (SELECT revision + 1 FROM sync_state WHERE id = 0)")
+        values.append(task_id)
+        query = f"UPDATE tasks SET {', '.join(fields)} WHERE id = ?"
+        if not conn.execute(query, values).rowcount:
+            return None
+        revision = _bump_revision(conn)
+        _notify("upsert", [task_id], revision)
+        # Return updated task (fetch it back)
+        return get_task_by_id(task_id)
+
+def _task_cursor(conn):
+    """A cursor on `conn` that yields Task objects instead of sqlite3.Row."""
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        return dict(row)
-    return None
+    cursor.row_factory = task_row_factory
+    return cursor
 
+@db_operation
+def get_task_by_id(task_id):
+    with db_session() as conn:
+        return _task_cursor(conn).execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+
+@db_operation
 def get_all_tasks():
-    conn = get_db_connection()
+    with db_session() as conn:
+        return _task_cursor(conn).execute('SELECT * FROM tasks').fetchall()
+
+@db_operation
+def get_changes(since):
+    """
+    Returns everything that changed after revision `since`:
+    {"revision": current, "tasks": [changed rows], "deleted": [ids]}.
+    """
+    with db_session() as conn:
+        # Read the revision first: a concurrent write can only make the
+        # result newer than reported, which the next poll re-sends harmlessly
+        revision = conn.execute('SELECT revision FROM sync_state WHERE id = 0').fetchone()[0]
+        tasks = _task_cursor(conn).execute('SELECT * FROM tasks WHERE revision > ?', (since,)).fetchall()
+        deleted = conn.execute('SELECT id FROM deleted_tasks WHERE revision > ?', (since,)).fetchall()
+
+    return {
+        "revision": revision,
+        "tasks": tasks,
+        "deleted": [row[0] for row in deleted]
+    }
+
+# Sort keys per ordering; `id` is always appended as the final tiebreaker
+ORDERINGS = {
+    "priority": list(RANK_KEYS),
+    "deadline": ["COALESCE(deadline, '9999-12-31')"],
+    "scheduled_date": ["COALESCE(scheduled_date, '9999-12-31')"],
+    "created_at": ["COALESCE(created_at, '')"],
+}
+
+TASK_COLUMNS = ("id", "task_name", "duration_minutes", "priority", "deadline",
+                "created_at", "status", "scheduled_date", "revision")
+
+# filter name -> (SQL condition, value transform)
+FILTERS = {
+    "status": ("status = ?", None),
+    "priority": ("lower(priority) = ?", str.lower),
+    "deadline_from": ("deadline >= ?", None),
+    "deadline_to": ("deadline <= ?", None),
+    "scheduled_from": ("scheduled_date >= ?", None),
+    "scheduled_to": ("scheduled_date <= ?", None),
+    # ?scheduled=0: only tasks without a scheduled date (the planner's backlog)
+    "scheduled": ("(scheduled_date IS NOT NULL) = ?", lambda v: int(str(v).lower() in ("1", "true", "yes"))),
+}
+
+def _encode_cursor(keys):
+    return base64.urlsafe_b64encode(json.dumps(keys).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+@db_operation
+def query_tasks_page(order="priority", limit=None, cursor=None, columns=None, **filters):
+    """
+    Filtered, ordered task query evaluated in SQL.
+
+    Filters are the keys of FILTERS; `order` is a key of ORDERINGS. With a
+    `limit`, results are keyset-paginated: pass the returned `next_cursor`
+    back to continue after the last row.
+    Returns {"tasks": [...], "next_cursor": str or None}.
+    """
+    if order not in ORDERINGS:
+        raise ValueError(f"Unknown order '{order}'")
+    keys = ORDERINGS[order] + ["id"]
+
+    where = []
+    params = []
+    for name, value in filters.items():
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter '{name}'")
+        if value is None:
+            continue
+        condition, transform = FILTERS[name]
+        where.append(condition)
+        params.append(transform(value) if transform else value)
+
+    if cursor:
+        last = _decode_cursor(cursor)
+        if not isinstance(last, list) or len(last) != len(keys):
+            raise ValueError("Invalid cursor")
+        where.append(f"({', '.join(keys)}) > ({', '.join('?' for _ in keys)})")
+        params.extend(last)
+
+    if columns and not set(columns) <= set(TASK_COLUMNS):
+        raise ValueError(f"Unknown columns {sorted(set(columns) - set(TASK_COLUMNS))}")
+    select = ", ".join(columns) if columns else "*"
+    key_cols = ", ".join(f"{k} AS _k{i}" for i, k in enumerate(keys))
+    query = f"SELECT {select}, {key_cols} FROM tasks"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY {', '.join(keys)}"
+    if limit is not None:
+        limit = max(1, int(limit))  # LIMIT 0 / -1 would mean "no rows" / "every row"
+        query += " LIMIT ?"
+        params.append(limit)
+
+    with db_session() as conn:
+        # Plain tuples, so the trailing sort-key columns stay available for the cursor
+        db_cursor = conn.cursor()
+        db_cursor.row_factory = None
+        rows = db_cursor.execute(query, params).fetchall()
+        tasks = [task_row_factory(db_cursor, row) for row in rows]
+
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = _encode_cursor(list(rows[-1][-len(keys):]))
+    return {"tasks": tasks, "next_cursor": next_cursor}
+
+def query_tasks(order="priority", limit=None, columns=None, **filters):
+    """Like query_tasks_page but returns just the list of tasks."""
+    return query_tasks_page(order=order, limit=limit, columns=columns, **filters)["tasks"]
+
+# Words dropped from search text unless nothing else is left ("the task about the dentist")
+SEARCH_STOP_WORDS = {"a", "an", "the", "my", "to", "of", "for", "about", "on", "with",
+                     "task", "tasks", "todo", "item", "one", "that", "this", "called", "named"}
+# Matches scored for relevance, newest first; scoring every match of a
+# common word costs ~0.15 s per 100k, and older tasks are rarely meant
+SEARCH_CANDIDATES = 1000
+# A best hit at least this much more relevant (bm25) than the runner-up is unambiguous
+RESOLVE_MARGIN = 1.5
+
+def _search_terms(text):
+    terms = re.findall(r"\w+", (text or "").lower())
+    return [t for t in terms if t not in SEARCH_STOP_WORDS] or terms
+
+def _fts_query(terms, any_term=False):
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"  # the last word may be cut short ("dent" -> "dentist")
+    return (" OR " if any_term else " AND ").join(quoted)
+
+def _search(conn, query, limit, status, any_term=None):
+    """
+    [(task, score)] best first; lower scores are better (bm25). Tasks with
+    all the words come first, then (any_term=None) tasks with any of them;
+    any_term=False / True searches only the one way.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+    status_sql = ""
+    params = []
+    if status == "open":
+        status_sql = f" AND {OPEN_CONDITION}"
+    elif status:
+        status_sql = " AND status = ?"
+        params.append(status)
+
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM tasks')
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return [dict(row) for row in rows]
+    cursor.row_factory = None
+    if not FTS_AVAILABLE:
+        where = " AND ".join("lower(task_name) LIKE ?" for _ in terms)
+        rows = cursor.execute(
+            f"SELECT *, 0 FROM tasks WHERE {where}{status_sql} ORDER BY {', '.join(RANK_KEYS)}, id LIMIT ?",
+            [f"%{t}%" for t in terms] + params + [limit]).fetchall()
+    else:
+        # All words first; if nothing has them all, any of them
+        for any_term in ((False, True) if any_term is None else (any_term,)):
+            rows = cursor.execute(f'''
+                SELECT * FROM (
+                    SELECT t.*, bm25(tasks_fts) AS score FROM tasks_fts
+                    JOIN tasks t ON t.rowid = tasks_fts.rowid
+                    WHERE tasks_fts MATCH ?{status_sql}
+                    ORDER BY tasks_fts.rowid DESC LIMIT ?
+                ) ORDER BY score, id LIMIT ?
+            ''', [_fts_query(terms, any_term)] + params + [SEARCH_CANDIDATES, limit]).fetchall()
+            if rows or len(terms) == 1:
+                break
+    return [(task_row_factory(cursor, row), row[-1]) for row in rows]
+
+@db_operation
+def search_tasks(query, limit=10, status=None):
+    """
+    Tasks whose names match the words of `query`, most relevant first.
+    `status` filters to one status, or "open" for anything not done.
+    """
+    with db_session() as conn:
+        return [task for task, _ in _search(conn, query, int(limit), status)]
+
+@db_operation
+def resolve_task_reference(query, limit=5):
+    """
+    The task a description such as "the dentist appointment" refers to.
+    Returns (task, candidates): task is None when nothing matches or the
+    best matches are too close to call, and candidates are the top hits.
+    Open tasks are preferred over done ones, but a task with all the words
+    beats one with only some of them whatever its status.
+    """
+    with db_session() as conn:
+        for any_term in (False, True):
+            hits = _search(conn, query, limit, "open", any_term) or _search(conn, query, limit, None, any_term)
+            if hits or not FTS_AVAILABLE:
+                break
+    candidates = [task for task, _ in hits]
+    if not hits:
+        return None, candidates
+    (best, best_score), rest = hits[0], hits[1:]
+    wanted = " ".join(_search_terms(query))
+    if (not rest or " ".join(_search_terms(best.task_name)) == wanted
+            or (FTS_AVAILABLE and best_score < 0 and best_score <= RESOLVE_MARGIN * rest[0][1])):
+        return best, candidates
+    return None, candidates
+
+# Priorities as the ranking treats them: anything unrecognised counts as medium
+PRIORITY_GROUP = "CASE lower(priority) WHEN 'high' THEN 'high' WHEN 'low' THEN 'low' ELSE 'medium' END"
+SUMMARY_COLUMNS = ("id", "task_name", "duration_minutes", "priority", "deadline", "scheduled_date")
+
+@db_operation
+def get_summary_stats(start, end, limit=5):
+    """
+    Aggregates for a summary of the window [start, end) (YYYY-MM-DD
+    strings), computed in SQL so neither the cost in Python nor the size of
+    the result grows with the number of tasks. Task lists hold at most
+    `limit` open tasks in ranking order.
+    """
+    select = ", ".join(SUMMARY_COLUMNS)
+    order = ", ".join(RANK_KEYS + ("id",))
+    by_priority = {p: {"count": 0, "minutes": 0} for p in ("high", "medium", "low")}
+    done = 0
+
+    with db_session() as conn:
+        rows = conn.execute(f'''
+            SELECT {OPEN_CONDITION}, {PRIORITY_GROUP}, COUNT(*), COALESCE(SUM(duration_minutes), 0)
+            FROM tasks GROUP BY 1, 2
+        ''')
+        for is_open, priority, count, minutes in rows:
+            if is_open:
+                by_priority[priority] = {"count": count, "minutes": minutes}
+            else:
+                done += count
+
+        def window(condition, params, with_tasks=True):
+            where = f"WHERE {OPEN_CONDITION} AND {condition}"
+            count, minutes = conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(duration_minutes), 0) FROM tasks {where}', params).fetchone()
+            result = {"count": count, "minutes": minutes}
+            if with_tasks:
+                result["tasks"] = _task_cursor(conn).execute(
+                    f'SELECT {select} FROM tasks {where} ORDER BY {order} LIMIT ?', (*params, limit)).fetchall()
+            return result
+
+        due_soon = window("deadline >= ? AND deadline < ?", (start, end))
+        overdue = window("deadline < ?", (start,))
+        this_week = window("((deadline >= ? AND deadline < ?) OR (scheduled_date >= ? AND scheduled_date < ?))",
+                           (start, end, start, end), with_tasks=False)
+        focus = _task_cursor(conn).execute(
+            f'SELECT {select} FROM tasks WHERE {OPEN_CONDITION} ORDER BY {order} LIMIT ?', (limit,)).fetchall()
+
+    return {
+        "open": sum(p["count"] for p in by_priority.values()),
+        "done": done,
+        "open_minutes": sum(p["minutes"] for p in by_priority.values()),
+        "by_priority": by_priority,
+        "due_soon": due_soon,
+        "overdue": overdue,
+        "week_minutes": this_week["minutes"],
+        "focus": focus,
+    }
+
+def _day_views(conn, start, days, limit):
+    """Per-day {"date", "count", "minutes", "due", "tasks"} for the `days` from `start` (a date)."""
+    select = ", ".join(SUMMARY_COLUMNS)
+    order = ", ".join(RANK_KEYS + ("id",))
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    views = {d: {"date": d, "count": 0, "minutes": 0, "due": 0, "tasks": []} for d in dates}
+    rows = conn.execute('SELECT day, kind, tasks, minutes FROM day_totals WHERE day >= ? AND day <= ?',
+                        (dates[0], dates[-1]))
+    for day, kind, count, minutes in rows:
+        view = views.get(day)
+        if view is None:
+            continue  # a malformed date string sorting inside the range
+        if kind == "planned":
+            view["count"], view["minutes"] = count, minutes
+        else:
+            view["due"] = count
+    for d in dates:
+        if views[d]["count"]:
+            views[d]["tasks"] = _task_cursor(conn).execute(f'''
+                SELECT {select} FROM tasks WHERE {OPEN_CONDITION} AND {PLAN_DAY} = ? ORDER BY {order} LIMIT ?
+            ''', (d, limit)).fetchall()
+    return [views[d] for d in dates]
+
+def _overdue(conn, today, limit):
+    """Open tasks whose deadline is before `today`: totals from day_totals, plus the first `limit`."""
+    count, minutes = conn.execute('''
+        SELECT COALESCE(SUM(tasks), 0), COALESCE(SUM(minutes), 0) FROM day_totals WHERE kind = 'due' AND day < ?
+    ''', (today,)).fetchone()
+    tasks = []
+    if count and limit:
+        # Deadline leads RANK_KEYS, so this is a range scan of idx_tasks_open_rank
+        tasks = _task_cursor(conn).execute(f'''
+            SELECT {", ".join(SUMMARY_COLUMNS)} FROM tasks
+            WHERE {OPEN_CONDITION} AND {RANK_KEYS[0]} < ? ORDER BY {", ".join(RANK_KEYS + ("id",))} LIMIT ?
+        ''', (today, limit)).fetchall()
+    return {"count": count, "minutes": minutes, "tasks": tasks}
+
+def _undated(conn, limit):
+    """Open tasks with neither a scheduled date nor a deadline: totals, plus the first `limit`."""
+    # PLAN_DAY IS NULL is a range of idx_tasks_open_plan_day
+    count, minutes = conn.execute(f'''
+        SELECT COUNT(*), COALESCE(SUM(duration_minutes), 0) FROM tasks
+        WHERE {OPEN_CONDITION} AND {PLAN_DAY} IS NULL
+    ''').fetchone()
+    tasks = []
+    if count and limit:
+        tasks = _task_cursor(conn).execute(f'''
+            SELECT {", ".join(SUMMARY_COLUMNS)} FROM tasks WHERE {OPEN_CONDITION} AND {PLAN_DAY} IS NULL
+            ORDER BY {", ".join(RANK_KEYS + ("id",))} LIMIT ?
+        ''', (limit,)).fetchall()
+    return {"count": count, "minutes": minutes, "tasks": tasks}
+
+@db_operation
+def get_day_view(day=None, limit=50, overdue_limit=5):
+    """
+    Today's panel: the open tasks planned for `day` (a date, default today;
+    scheduled that day, or due that day if unscheduled) with their count
+    and minutes, how many are due that day, and the overdue tasks.
+    Totals come from the day_totals table kept by triggers; lists hold at
+    most `limit` tasks in rank order.
+    """
+    day = day or date.today()
+    with db_session() as conn:
+        revision = conn.execute('SELECT revision FROM sync_state WHERE id = 0').fetchone()[0]
+        view = _day_views(conn, day, 1, limit)[0]
+        view["overdue"] = _overdue(conn, day.isoformat(), overdue_limit)
+    view["revision"] = revision
+    return view
+
+@db_operation
+def get_week_view(start, days=7, limit=20, today=None, undated_limit=20):
+    """
+    The planner's week: get_day_view's per-day data for the `days` from
+    `start` (at most `limit` tasks listed per day), total minutes, the
+    overdue totals as of `today`, and the open tasks with no date at all
+    (the first `undated_limit`) for the planner to fit into free time.
+    """
+    today = today or date.today()
+    with db_session() as conn:
+        revision = conn.execute('SELECT revision FROM sync_state WHERE id = 0').fetchone()[0]
+        day_views = _day_views(conn, start, days, limit)
+        overdue = _overdue(conn, today.isoformat(), 0)
+        undated = _undated(conn, undated_limit)
+    return {
+        "start": start.isoformat(),
+        "end": (start + timedelta(days=days)).isoformat(),
+        "revision": revision,
+        "minutes": sum(d["minutes"] for d in day_views),
+        "overdue": {"count": overdue["count"], "minutes": overdue["minutes"]},
+        "undated": undated,
+        "days": day_views,
+    }
+
+# Fields the dashboard sync is allowed to overwrite on an existing task
+SYNC_FIELDS = ("task_name", "duration_minutes", "priority", "deadline", "scheduled_date")
+# Imports (storage migration) carry the task's state as well
+IMPORT_FIELDS = SYNC_FIELDS + ("status", "created_at")
+# What update_task may change
+UPDATE_FIELDS = SYNC_FIELDS + ("status",)
+
+def _upsert_sql(update_fields):
+    fields = IMPORT_FIELDS
+    return f'''
+    INSERT INTO tasks (id, revision, {", ".join(fields)})
+    VALUES (?, ?, {", ".join("?" for _ in fields)})
+    ON CONFLICT(id) DO UPDATE SET revision = excluded.revision,
+        {", ".join(f"{f} = excluded.{f}" for f in update_fields)}
+'''
+
+UPSERT_SQL = _upsert_sql(SYNC_FIELDS)
+IMPORT_SQL = _upsert_sql(IMPORT_FIELDS)
+
+@db_operation
+def get_tasks_by_ids(task_ids, chunk_size=500):
+    """Tasks for the ids that exist, in no particular order."""
+    tasks = []
+    with db_session() as conn:
+        cursor = _task_cursor(conn)
+        for i in range(0, len(task_ids), chunk_size):
+            chunk = list(task_ids[i:i + chunk_size])
+            placeholders = ", ".join("?" for _ in chunk)
+            tasks.extend(cursor.execute(f'SELECT * FROM tasks WHERE id IN ({placeholders})', chunk).fetchall())
+    return tasks
+
+def _existing_ids(conn, ids, chunk_size=500):
+    found = set()
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i:i + chunk_size]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(f'SELECT id FROM tasks WHERE id IN ({placeholders})', chunk)
+        found.update(r[0] for r in rows)
+    return found
+
+@db_operation
+def upsert_tasks(tasks):
+    """
+    Inserts or updates a list of task dicts in a single transaction.
+    Existing tasks keep their status and created_at.
+
+    Returns one result per input row: {"id", "status"} where status is
+    "created", "updated" or "error" (with an "error" message).
+    """
+    return _write_tasks(tasks, UPSERT_SQL, with_state=False)
+
+@db_operation
+def import_tasks(tasks):
+    """
+    Like upsert_tasks, but stores every field including status and
+    created_at, overwriting them on existing ids. For migrations.
+    """
+    return _write_tasks(tasks, IMPORT_SQL, with_state=True)
+
+def _write_tasks(tasks, sql, with_state):
+    results = []
+    rows = []
+    now = datetime.utcnow().isoformat()
+
+    for t in tasks:
+        if not isinstance(t, dict) or not t.get("task_name"):
+            results.append({"id": t.get("id") if isinstance(t, dict) else None,
+                            "status": "error", "error": "task_name is required"})
+            continue
+        task_id = t.get("id") or str(uuid.uuid4())
+        results.append({"id": task_id, "status": None})
+        rows.append([task_id, None] + [t.get(f) for f in SYNC_FIELDS]
+                    + [(with_state and t.get("status")) or "pending",
+                       t.get("created_at") or now])
+
+    with db_session() as conn:
+        existing = _existing_ids(conn, [r[0] for r in rows])
+        if rows:
+            revision = _bump_revision(conn)
+            for r in rows:
+                r[1] = revision
+            conn.executemany(sql, rows)
+            conn.executemany('DELETE FROM deleted_tasks WHERE id = ?', [(r[0],) for r in rows])
+            _notify("upsert", [r[0] for r in rows], revision)
+
+    for r in results:
+        if r["status"] is None:
+            r["status"] = "updated" if r["id"] in existing else "created"
+            existing.add(r["id"])
+    return results
+
+@db_operation
+def apply_changes(upserts=(), deletes=()):
+    """Applies a client delta (changed tasks plus deleted ids) as one transaction."""
+    with db_session():
+        results = upsert_tasks(list(upserts))
+        deleted = delete_tasks(list(deletes))
+        revision = get_revision()
+    return {"revision": revision, "results": results, "deleted": deleted}
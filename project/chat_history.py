@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+CHAT_MAX_SESSIONS = int(os.environ.get("CHAT_MAX_SESSIONS", "10000"))
+CHAT_MAX_MESSAGES = int(os.environ.get("CHAT_MAX_MESSAGES", "40"))
+# Sessions idle for longer than this are dropped
+CHAT_SESSION_TTL = float(os.environ.get("CHAT_SESSION_TTL", str(24 * 3600)))
+CHAT_HISTORY_PATH = os.environ.get("CHAT_HISTORY_PATH")  # optional SQLite file
+# Longer messages are cut when stored; the prompt never needs more of them
+CHAT_MAX_MESSAGE_CHARS = 4000
+# Seconds to wait for another process's write lock on the SQLite file
+CHAT_DB_TIMEOUT = 5.0
+# With SQLite, expired messages are deleted once every this many appends
+CHAT_PRUNE_EVERY = 1000
+
+class ChatHistoryStore:
+    """
+    Per-session chat history, keeping each session's last `max_messages`
+    (role, text) pairs; sessions expire after `ttl` seconds idle.
+
+    In memory, each session is a ring buffer and sessions live in an LRU
+    capped at `max_sessions`, so memory is bounded however many sessions
+    come and go. With `path`, the history lives in SQLite instead (trimmed
+    to the same bound), so every worker process serving a session sees
+    the same messages.
+    """
+
+    def __init__(self, max_sessions=CHAT_MAX_SESSIONS, max_messages=CHAT_MAX_MESSAGES,
+                 ttl=CHAT_SESSION_TTL, path=None):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.evictions = 0
+        self._appends = 0
+        self._sessions = OrderedDict()  # session_id -> (last_used, deque of (role, text))
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=CHAT_DB_TIMEOUT)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS idx_chat_messages_created ON chat_messages (created_at)')
+            self._db.commit()
+
+    def _session(self, session_id, now):
+        """The session's buffer, creating it if needed; caller holds the lock."""
+        entry = self._sessions.get(session_id)
+        if entry and now - entry[0] <= self.ttl:
+            messages = entry[1]
+        else:
+            messages = deque(maxlen=self.max_messages)
+        self._sessions[session_id] = (now, messages)
+        self._sessions.move_to_end(session_id)
+        self._evict(now)
+        return messages
+
+    def _evict(self, now):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        # The LRU end holds the longest-idle sessions
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def append(self, session_id, role, text):
+        text = (text or "")[:CHAT_MAX_MESSAGE_CHARS]
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                self._session(session_id, now).append((role, text))
+                return
+            self._db.execute('''
+                INSERT INTO chat_messages (session_id, seq, role, text, created_at)
+                VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM chat_messages WHERE session_id = ?), ?, ?, ?)
+            ''', (session_id, session_id, role, text, now))
+            # Keep the table bounded like the buffers
+            self._db.execute('''
+                DELETE FROM chat_messages WHERE session_id = ? AND seq <= (
+                    SELECT MAX(seq) FROM chat_messages WHERE session_id = ?) - ?
+            ''', (session_id, session_id, self.max_messages))
+            self._appends += 1
+            if self._appends % CHAT_PRUNE_EVERY == 0:
+                self._db.execute('DELETE FROM chat_messages WHERE created_at <= ?', (now - self.ttl,))
+            self._db.commit()
+
+    def get(self, session_id):
+        """The session's messages, oldest first, as [{"role", "text"}]."""
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                messages = self._session(session_id, now)
+            else:
+                messages = reversed(self._db.execute('''
+                    SELECT role, text FROM chat_messages WHERE session_id = ? AND created_at > ?
+                    ORDER BY seq DESC LIMIT ?
+                ''', (session_id, now - self.ttl, self.max_messages)).fetchall())
+            return [{"role": role, "text": text} for role, text in messages]
+
+    def clear(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            if self._db is not None:
+                self._db.execute('DELETE FROM chat_messages WHERE session_id = ?', (session_id,))
+                self._db.commit()
+
+    def prune(self):
+        """Drops expired sessions from memory and expired messages from SQLite."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if self._db is not None:
+                self._db.execute('DELETE FROM chat_messages WHERE created_at <= ?', (now - self.ttl,))
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "evictions": self.evictions,
+                    "messages": sum(len(m) for _, m in self._sessions.values())}
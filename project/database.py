@@ -1,20 +1,183 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from project.models import Task, TASK_FIELDS
+from project import metrics
 
-DB_PATH = Path("project/data/tasks.db")
+DB_PATH = Path(os.environ.get("TASKS_DB_PATH", "project/data/tasks.db"))
+
+# Connection tuning (override via environment)
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE = int(os.environ.get("DB_CACHE_SIZE", "-16000"))  # negative = KiB
+DB_MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+# How long init_db waits for another process's migration to finish
+INIT_BUSY_TIMEOUT_MS = 120000
+# sqlite3 keeps this many prepared statements per connection, keyed on SQL text
+DB_STATEMENT_CACHE = 256
+
+# The prioritizer's ordering (deadline, then priority, then shortest first)
+# as SQL sort keys. Kept NULL-free so keyset pagination can compare row
+# values, and indexed verbatim in init_db so ORDER BY can walk the index.
+RANK_KEYS = (
+    "COALESCE(deadline, '9999-12-31')",
+    "CASE lower(priority) WHEN 'high' THEN 0 WHEN 'low' THEN 2 ELSE 1 END",
+    "COALESCE(duration_minutes, 999999)",
+)
+
+# Tasks still to do, and the day a task is planned for: its scheduled
+# date, else its deadline. Shared with task_manager's queries so SQLite
+# matches them to the partial index and triggers built on them in init_db.
+OPEN_CONDITION = "COALESCE(status, 'pending') != 'done'"
+PLAN_DAY = "COALESCE(scheduled_date, deadline)"
+
+# Full-text index over task names (see init_db); False when this SQLite
+# build lacks FTS5, and task_manager.search_tasks falls back to LIKE
+FTS_AVAILABLE = True
+
+_local = threading.local()
+
+class CountingCursor(sqlite3.Cursor):
+    """Cursor counting the queries it runs, for per-function query counts in metrics."""
+
+    def execute(self, sql, parameters=()):
+        metrics.count_query()
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        metrics.count_query()
+        return super().executemany(sql, seq_of_parameters)
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    # The C implementations of these make a plain sqlite3.Cursor, not self.cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
 
 def get_db_connection():
     # Ensure data directory exists
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, cached_statements=DB_STATEMENT_CACHE,
+                           factory=CountingConnection if metrics.METRICS_ENABLED else sqlite3.Connection)
     conn.row_factory = sqlite3.Row
+    # First, so that switching to WAL also waits out other processes' locks
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size={DB_CACHE_SIZE}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    return conn
+
+def _thread_connection():
+    """Returns this thread's long-lived connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = get_db_connection()
+        _local.conn = conn
+        _local.depth = 0
     return conn
 
+@contextmanager
+def db_session():
+    """
+    Yields the calling thread's pooled connection wrapped in a transaction.
+
+    Sessions nest: only the outermost one commits (or rolls back on error),
+    so a bulk operation can group many task_manager calls into one commit.
+    """
+    conn = _thread_connection()
+    _local.depth += 1
+    try:
+        yield conn
+        if _local.depth == 1:
+            conn.commit()
+    except BaseException:
+        if _local.depth == 1:
+            conn.rollback()
+            _local.after_commit = []
+        raise
+    finally:
+        _local.depth -= 1
+
+    if _local.depth == 0:
+        callbacks = getattr(_local, "after_commit", None)
+        _local.after_commit = []
+        for callback in callbacks or ():
+            callback()
+
+def after_commit(callback):
+    """
+    Runs `callback()` once the enclosing outermost db_session has committed,
+    or immediately outside a session. Dropped if the transaction rolls back.
+    """
+    if getattr(_local, "depth", 0) == 0:
+        callback()
+        return
+    if not hasattr(_local, "after_commit"):
+        _local.after_commit = []
+    _local.after_commit.append(callback)
+
+# (cursor.description, plan) of the last query seen by task_row_factory; a
+# query's description object is the same for all of its rows
+_last_layout = (None, None)
+_field_sets = {}
+
+def _task_layout(description):
+    names = tuple(d[0] for d in description)
+    if names[:len(TASK_FIELDS)] == TASK_FIELDS:
+        return None  # SELECT *: positional fast path
+    fields = _field_sets.setdefault(names, tuple(f for f in TASK_FIELDS if f in names))
+    return fields, tuple(names.index(f) for f in fields)
+
+def task_row_factory(cursor, row):
+    """
+    Row factory producing Task objects. Columns that aren't task fields
+    (e.g. computed sort keys) are ignored; a subset of columns yields a
+    Task that only exposes those fields.
+    """
+    global _last_layout
+    description = cursor.description
+    seen, plan = _last_layout
+    if seen is not description:
+        plan = _task_layout(description)
+        _last_layout = (description, plan)
+    if plan is None:
+        return Task(*row[:9])
+    fields, positions = plan
+    return Task(**{f: row[i] for f, i in zip(fields, positions)}, _fields=fields)
+
+def close_db_connection():
+    """Closes this thread's pooled connection (e.g. at worker shutdown)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    """
+    Creates and migrates the schema. Runs in one IMMEDIATE transaction, so
+    processes starting together (e.g. gunicorn workers) take turns and
+    each re-reads the schema only once it holds the write lock; only the
+    first one migrates.
+    """
+    conn = _thread_connection()
+    # Another process may be filling a large index; wait longer than usual
+    conn.execute(f"PRAGMA busy_timeout={max(DB_BUSY_TIMEOUT_MS, INIT_BUSY_TIMEOUT_MS)}")
+    try:
+        with db_session() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            _init_schema(conn.cursor())
+    finally:
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+
+def _init_schema(cursor):
     # Create tasks table if not exists
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tasks (
@@ -25,19 +188,175 @@ def init_db():
             deadline TEXT,
             created_at TEXT,
             status TEXT DEFAULT 'pending',
-            scheduled_date TEXT
+            scheduled_date TEXT,
+            revision INTEGER NOT NULL DEFAULT 0
         )
     ''')
-    
-    # Check if scheduled_date column exists (migration for existing db)
+
+    # Add columns missing from older databases
     cursor.execute("PRAGMA table_info(tasks)")
     columns = [info[1] for info in cursor.fetchall()]
     if 'scheduled_date' not in columns:
         print("Migrating DB: Adding scheduled_date column...")
         cursor.execute('ALTER TABLE tasks ADD COLUMN scheduled_date TEXT')
-    
-    conn.commit()
-    conn.close()
+    if 'revision' not in columns:
+        print("Migrating DB: Adding revision column...")
+        cursor.execute('ALTER TABLE tasks ADD COLUMN revision INTEGER NOT NULL DEFAULT 0')
+
+    # Change feed: a global revision counter bumped by every write, plus
+    # tombstones so clients syncing with ?since=<rev> learn about deletes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            revision INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO sync_state (id, revision) VALUES (0, 0)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS deleted_tasks (
+            id TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_revision ON tasks (revision)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_deleted_tasks_revision ON deleted_tasks (revision)')
+
+    # Indexes backing task_manager.query_tasks filters and orderings
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status_deadline ON tasks (status, deadline)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_scheduled_date ON tasks (scheduled_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_tasks_rank ON tasks ({", ".join(RANK_KEYS)}, id)')
+
+    _init_search_index(cursor)
+    _init_day_totals(cursor)
+
+def _day_totals_change(row, sign):
+    """Trigger statements adding (sign "+") or removing ("-") task `row` ("new" / "old") from day_totals."""
+    statements = []
+    # PLAN_DAY, deadline and OPEN_CONDITION on the trigger's row
+    for kind, day in (("planned", f"COALESCE({row}.scheduled_date, {row}.deadline)"), ("due", f"{row}.deadline")):
+        statements.append(f'''
+            INSERT INTO day_totals (day, kind, tasks, minutes)
+            SELECT {day}, '{kind}', {sign}1, {sign}COALESCE({row}.duration_minutes, 0)
+            WHERE {day} IS NOT NULL AND COALESCE({row}.status, 'pending') != 'done'
+            ON CONFLICT (day, kind) DO UPDATE SET tasks = tasks + excluded.tasks, minutes = minutes + excluded.minutes;
+        ''')
+    if sign == "-":
+        statements.append(f'''
+            DELETE FROM day_totals WHERE tasks = 0 AND day IN ({row}.scheduled_date, {row}.deadline);
+        ''')
+    return "".join(statements)
+
+def _init_day_totals(cursor):
+    """
+    Open tasks and their minutes per day, kept up to date by triggers so
+    the today / week views read a handful of rows however long the task
+    history gets. "planned" rows count tasks by PLAN_DAY, "due" rows by
+    deadline (for overdue counts).
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'day_totals'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS day_totals (
+            day TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            tasks INTEGER NOT NULL,
+            minutes INTEGER NOT NULL,
+            PRIMARY KEY (day, kind)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS day_totals_insert AFTER INSERT ON tasks BEGIN
+            {_day_totals_change("new", "+")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS day_totals_delete AFTER DELETE ON tasks BEGIN
+            {_day_totals_change("old", "-")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS day_totals_update
+        AFTER UPDATE OF deadline, scheduled_date, duration_minutes, status ON tasks BEGIN
+            {_day_totals_change("old", "-")}
+            {_day_totals_change("new", "+")}
+        END
+    ''')
+    # The open tasks of a day in rank order, and overdue ones, without
+    # walking past done tasks
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_tasks_open_plan_day ON tasks ({PLAN_DAY}, {", ".join(RANK_KEYS)}, id)
+        WHERE {OPEN_CONDITION}
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_tasks_open_rank ON tasks ({", ".join(RANK_KEYS)}, id)
+        WHERE {OPEN_CONDITION}
+    ''')
+    if not exists:
+        _fill_day_totals(cursor)
+
+def _fill_day_totals(cursor):
+    for kind, day in (("planned", PLAN_DAY), ("due", "deadline")):
+        cursor.execute(f'''
+            INSERT INTO day_totals (day, kind, tasks, minutes)
+            SELECT {day}, '{kind}', COUNT(*), COALESCE(SUM(duration_minutes), 0) FROM tasks
+            WHERE {day} IS NOT NULL AND {OPEN_CONDITION} GROUP BY 1
+        ''')
+
+def rebuild_day_totals():
+    """Recomputes day_totals from the tasks table."""
+    with db_session() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM day_totals')
+        _fill_day_totals(cursor)
+
+def _init_search_index(cursor):
+    """
+    FTS5 index of task names, keyed on the tasks rowid and kept in sync by
+    triggers. It stores its own copy of the names rather than reading them
+    from `tasks`, so a stale row can always be deleted by rowid. VACUUM may
+    renumber the rowids of `tasks`; run rebuild_search_index() after one.
+    """
+    global FTS_AVAILABLE
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'").fetchone()
+    if not exists:
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE tasks_fts USING fts5(
+                    task_name, tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            print("SQLite has no FTS5; task search will scan the table")
+            FTS_AVAILABLE = False
+            return
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, task_name) VALUES (new.rowid, new.task_name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            DELETE FROM tasks_fts WHERE rowid = old.rowid;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF task_name ON tasks BEGIN
+            UPDATE tasks_fts SET task_name = new.task_name WHERE rowid = old.rowid;
+        END
+    ''')
+    if not exists:
+        # Existing databases: index the tasks already there
+        cursor.execute('INSERT INTO tasks_fts (rowid, task_name) SELECT rowid, task_name FROM tasks')
+
+def rebuild_search_index():
+    """Re-indexes every task name from scratch."""
+    if not FTS_AVAILABLE:
+        return
+    with db_session() as conn:
+        conn.execute('DELETE FROM tasks_fts')
+        conn.execute('INSERT INTO tasks_fts (rowid, task_name) SELECT rowid, task_name FROM tasks')
 
 # Initialize on module load
 init_db()
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from project import metrics
+from project.database import DB_PATH
+
+# Background jobs for work that shouldn't hold up a request or the REPL
+# (LLM calls, rescheduling). Jobs live in SQLite, so every worker process
+# sees them and their results; each process runs a small pool of threads
+# taking them by priority. An identical job still waiting to run is
+# merged with the new one instead of queued twice.
+
+JOBS_DB_PATH = Path(os.environ.get("JOBS_DB_PATH") or DB_PATH.with_name("jobs.db"))
+# Worker threads per process started by start(); 0 leaves jobs to other processes
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Idle workers look for jobs queued by other processes this often (seconds)
+JOB_POLL_INTERVAL = 1.0
+# A job running for longer than this is assumed lost with its process and re-run
+JOB_LEASE = float(os.environ.get("JOB_LEASE", "600"))
+JOB_MAX_ATTEMPTS = 3
+# Finished jobs are kept this long for polling, then deleted
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", str(24 * 3600)))
+JOB_PRUNE_EVERY = 500  # jobs run between clean-ups
+JOB_DB_TIMEOUT = 5.0
+
+PRIORITY_INTERACTIVE = 10  # someone is waiting on the result
+PRIORITY_DEFAULT = 0
+PRIORITY_BACKGROUND = -10  # precomputed results
+
+JOB_SECONDS = metrics.Histogram("job_duration_seconds", "Background job run time", ("kind", "status"))
+
+_handlers = {}  # kind -> (function, local)
+
+def job_handler(kind, local=False):
+    """
+    Registers `fn(**args)` to run jobs of `kind`; its return value (JSON
+    serializable) becomes the job's result. Jobs of a `local` kind use
+    in-process state, so only the process that queued them runs them.
+    """
+    def register(fn):
+        _handlers[kind] = (fn, local)
+        return fn
+    return register
+
+def job_key(kind, args=None, owner=None):
+    raw = "\x1f".join([kind, json.dumps(args or {}, sort_keys=True, separators=(",", ":")), str(owner or "")])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _job_dict(row):
+    job = dict(row)
+    for field in ("args", "result"):
+        job[field] = json.loads(job[field]) if job[field] is not None else None
+    del job["dedupe_key"]
+    return job
+
+class JobQueue:
+    """
+    SQLite-backed priority queue with a pool of worker threads. Jobs go
+    queued -> running -> done / failed; higher priority runs first, then
+    the earliest due. Polling callers use get() or wait(); latest() gives
+    the newest finished result of a kind, for precomputed reads.
+    """
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = Path(path)
+        self.pid = os.getpid()
+        self.running = False
+        self.counters = {"enqueued": 0, "deduped": 0, "done": 0, "failed": 0, "requeued": 0}
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._runs = 0
+        # dedupe key -> (id, priority, run_after, kind) of jobs this process queued
+        # that are certain to still be waiting, to skip the database then.
+        # Entries go when the job is claimed or finishes here, or once a
+        # job other processes may run is due
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; writes take the lock up front with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=JOB_DB_TIMEOUT, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                args TEXT NOT NULL,
+                dedupe_key TEXT NOT NULL,
+                owner INTEGER,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after REAL NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, run_after)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status, finished_at)')
+
+    def _write(self, fn):
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def enqueue(self, kind, args=None, priority=PRIORITY_DEFAULT, delay=0.0, dedupe=True):
+        """
+        Queues a job and returns its id. With `dedupe`, an identical job
+        (same kind and args) that hasn't started yet is reused instead: it
+        keeps the higher priority and the earlier start time.
+        """
+        if kind not in _handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        args = args or {}
+        owner = self.pid if _handlers[kind][1] else None
+        key = job_key(kind, args, owner)
+        now = time.time()
+        run_after = now + delay
+        if dedupe:
+            with self._pending_lock:
+                pending = self._pending.get(key)
+                if pending and owner is None and now >= pending[2]:
+                    # Due, so another process may have taken it already
+                    del self._pending[key]
+                    pending = None
+            # Local jobs only run here, and nothing runs before its run_after
+            if pending and pending[1] >= priority and pending[2] <= run_after:
+                self.counters["deduped"] += 1
+                return pending[0]
+
+        def write(conn):
+            job_id = None
+            if dedupe:
+                row = conn.execute('''
+                    SELECT id, priority, run_after FROM jobs WHERE dedupe_key = ? AND status = 'queued' LIMIT 1
+                ''', (key,)).fetchone()
+                if row:
+                    job_id = row["id"]
+                    merged = (max(row["priority"], priority), min(row["run_after"], run_after))
+                    conn.execute("UPDATE jobs SET priority = ?, run_after = ? WHERE id = ?", merged + (job_id,))
+                    self.counters["deduped"] += 1
+            if job_id is None:
+                job_id = uuid.uuid4().hex
+                merged = (priority, run_after)
+                conn.execute('''
+                    INSERT INTO jobs (id, kind, args, dedupe_key, owner, priority, status, run_after, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+                ''', (job_id, kind, json.dumps(args), key, owner, priority, run_after, now))
+                self.counters["enqueued"] += 1
+            if dedupe:
+                # Before the commit, so a worker can't claim the job first
+                with self._pending_lock:
+                    self._pending[key] = (job_id,) + merged + (kind,)
+            return job_id
+
+        job_id = self._write(write)
+        with self._cond:
+            self._cond.notify()
+        return job_id
+
+    def get(self, job_id):
+        """The job as a dict (args and result decoded), or None."""
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_dict(row) if row else None
+
+    def wait(self, job_id, timeout=None):
+        """get(), after waiting up to `timeout` seconds for the job to finish."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            remaining = JOB_POLL_INTERVAL if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            with self._cond:
+                self._cond.wait(min(remaining, JOB_POLL_INTERVAL))
+
+    def latest(self, kind, args=None):
+        """The most recently finished successful job of `kind` with `args`, or None."""
+        owner = self.pid if kind in _handlers and _handlers[kind][1] else None
+        row = self._db().execute('''
+            SELECT * FROM jobs WHERE dedupe_key = ? AND status = 'done' ORDER BY finished_at DESC LIMIT 1
+        ''', (job_key(kind, args, owner),)).fetchone()
+        return _job_dict(row) if row else None
+
+    def claim(self):
+        """Marks the next due job this process can run as running and returns it, or None."""
+        kinds = list(_handlers)
+        if not kinds:
+            return None
+        now = time.time()
+
+        def write(conn):
+            row = conn.execute(f'''
+                SELECT * FROM jobs
+                WHERE status = 'queued' AND run_after <= ? AND (owner IS NULL OR owner = ?)
+                  AND kind IN ({",".join("?" * len(kinds))})
+                ORDER BY priority DESC, run_after LIMIT 1
+            ''', [now, self.pid] + kinds).fetchone()
+            if row is None:
+                return None
+            with self._pending_lock:
+                self._pending.pop(row["dedupe_key"], None)
+            conn.execute("UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                         (now, row["id"]))
+            return _job_dict(row)
+
+        return self._write(write)
+
+    def run_job(self, job):
+        fn, _ = _handlers[job["kind"]]
+        with metrics.span("job." + job["kind"], JOB_SECONDS, (job["kind"], "done"), job_id=job["id"]) as s:
+            try:
+                result, error = json.dumps(fn(**job["args"]), default=str), None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+                s.labels = (job["kind"], "failed")
+                print(f"Error in job {job['kind']} {job['id']}: {error}")
+        status = "done" if error is None else "failed"
+        self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, result, error, time.time(), job["id"])))
+        with self._pending_lock:
+            for key in [k for k, pending in self._pending.items() if pending[0] == job["id"]]:
+                del self._pending[key]
+        self.counters[status] += 1
+        with self._cond:
+            self._cond.notify_all()  # wake wait() callers
+
+    def run_pending(self):
+        """Runs due jobs on the calling thread until none are left; returns how many ran."""
+        n = 0
+        while True:
+            job = self.claim()
+            if job is None:
+                return n
+            self.run_job(job)
+            n += 1
+
+    def prune(self):
+        """Re-queues jobs whose worker was lost and deletes expired ones."""
+        now = time.time()
+
+        def write(conn):
+            requeued = conn.execute('''
+                UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started_at < ? AND attempts < ?
+            ''', (now - JOB_LEASE, JOB_MAX_ATTEMPTS)).rowcount
+            failed = conn.execute('''
+                UPDATE jobs SET status = 'failed', error = 'worker lost', finished_at = ?
+                WHERE status = 'running' AND started_at < ?
+            ''', (now, now - JOB_LEASE)).rowcount
+            # Finished jobs, and local jobs whose process went away before running them
+            conn.execute('''
+                DELETE FROM jobs WHERE (status IN ('done', 'failed') AND finished_at < ?)
+                    OR (status = 'queued' AND owner IS NOT NULL AND created_at < ?)
+            ''', (now - JOB_RETENTION, now - JOB_RETENTION))
+            return requeued, failed
+
+        requeued, failed = self._write(write)
+        self.counters["requeued"] += requeued
+        self.counters["failed"] += failed
+        with self._pending_lock:
+            # Jobs other processes could have run meanwhile
+            local = {kind for kind, (_, is_local) in _handlers.items() if is_local}
+            for key in [k for k, pending in self._pending.items()
+                        if pending[2] <= now and pending[3] not in local]:
+                del self._pending[key]
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                job = self.claim()
+                if job is None:
+                    with self._cond:
+                        self._cond.wait(JOB_POLL_INTERVAL)
+                    continue
+                self.run_job(job)
+                self._runs += 1
+                if self._runs % JOB_PRUNE_EVERY == 0:
+                    self.prune()
+            except sqlite3.Error as e:
+                print(f"Error in job worker: {e}")
+                self._stop.wait(JOB_POLL_INTERVAL)
+
+    def start(self, workers=JOB_WORKERS):
+        """Starts the worker threads (once per process)."""
+        with self._start_lock:
+            if self.running or workers <= 0:
+                return
+            self.pid = os.getpid()
+            self.prune()
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                             for i in range(workers)]
+            for thread in self._threads:
+                thread.start()
+            self.running = True
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.running = False
+
+    def stats(self):
+        rows = self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(self.counters, workers=len(self._threads), **{f"{status}_now": n for status, n in rows})
+
+JOBS = JobQueue()
+
+@metrics.add_collector
+def _collect_stats():
+    lines = ["# HELP jobs_total Background jobs by outcome", "# TYPE jobs_total counter"]
+    for name in ("enqueued", "deduped", "done", "failed", "requeued"):
+        lines.append(f'jobs_total{{event="{name}"}} {JOBS.counters[name]}')
+    return lines
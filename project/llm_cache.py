@@ -0,0 +1,155 @@
+import hashlib
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so prompts differing only in layout share a key."""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+def make_key(url, prompt, temperature, max_tokens):
+    raw = "\x1f".join([url or "", normalize_prompt(prompt), repr(float(temperature)), str(max_tokens)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# The disk tier is trimmed to max_disk_entries after this many writes
+PRUNE_EVERY = 100
+
+# Markers on the writer queue
+_CLEAR = object()
+_FLUSH = object()
+
+class LLMCache:
+    """
+    LRU cache of LLM responses with a TTL, optionally backed by SQLite so
+    entries survive restarts. The in-memory LRU is always consulted first.
+
+    Disk writes go through a writer thread so callers on the event loop
+    never wait on a commit. The file keeps at most `max_disk_entries`
+    rows: expired ones are pruned on open and as writes come in, then the
+    soonest to expire go first.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0, path=None, max_disk_entries=10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache (expires_at)')
+            self._prune(self._db)
+            self._db.commit()
+            self._writes = queue.Queue()
+            threading.Thread(target=self._writer, args=(path,), name="llm-cache-writer", daemon=True).start()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?',
+                    (key, now)).fetchone()
+                if row:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self._writes is not None:
+            self._writes.put((key, value, expires_at))
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _prune(self, db, cap=True):
+        db.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (time.time(),))
+        if not cap:
+            return
+        db.execute('''
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_disk_entries,))
+
+    def _writer(self, path):
+        db = sqlite3.connect(path)
+        unpruned = 0  # rows written since the row count was last capped
+        while True:
+            # Commit whatever queued up meanwhile in one transaction
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for item in batch:
+                    if item is _CLEAR:
+                        db.execute('DELETE FROM llm_cache')
+                    elif item is not _FLUSH:
+                        db.execute('INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                                   item)
+                unpruned += len(batch)
+                # Capping walks the index, so do it once per PRUNE_EVERY writes
+                self._prune(db, cap=unpruned >= PRUNE_EVERY)
+                if unpruned >= PRUNE_EVERY:
+                    unpruned = 0
+                db.commit()
+            except sqlite3.Error as e:
+                db.rollback()
+                print(f"Error writing LLM cache: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    def flush(self):
+        """Waits until every queued disk write is committed."""
+        if self._writes is not None:
+            self._writes.put(_FLUSH)
+            self._writes.join()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._writes is not None:
+            self._writes.put(_CLEAR)
+            self._writes.join()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,236 @@
+import asyncio
+import ssl
+import time
+from urllib.parse import urlsplit
+
+# Minimal asyncio HTTP/1.1 client with a keep-alive connection pool.
+# Only what the LLM wrapper needs: POST a body, read a Content-Length,
+# chunked or read-until-close response, and reuse the socket afterwards.
+
+class HTTPError(Exception):
+    pass
+
+class _StaleConnection(Exception):
+    """A pooled connection was closed by the server before responding."""
+
+class HTTPResponse:
+    def __init__(self, status, reason, headers, body=b""):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def text(self):
+        return self.body.decode("utf-8", "replace")
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.reused = False
+
+    def usable(self, idle_timeout):
+        return (not self.writer.is_closing()
+                and not self.reader.at_eof()
+                and time.monotonic() - self.last_used < idle_timeout)
+
+    def close(self):
+        self.writer.close()
+
+class ConnectionPool:
+    """
+    Keeps idle connections per (scheme, host, port) for reuse.
+
+    Must only be used from the event loop it was created on.
+    """
+
+    def __init__(self, max_idle_per_host=10, idle_timeout=30.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+        self.opened = 0
+
+    async def _acquire(self, key):
+        idle = self._idle.get(key, [])
+        while idle:
+            conn = idle.pop()
+            if conn.usable(self.idle_timeout):
+                conn.reused = True
+                return conn
+            conn.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self._ssl if scheme == "https" else None)
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def _release(self, key, conn, keep_alive):
+        idle = self._idle.setdefault(key, [])
+        if keep_alive and len(idle) < self.max_idle_per_host and not conn.writer.is_closing():
+            conn.last_used = time.monotonic()
+            idle.append(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        for idle in self._idle.values():
+            for conn in idle:
+                conn.close()
+        self._idle.clear()
+
+    async def request(self, method, url, headers=None, body=b""):
+        """Sends one request and reads the whole response body."""
+        async with self.stream(method, url, headers, body) as resp:
+            resp.body = b"".join([chunk async for chunk in resp.iter_body()])
+        return resp
+
+    def stream(self, method, url, headers=None, body=b""):
+        """
+        Async context manager yielding a response whose body is read lazily
+        via `iter_body()`. The connection goes back to the pool on exit if
+        the body was fully consumed.
+        """
+        return _StreamContext(self, method, url, headers or {}, body)
+
+class _StreamContext:
+    def __init__(self, pool, method, url, headers, body):
+        self.pool = pool
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.conn = None
+        self.key = None
+        self.resp = None
+
+    async def __aenter__(self):
+        parts = urlsplit(self.url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        self.key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        # A reused connection may have been dropped by the server while idle;
+        # retry once on a fresh one in that case.
+        for _ in range(2):
+            self.conn = await self.pool._acquire(self.key)
+            try:
+                self.resp = await _send(self.conn, self.method, parts.hostname, path, self.headers, self.body)
+                return self.resp
+            except _StaleConnection:
+                self.conn.close()
+                continue
+            except BaseException:
+                self.conn.close()
+                raise
+        raise HTTPError("Connection closed before response")
+
+    async def __aexit__(self, exc_type, exc, tb):
+        done = exc_type is None and self.resp._consumed
+        self.pool._release(self.key, self.conn, done and self.resp._keep_alive)
+        return False
+
+async def _readline(reader, what):
+    # readline() raises ValueError for a line over the stream limit; like
+    # any other malformed response that is an HTTPError to the caller
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError) as e:
+        raise HTTPError(f"Malformed {what}: {e}") from None
+
+async def _send(conn, method, host, path, headers, body):
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}",
+             f"Content-Length: {len(body)}", "Connection: keep-alive"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    try:
+        conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await conn.writer.drain()
+        status_line = await _readline(conn.reader, "status line")
+    except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+        # A reused socket the server dropped may fail on write or read
+        # instead of returning EOF
+        if conn.reused:
+            raise _StaleConnection()
+        raise
+    if not status_line:
+        if conn.reused:
+            raise _StaleConnection()
+        raise HTTPError("Connection closed before response")
+    try:
+        version, status, reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status = int(status)
+    except ValueError:
+        # Status line without a reason phrase
+        try:
+            version, status = status_line.decode("latin-1").split()[:2]
+            status, reason = int(status), ""
+        except ValueError:
+            raise HTTPError(f"Malformed status line: {status_line[:100]!r}") from None
+
+    resp_headers = {}
+    while True:
+        line = await _readline(conn.reader, "response headers")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        resp_headers[name.strip().lower()] = value.strip()
+
+    resp = HTTPResponse(status, reason, resp_headers)
+    resp._keep_alive = (version == "HTTP/1.1"
+                        and resp_headers.get("connection", "").lower() != "close")
+    resp._consumed = False
+    resp.iter_body = lambda: _iter_body(conn.reader, resp)
+    return resp
+
+async def _iter_body(reader, resp):
+    # Truncated or malformed bodies surface as HTTPError, like the other
+    # failures the LLM wrapper handles
+    try:
+        async for chunk in _read_body(reader, resp):
+            yield chunk
+    except asyncio.IncompleteReadError:
+        raise HTTPError("Connection closed mid-body") from None
+    except ValueError as e:
+        raise HTTPError(f"Malformed response body: {e}") from None
+
+async def _read_body(reader, resp):
+    headers = resp.headers
+    if resp.status in (204, 304) or 100 <= resp.status < 200:
+        pass
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await _readline(reader, "chunk size")
+            if not size_line:
+                raise HTTPError("Connection closed mid-body")
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise HTTPError(f"Malformed chunk size: {size_line[:100]!r}") from None
+            if size == 0:
+                # Skip trailers
+                while (await _readline(reader, "trailer")) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            yield await reader.readexactly(size)
+            await _readline(reader, "chunk")
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, 65536))
+            if not chunk:
+                raise HTTPError("Connection closed mid-body")
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        # Body delimited by connection close
+        resp._keep_alive = False
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            yield chunk
+    resp._consumed = True
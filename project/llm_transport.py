@@ -0,0 +1,211 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from project.llm_http import HTTPError
+
+# Resilience around single upstream requests: jittered exponential retry
+# on 429/5xx and connection errors (honoring Retry-After), a circuit
+# breaker that fails fast while the upstream is unhealthy, and optional
+# hedging against tail latency. Timeouts are not retried: the attempt has
+# already used the caller's whole time budget.
+
+LLM_RETRIES = int(os.environ.get("LLM_RETRIES", "2"))  # extra attempts after the first
+LLM_RETRY_BASE = float(os.environ.get("LLM_RETRY_BASE", "0.5"))  # seconds
+LLM_RETRY_MAX = float(os.environ.get("LLM_RETRY_MAX", "8"))
+# A Retry-After longer than this isn't waited for; the call fails instead
+LLM_RETRY_AFTER_MAX = float(os.environ.get("LLM_RETRY_AFTER_MAX", "30"))
+# Consecutive failed attempts that open the breaker, and how long it stays open
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+# Hedging: a second request goes out if the first hasn't answered within
+# the LLM_HEDGE_QUANTILE of recent latencies
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_QUANTILE = float(os.environ.get("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_WINDOW = 200  # latencies remembered
+LLM_HEDGE_MIN_SAMPLES = 20  # no hedging until this many are known
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class CircuitOpenError(Exception):
+    pass
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now or time.time()))
+
+class CircuitBreaker:
+    """
+    Closed while the upstream answers. After `threshold` consecutive
+    failures it opens and rejects calls for `cooldown` seconds, then lets
+    a single probe through (half-open): success closes it again, failure
+    re-opens it.
+    """
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+
+    def allow(self):
+        if self.state == "closed" or self.threshold <= 0:
+            return True
+        if self.state == "open" and self.clock() - self.opened_at >= self.cooldown:
+            self.state = "half-open"
+            return True
+        return False  # open, or half-open with its probe still out
+
+    def retry_in(self):
+        """Seconds until an open breaker lets a probe through."""
+        return max(0.0, self.cooldown - (self.clock() - self.opened_at)) if self.state == "open" else 0.0
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or (self.state == "closed" and 0 < self.threshold <= self.failures):
+            self.state = "open"
+            self.opened_at = self.clock()
+            self.opens += 1
+
+class Transport:
+    """
+    Sends requests produced by an `attempt()` coroutine factory with
+    retries, circuit breaking and hedging. Must only be used from one
+    event loop.
+    """
+
+    def __init__(self, retries=LLM_RETRIES, retry_base=LLM_RETRY_BASE, retry_max=LLM_RETRY_MAX,
+                 retry_after_max=LLM_RETRY_AFTER_MAX, breaker=None, hedge=LLM_HEDGE,
+                 hedge_quantile=LLM_HEDGE_QUANTILE):
+        self.retries = retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.retry_after_max = retry_after_max
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.latencies = deque(maxlen=LLM_HEDGE_WINDOW)
+        self.counters = {"attempts": 0, "retries": 0, "failures": 0, "short_circuited": 0,
+                         "hedged": 0, "hedge_wins": 0}
+
+    def backoff(self, retry, retry_after=None):
+        """Seconds before retry number `retry` (0-based): full jitter, at least Retry-After."""
+        delay = random.uniform(0, min(self.retry_max, self.retry_base * 2 ** retry))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def hedge_delay(self):
+        """When to send a hedge request, or None while hedging is off or unwarmed."""
+        if not self.hedge or len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))]
+
+    async def _timed(self, attempt, timeout, semaphore, started=None):
+        async with semaphore or contextlib.nullcontext():
+            if started is not None:
+                started.set()
+            self.counters["attempts"] += 1
+            start = time.monotonic()
+            resp = await asyncio.wait_for(attempt(), timeout)
+            if resp.status < 400:
+                self.latencies.append(time.monotonic() - start)
+            return resp
+
+    async def _hedged(self, attempt, timeout, semaphore):
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed(attempt, timeout, semaphore)
+        started = asyncio.Event()
+        first = asyncio.ensure_future(self._timed(attempt, timeout, semaphore, started))
+        waiter = asyncio.ensure_future(started.wait())
+        second = None
+        try:
+            # The hedge delay counts from when the request is sent, not while
+            # it queues for the semaphore
+            await asyncio.wait({first, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return first.result()
+            self.counters["hedged"] += 1
+            second = asyncio.ensure_future(self._timed(attempt, timeout, semaphore))
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status not in RETRY_STATUSES:
+                        if task is second:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+            return first.result()  # both failed; report the original attempt
+        finally:
+            for task in (first, second, waiter):
+                if task is not None:
+                    task.cancel()
+
+    async def send(self, attempt, timeout, semaphore=None):
+        """
+        The response to `attempt()`, retried as configured. Returns the last
+        response when retries run out on an HTTP error status; raises
+        CircuitOpenError, asyncio.TimeoutError, OSError or HTTPError otherwise.
+        """
+        if not self.breaker.allow():
+            self.counters["short_circuited"] += 1
+            raise CircuitOpenError(f"upstream unavailable, retrying in {self.breaker.retry_in():.0f}s")
+
+        for retry in range(self.retries + 1):
+            retry_after = None
+            try:
+                resp = await self._hedged(attempt, timeout, semaphore)
+            except asyncio.CancelledError:
+                if self.breaker.state == "half-open":
+                    self.breaker.record_failure()  # don't leave the probe slot taken
+                raise
+            except asyncio.TimeoutError:
+                self.counters["failures"] += 1
+                self.breaker.record_failure()
+                raise
+            except (OSError, HTTPError):
+                self.counters["failures"] += 1
+                self.breaker.record_failure()
+                if retry == self.retries or self.breaker.state == "open":
+                    raise
+            else:
+                if resp.status not in RETRY_STATUSES:
+                    # Other 4xx are the request's fault, not the upstream's
+                    self.breaker.record_success()
+                    return resp
+                self.counters["failures"] += 1
+                self.breaker.record_failure()
+                retry_after = parse_retry_after(resp.headers.get("retry-after"))
+                if (retry == self.retries or self.breaker.state == "open"
+                        or (retry_after is not None and retry_after > self.retry_after_max)):
+                    return resp
+            self.counters["retries"] += 1
+            await asyncio.sleep(self.backoff(retry, retry_after))
+
+    def stats(self):
+        return dict(self.counters, breaker=self.breaker.state, breaker_opens=self.breaker.opens,
+                    hedge_delay=self.hedge_delay())
@@ -1,25 +1,61 @@
 import os
 import json
-import urllib.request
-import urllib.error
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from project import metrics
+from project.llm_http import ConnectionPool, HTTPError
+from project.llm_cache import LLMCache, make_key
+from project.llm_transport import LLM_RETRIES, LLM_RETRY_MAX, Transport, CircuitOpenError
 
 LLM_API_URL = os.environ.get("LLM_API_URL")
 LLM_API_KEY = os.environ.get("LLM_API_KEY")
+# "gemini", "openai" or "auto" (Gemini when the URL is generativelanguage.googleapis.com)
+LLM_API_FORMAT = os.environ.get("LLM_API_FORMAT", "auto")
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "30"))
+# Upper bound on concurrent upstream requests across all callers
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+# Response cache for deterministic (temperature 0) calls
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH")  # optional SQLite file
+LLM_CACHE_DISK_SIZE = int(os.environ.get("LLM_CACHE_DISK_SIZE", "10000"))  # rows kept in that file
 
-def call_llm_system(prompt, max_tokens=512, temperature=0.0):
-    if not LLM_API_URL or not LLM_API_KEY:
-        return '{"action": "chat", "parameters": {"response": "Error: LLM_API_URL or LLM_API_KEY not set."}}'
+# Micro-batching of short prompts with a shared prefix (see acall_llm_batched);
+# LLM_BATCH_MAX=1 turns it off
+LLM_BATCH_WINDOW = float(os.environ.get("LLM_BATCH_WINDOW", "0.02"))  # seconds
+LLM_BATCH_MAX = int(os.environ.get("LLM_BATCH_MAX", "8"))
+LLM_BATCH_MAX_TOKENS = 4096
+
+_cache = LLMCache(max_entries=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL, path=LLM_CACHE_PATH,
+                  max_disk_entries=LLM_CACHE_DISK_SIZE)
+
+def _error_response(message):
+    return json.dumps({"action": "chat", "parameters": {"response": message}})
+
+def is_error_response(text):
+    """True if `text` is one of the wrapper's own error payloads (see _error_response)."""
+    if not text.startswith('{"action": "chat", "parameters": {"response": '):
+        return False
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return False
+    return list(parsed) == ["action", "parameters"] and list(parsed["parameters"]) == ["response"]
+
+def _is_google():
+    if LLM_API_FORMAT != "auto":
+        return LLM_API_FORMAT == "gemini"
+    return "generativelanguage.googleapis.com" in LLM_API_URL
+
+def _build_request(prompt, max_tokens, temperature):
+    """Returns (body bytes, headers, is_google) for the configured backend."""
+    is_google = _is_google()
 
-    # Detect if using Google Gemini (generativelanguage.googleapis.com)
-    is_google = "generativelanguage.googleapis.com" in LLM_API_URL
-    
     if is_google:
         # Google Gemini REST API format
-        # URL should be like: https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key=API_KEY
-        # But we usually pass key in header or query param. 
-        # If user put key in env var, we might need to append it if not in URL.
-        
-        # Construct payload for Gemini
+        # URL should be like: https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent
         payload = {
             "contents": [{
                 "parts": [{"text": prompt}]
@@ -29,13 +65,13 @@ def call_llm_system(prompt, max_tokens=512, temperature=0.0):
                 "temperature": temperature
             }
         }
-        
+
         # Google API key is often passed as query param 'key', but can also be in header 'x-goog-api-key'
         headers = {
             "Content-Type": "application/json",
             "x-goog-api-key": LLM_API_KEY
         }
-        
+
     else:
         # Fallback to generic/OpenAI-like format (often used by local servers or proxies)
         # OpenAI Chat Completions format
@@ -44,43 +80,418 @@ def call_llm_system(prompt, max_tokens=512, temperature=0.0):
             "max_tokens": max_tokens,
             "temperature": temperature
         }
-        # Some generic endpoints might still want "prompt", but "messages" is more standard now.
-        # If this is a raw completion endpoint, it might fail. 
-        # But let's try to be robust.
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {LLM_API_KEY}"
         }
 
-    data = json.dumps(payload).encode("utf-8")
-    
+    return json.dumps(payload).encode("utf-8"), headers, is_google
+
+def _extract_usage(resp_json, is_google):
+    """(prompt_tokens, completion_tokens) as reported by the API, or None."""
     try:
-        req = urllib.request.Request(LLM_API_URL, data=data, headers=headers)
-        with urllib.request.urlopen(req, timeout=30) as res:
-            resp_text = res.read().decode("utf-8")
-            
-        # Parse response to extract text
-        resp_json = json.loads(resp_text)
-        
         if is_google:
-            # Extract from Gemini response
-            # {"candidates": [{"content": {"parts": [{"text": "..."}]}}]}
-            try:
-                return resp_json["candidates"][0]["content"]["parts"][0]["text"]
-            except (KeyError, IndexError):
-                return json.dumps({"action": "chat", "parameters": {"response": "Error: Empty or invalid response from Gemini."}})
-        else:
-            # Extract from OpenAI-like response
-            # {"choices": [{"message": {"content": "..."}}]}
-            try:
-                if "choices" in resp_json:
-                    return resp_json["choices"][0]["message"]["content"]
-                # Fallback if it returns raw text or other format
-                return resp_text
-            except (KeyError, IndexError):
-                 return resp_text
-
-    except urllib.error.URLError as e:
-        return json.dumps({"action": "chat", "parameters": {"response": f"LLM API Error: {e}"}})
+            usage = resp_json["usageMetadata"]
+            return usage["promptTokenCount"], usage.get("candidatesTokenCount", 0)
+        usage = resp_json["usage"]
+        return usage["prompt_tokens"], usage.get("completion_tokens", 0)
+    except (KeyError, TypeError):
+        return None
+
+def _extract_text(resp_text, is_google):
+    """Returns (text, ok, usage); ok is False when `text` is an error response."""
+    # Parse response to extract text
+    try:
+        resp_json = json.loads(resp_text)
+    except json.JSONDecodeError:
+        return _error_response("Error: Invalid JSON response from API."), False, None
+    usage = _extract_usage(resp_json, is_google)
+
+    if is_google:
+        # Extract from Gemini response
+        # {"candidates": [{"content": {"parts": [{"text": "..."}]}}]}
+        try:
+            return resp_json["candidates"][0]["content"]["parts"][0]["text"], True, usage
+        except (KeyError, IndexError, TypeError):
+            return _error_response("Error: Empty or invalid response from Gemini."), False, usage
+    else:
+        # Extract from OpenAI-like response
+        # {"choices": [{"message": {"content": "..."}}]}
+        try:
+            if "choices" in resp_json:
+                return resp_json["choices"][0]["message"]["content"], True, usage
+            # Fallback if it returns raw text or other format
+            return resp_text, True, usage
+        except (KeyError, IndexError, TypeError):
+            return resp_text, True, usage
+
+# --- Async client -----------------------------------------------------------
+# All upstream traffic runs on one background event loop that owns the
+# keep-alive pool and the concurrency semaphore; sync callers hop onto it.
+
+_loop = None
+_loop_lock = threading.Lock()
+_pool = None
+_semaphore = None
+_transport = None
+# Per-process call counters (see llm_stats); updated on the client loop only
+_stats = {"calls": 0, "issued": 0, "coalesced": 0, "batches": 0, "batched_prompts": 0, "batch_fallbacks": 0}
+# cache key -> task of the identical temperature-0 request in flight
+_inflight = {}
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client", daemon=True).start()
+    return _loop
+
+def _client_state():
+    # Only called on the client loop, so no locking is needed
+    global _pool, _semaphore, _transport
+    if _pool is None:
+        _pool = ConnectionPool(max_idle_per_host=LLM_MAX_CONCURRENCY)
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _transport = Transport()
+    return _pool, _semaphore
+
+def run_coroutine(coro):
+    """Schedules `coro` on the LLM client loop; returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+def _outcome(status):
+    if status == 429:
+        return "http_429"
+    return "http_5xx" if status >= 500 else "http_4xx"
+
+async def _request_completion(prompt, max_tokens, temperature, timeout):
+    """One upstream call, timed by outcome (see metrics.LLM_SECONDS). Returns (text, ok)."""
+    data, headers, is_google = _build_request(prompt, max_tokens, temperature)
+    timeout = timeout or LLM_TIMEOUT
+    pool, semaphore = _client_state()
+
+    with metrics.span("llm.request", metrics.LLM_SECONDS, max_tokens=max_tokens) as span:
+        try:
+            # Retries, circuit breaking and hedging: see llm_transport
+            resp = await _transport.send(lambda: pool.request("POST", LLM_API_URL, headers, data), timeout, semaphore)
+        except CircuitOpenError as e:
+            span.labels = ("circuit_open",)
+            return _error_response(f"LLM API Error: {e}"), False
+        except asyncio.TimeoutError:
+            span.labels = ("timeout",)
+            return _error_response(f"LLM API Error: timed out after {timeout:g}s"), False
+        except (OSError, HTTPError) as e:
+            span.labels = ("connection",)
+            return _error_response(f"LLM API Error: {e}"), False
+
+        if resp.status >= 400:
+            span.labels = (_outcome(resp.status),)
+            return _error_response(f"LLM API Error: HTTP Error {resp.status}: {resp.reason}"), False
+        text, ok, usage = _extract_text(resp.text(), is_google)
+        span.labels = ("ok",) if ok else ("invalid_response",)
+
+    if usage is None:
+        # Not reported: estimate at ~4 characters per token
+        usage = (len(prompt) // 4, len(text) // 4 if ok else 0)
+    metrics.LLM_TOKENS.inc(("prompt",), usage[0])
+    metrics.LLM_TOKENS.inc(("completion",), usage[1])
+    return text, ok
+
+async def _issue(prompt, max_tokens, temperature, timeout, cache_key):
+    """One upstream completion, counted; stores a successful reply under `cache_key`."""
+    _stats["issued"] += 1
+    text, ok = await _request_completion(prompt, max_tokens, temperature, timeout)
+    if cache_key and ok:
+        _cache.set(cache_key, text)
+    return text
+
+async def acall_llm_system(prompt, max_tokens=512, temperature=0.0, timeout=None, use_cache=True):
+    """
+    Async LLM call. Must run on the client loop (see run_coroutine).
+
+    Temperature-0 calls are deterministic, so successful responses are
+    cached by (URL, normalized prompt, temperature, max_tokens), and a call
+    identical to one already in flight waits for that one's reply instead
+    of going upstream again (single flight).
+    """
+    if not LLM_API_URL or not LLM_API_KEY:
+        return _error_response("Error: LLM_API_URL or LLM_API_KEY not set.")
+
+    _stats["calls"] += 1
+    if temperature != 0:
+        return await _issue(prompt, max_tokens, temperature, timeout, None)
+
+    key = make_key(LLM_API_URL, prompt, temperature, max_tokens)
+    if use_cache:
+        cached = _cache.get(key)
+        metrics.LLM_CACHE.inc(("miss",) if cached is None else ("hit",))
+        if cached is not None:
+            return cached
+
+    task = _inflight.get(key)
+    if task is not None:
+        _stats["coalesced"] += 1
+    else:
+        task = asyncio.ensure_future(_issue(prompt, max_tokens, temperature, timeout, key if use_cache else None))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded: a caller giving up doesn't cancel the call others wait on
+    return await asyncio.shield(task)
+
+def call_llm_system(prompt, max_tokens=512, temperature=0.0, timeout=None, use_cache=True):
+    """Blocking wrapper around acall_llm_system for sync callers (Flask, CLI)."""
+    return run_coroutine(acall_llm_system(prompt, max_tokens, temperature, timeout, use_cache)).result()
+
+def cache_stats():
+    """Hit/miss counters and current size of the response cache."""
+    return _cache.stats()
+
+def llm_stats():
+    """
+    Call counters: `calls` to acall_llm_system (a micro-batch counts as
+    one), `issued` upstream requests,
+    `coalesced` calls that shared an in-flight request, and for
+    micro-batching the `batches` sent, the `batched_prompts` they carried
+    and `batch_fallbacks` (batches re-sent one prompt at a time).
+    `transport` has the retry, breaker and hedging counters.
+    """
+    return dict(_stats, cache=_cache.stats(), transport=_transport.stats() if _transport else None)
+
+@metrics.add_collector
+def _collect_stats():
+    lines = ["# HELP llm_calls_total LLM wrapper call counters (see llm_stats)", "# TYPE llm_calls_total counter"]
+    lines += [f'llm_calls_total{{kind="{kind}"}} {value}' for kind, value in _stats.items()]
+    if _transport is not None:
+        transport = _transport.stats()
+        lines += ["# HELP llm_transport_total Upstream attempts, retries and hedges",
+                  "# TYPE llm_transport_total counter"]
+        lines += [f'llm_transport_total{{kind="{kind}"}} {transport[kind]}' for kind in _transport.counters]
+        lines += ["# HELP llm_breaker_open 1 while the circuit breaker rejects calls", "# TYPE llm_breaker_open gauge",
+                  f"llm_breaker_open {int(transport['breaker'] != 'closed')}"]
+    return lines
+
+def call_llm(prompt, max_tokens=512, temperature=0.0):
+    return call_llm_system(prompt, max_tokens=max_tokens, temperature=temperature)
+
+# --- Micro-batching -------------------------------------------------------------
+# Independent short prompts that share a long prefix (the same system
+# prompt) and arrive within LLM_BATCH_WINDOW of each other are sent as one
+# request asking for a JSON array of answers. Neither supported API takes
+# several prompts per request, so the batch is a single combined prompt.
+
+BATCH_INSTRUCTIONS = """
+
+You will now receive {n} independent requests, numbered 1 to {n}. Handle each
+one on its own, exactly as the instructions above describe for a single request.
+Return ONLY a JSON array with {n} elements, where element i is your complete
+response to request i (for example the JSON object you would return for it alone).
+"""
+
+# (prefix, max_tokens) -> list of (item, future) waiting to be sent; client loop only
+_batches = {}
+
+def _split_batch(text, n):
+    """The n answers of a batched reply as strings, or None if it isn't a JSON array of n."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        answers = json.loads(text)
     except json.JSONDecodeError:
-        return json.dumps({"action": "chat", "parameters": {"response": "Error: Invalid JSON response from API."}})
+        return None
+    if not isinstance(answers, list) or len(answers) != n:
+        return None
+    return [a if isinstance(a, str) else json.dumps(a) for a in answers]
+
+async def _batch_results(prefix, max_tokens, items, timeout):
+    if len(items) == 1:
+        item, _ = items[0]
+        return [await acall_llm_system(prefix + item, max_tokens, 0.0, timeout)]
+    _stats["batches"] += 1
+    _stats["batched_prompts"] += len(items)
+    prompt = prefix + BATCH_INSTRUCTIONS.format(n=len(items)) + "".join(
+        f"\n### Request {i}\n{item}\n" for i, (item, _) in enumerate(items, 1))
+    text = await acall_llm_system(prompt, min(max_tokens * len(items), LLM_BATCH_MAX_TOKENS), 0.0, timeout)
+    results = [text] * len(items) if is_error_response(text) else _split_batch(text, len(items))
+    if results is None:
+        # The model didn't keep to the format: fall back to one call per prompt
+        _stats["batch_fallbacks"] += 1
+        results = await asyncio.gather(*(acall_llm_system(prefix + item, max_tokens, 0.0, timeout)
+                                         for item, _ in items))
+    # Split answers are not cached under the single prompts: they came
+    # from the combined prompt, not from the prompt a later call sends
+    return results
+
+async def _send_batch(prefix, max_tokens, items, timeout):
+    # Runs detached (ensure_future), so every waiter must be answered even if it fails
+    results = []
+    try:
+        results = await _batch_results(prefix, max_tokens, items, timeout)
+    except Exception as e:
+        print(f"Batched LLM call failed: {e!r}")
+    finally:
+        for i, (_, future) in enumerate(items):
+            if not future.done():
+                future.set_result(results[i] if i < len(results) else
+                                  _error_response("LLM API Error: batched call failed"))
+
+def _flush_batch(group, items, timeout):
+    if _batches.get(group) is items:
+        del _batches[group]
+        asyncio.ensure_future(_send_batch(group[0], group[1], items, timeout))
+
+async def acall_llm_batched(prefix, item, max_tokens=512, timeout=None):
+    """
+    The reply to prompt `prefix + item` (temperature 0), micro-batched
+    with other calls sharing `prefix` that arrive within LLM_BATCH_WINDOW,
+    up to LLM_BATCH_MAX per upstream request. Must run on the client loop.
+    """
+    if LLM_BATCH_MAX <= 1 or not LLM_API_URL or not LLM_API_KEY:
+        return await acall_llm_system(prefix + item, max_tokens, 0.0, timeout)
+    cached = _cache.get(make_key(LLM_API_URL, prefix + item, 0.0, max_tokens))
+    metrics.LLM_CACHE.inc(("miss",) if cached is None else ("hit",))
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+    group = (prefix, max_tokens)
+    items = _batches.get(group)
+    if items is None:
+        items = _batches[group] = []
+        loop.call_later(LLM_BATCH_WINDOW, _flush_batch, group, items, timeout)
+    future = loop.create_future()
+    items.append((item, future))
+    if len(items) >= LLM_BATCH_MAX:
+        _flush_batch(group, items, timeout)
+    return await future
+
+def _batch_deadline(timeout):
+    """Longest a batched call can legitimately take: the batch, then the per-prompt fallback, both retried."""
+    per_call = (timeout or LLM_TIMEOUT) * (LLM_RETRIES + 1) + LLM_RETRY_MAX * LLM_RETRIES
+    return LLM_BATCH_WINDOW + 2 * per_call
+
+def call_llm_many(prefix, items, max_tokens=512, timeout=None):
+    """
+    Replies to `prefix + item` for each of `items`, in order, micro-batched
+    (see acall_llm_batched). Replies still missing at the deadline are
+    error payloads.
+    """
+    async def gather():
+        return await asyncio.gather(*(acall_llm_batched(prefix, item, max_tokens, timeout) for item in items))
+    future = run_coroutine(gather())
+    try:
+        return future.result(timeout=_batch_deadline(timeout))
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        return [_error_response("LLM API Error: batched call timed out")] * len(items)
+
+# --- Streaming ----------------------------------------------------------------
+
+def _stream_url():
+    # Gemini streams from a sibling method; alt=sse makes it emit SSE frames
+    if _is_google():
+        url = LLM_API_URL.replace(":generateContent", ":streamGenerateContent")
+        return url + ("&" if "?" in url else "?") + "alt=sse"
+    return LLM_API_URL
+
+def _extract_delta(event, is_google):
+    """Text carried by one streamed event, or "" if it has none."""
+    try:
+        if is_google:
+            return event["candidates"][0]["content"]["parts"][0].get("text", "")
+        return event["choices"][0].get("delta", {}).get("content") or ""
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return ""
+
+async def _iter_sse_data(chunks):
+    """Yields the payload of each SSE event from an async iterator of byte chunks."""
+    buffer = b""
+    data_lines = []
+    async for chunk in chunks:
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            line = line.rstrip(b"\r")
+            if not line:
+                if data_lines:
+                    yield b"\n".join(data_lines).decode("utf-8")
+                    data_lines = []
+            elif line.startswith(b"data:"):
+                data_lines.append(line[5:].lstrip(b" "))
+    if data_lines:
+        yield b"\n".join(data_lines).decode("utf-8")
+
+async def astream_llm_system(prompt, max_tokens=512, temperature=0.0, timeout=None):
+    """
+    Async generator of text deltas as the model produces them. Errors are
+    yielded as a single error payload, like call_llm_system returns them.
+    `timeout` bounds the wait for each chunk, not the whole stream.
+    """
+    if not LLM_API_URL or not LLM_API_KEY:
+        yield _error_response("Error: LLM_API_URL or LLM_API_KEY not set.")
+        return
+
+    data, headers, is_google = _build_request(prompt, max_tokens, temperature)
+    if not is_google:
+        payload = json.loads(data)
+        payload["stream"] = True
+        data = json.dumps(payload).encode("utf-8")
+    headers["Accept"] = "text/event-stream"
+    timeout = timeout or LLM_TIMEOUT
+    pool, semaphore = _client_state()
+    if _transport.breaker.retry_in() > 0:
+        # Open breaker: fail fast like non-streamed calls (probes are left to those)
+        yield _error_response("LLM API Error: upstream unavailable")
+        return
+
+    async with semaphore:
+        try:
+            async with pool.stream("POST", _stream_url(), headers, data) as resp:
+                if resp.status >= 400:
+                    yield _error_response(f"LLM API Error: HTTP Error {resp.status}: {resp.reason}")
+                    return
+                events = _iter_sse_data(resp.iter_body()).__aiter__()
+                while True:
+                    try:
+                        raw = await asyncio.wait_for(events.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    if raw.strip() == "[DONE]":
+                        continue
+                    try:
+                        delta = _extract_delta(json.loads(raw), is_google)
+                    except json.JSONDecodeError:
+                        continue
+                    if delta:
+                        yield delta
+        except asyncio.TimeoutError:
+            yield _error_response(f"LLM API Error: timed out after {timeout:g}s")
+        except (OSError, HTTPError) as e:
+            yield _error_response(f"LLM API Error: {e}")
+
+_STREAM_END = object()
+
+def stream_llm_system(prompt, max_tokens=512, temperature=0.0, timeout=None):
+    """
+    Blocking generator over astream_llm_system for sync callers. Closing
+    the generator early cancels the upstream request.
+    """
+    chunks = queue.Queue()
+
+    async def pump():
+        try:
+            async for delta in astream_llm_system(prompt, max_tokens, temperature, timeout):
+                chunks.put(delta)
+        finally:
+            chunks.put(_STREAM_END)
+
+    future = run_coroutine(pump())
+    try:
+        while True:
+            delta = chunks.get()
+            if delta is _STREAM_END:
+                break
+            yield delta
+    finally:
+        future.cancel()
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -6,9 +7,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from project.agents.ai_agent import process_user_message
 from project.agents.task_manager import add_task, delete_task, update_task, get_all_tasks
-from project.agents.prioritizer import sort_tasks
-from project.agents.scheduler import schedule_week
+from project.agents.prioritizer import get_prioritized_tasks, format_task_list
+from project.agents.scheduler import schedule_week, get_free_slots, format_free_slots
 from project.agents.ai_summary import generate_summary
+from project.chat_history import ChatHistoryStore
+from project.jobs import JOBS
+from project.agents.task_importer import split_lines, iter_import
 
 def handle_command(parsed):
     action = parsed.get("action")
@@ -20,23 +24,33 @@ def handle_command(parsed):
             duration_minutes=params.get("duration_minutes"),
             deadline=params.get("deadline"),
             priority=params.get("priority", "medium"),
-            earliest_start=params.get("earliest_start")
+            scheduled_date=params.get("scheduled_date")
         )
         return f"Added task '{t['task_name']}' (id {t['id']})"
+
+    if action == "delete_task":
+        if params.get("task_id") and delete_task(params["task_id"]):
+            return parsed.get("response") or f"Deleted task {params['task_id']}"
+        return "Task not found."
+
+    if action == "update_task":
+        try:
+            updated = params.get("task_id") and update_task(params["task_id"], params.get("updates", {}))
+        except ValueError as e:
+            return f"Couldn't update task: {e}"
+        if updated:
+            return parsed.get("response") or f"Updated task {params['task_id']}"
+        return "Task not found."
         
     if action == "summarize_week":
         return generate_summary()
         
     if action == "query_schedule":
-        tasks = sort_tasks(get_all_tasks())
-        if not tasks:
-            return "No tasks found."
-        lines = [f"{t['task_name']} - {t.get('deadline') or 'no deadline'} - {t.get('priority')}" for t in tasks]
-        return "\n".join(lines)
+        return format_task_list(get_prioritized_tasks())
         
     if action == "get_free_slots":
-        # simplistic: return days with free hours
-        return "Feature not implemented yet."
+        # Free working time left next week by the current schedule
+        return format_free_slots(get_free_slots(min_minutes=params.get("min_minutes", 30)))
         
     if action == "chat":
         return params.get("response", "I couldn't understand.")
@@ -46,6 +60,9 @@ def handle_command(parsed):
 def repl():
     print("AI Planner CLI. Type 'exit' to quit.")
     print("Make sure LLM_API_URL and LLM_API_KEY environment variables are set.")
+    history = ChatHistoryStore(max_sessions=1)
+    # Summaries and the schedule are refreshed in the background between prompts
+    JOBS.start()
     
     while True:
         try:
@@ -59,13 +76,50 @@ def repl():
             continue
             
         print("Processing...")
-        parsed = process_user_message(msg)
+        parsed = process_user_message(msg, history.get("cli"))
         
         # Debug print to see what LLM returned (optional, but helpful)
         # print(f"[Debug] Parsed: {parsed}")
         
         reply = handle_command(parsed)
         print("Assistant:", reply)
+        history.append("cli", "user", msg)
+        history.append("cli", "assistant", reply)
+
+def import_file(path, use_llm=True, concurrency=None):
+    """Imports one task per line of `path` ("-" for stdin), printing progress."""
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+
+    try:
+        for kind, payload in iter_import(split_lines(text), use_llm=use_llm, concurrency=concurrency):
+            if kind == "progress":
+                for line in payload["lines"]:
+                    if line["status"] == "error":
+                        print(f"\r  line {line['line']}: {line['error']} ({line['text']})")
+                print(f"Parsed {payload['done']}/{payload['total']} lines", end="\r", flush=True)
+            else:
+                print(f"\nImported {payload['imported']} of {payload['total']} lines, "
+                      f"{payload['failed']} failed.")
+    except ValueError as e:
+        print(f"Import failed: {e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Planner CLI")
+    commands = parser.add_subparsers(dest="command")
+    importer = commands.add_parser("import", help="add one task per line of a text file")
+    importer.add_argument("file", help='text file, or "-" to read stdin')
+    importer.add_argument("--no-llm", action="store_true", help="parse lines locally only")
+    importer.add_argument("--concurrency", type=int, help="lines parsed at once, in chunks")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        import_file(args.file, use_llm=not args.no_llm, concurrency=args.concurrency)
+    else:
+        repl()
 
 if __name__ == "__main__":
-    repl()
+    main()
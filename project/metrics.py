@@ -0,0 +1,245 @@
+import atexit
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+# In-process metrics (counters and latency histograms, served as Prometheus
+# text by /metrics) and optional span export to a JSON-lines file.
+#
+# Kept cheap enough for hot paths: a span is a __slots__ object timing with
+# perf_counter and recording into a histogram under a lock. Span export,
+# which formats JSON, only runs when TRACE_PATH is set.
+
+METRICS_ENABLED = os.environ.get("METRICS", "1") != "0"
+TRACE_PATH = os.environ.get("TRACE_PATH")  # e.g. project/data/spans.jsonl
+TRACE_FLUSH_EVERY = 256  # spans buffered before a write
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{n}="{str(v)}"'.replace("\n", " ") for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, labels=(), value=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, labels=()):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def count(self, labels=()):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, labels)} {cumulative}")
+        return lines
+
+# Functions returning extra exposition lines for state kept elsewhere
+_collectors = []
+
+def add_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+# --- Metrics of the hot paths ----------------------------------------------------
+
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "Time to produce a response, by route",
+                         ("method", "route", "status"))
+DB_SECONDS = Histogram("db_operation_duration_seconds", "task_manager call latency", ("function",))
+DB_QUERIES = Counter("db_queries_total", "SQL execute/executemany calls, by task_manager function", ("function",))
+LLM_SECONDS = Histogram("llm_request_duration_seconds", "Upstream LLM request latency, by outcome", ("outcome",))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens, as reported by the API or estimated", ("kind",))
+LLM_CACHE = Counter("llm_cache_lookups_total", "LLM response cache lookups", ("result",))
+
+# --- Spans ------------------------------------------------------------------------
+
+_local = threading.local()
+# The enclosing span, per thread and per asyncio task
+_current_span = contextvars.ContextVar("current_span", default=None)
+_ids = itertools.count(1)
+_id_prefix = os.urandom(4).hex()
+_trace_buffer = []
+_trace_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+class span:
+    """
+    Times a block: `with span("llm.request", LLM_SECONDS) as s:`. The
+    duration goes into `histogram` (if given) under `s.labels`, which may
+    be changed inside the block (e.g. to record the outcome); with
+    TRACE_PATH set, the span is also exported with `attrs`.
+    """
+
+    __slots__ = ("name", "histogram", "labels", "attrs", "start", "span_id", "parent_id", "token")
+
+    def __init__(self, name, histogram=None, labels=(), **attrs):
+        self.name = name
+        self.histogram = histogram
+        self.labels = labels
+        self.attrs = attrs
+
+    def __enter__(self):
+        if TRACE_PATH:
+            self.span_id = f"{_id_prefix}{next(_ids):x}"
+            self.parent_id = _current_span.get()
+            self.token = _current_span.set(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.histogram is not None and METRICS_ENABLED:
+            self.histogram.observe(elapsed, self.labels)
+        if TRACE_PATH:
+            _current_span.reset(self.token)
+            # Raw tuple here; JSON is built on the writer thread
+            _export((self.name, self.span_id, self.parent_id, time.time() - elapsed, elapsed,
+                     threading.get_ident(), self.labels, self.attrs, exc_type))
+        return False
+
+_trace_queue = queue.SimpleQueue()
+_writer = None
+
+def _export(record):
+    global _writer
+    with _trace_lock:
+        _trace_buffer.append(record)
+        if len(_trace_buffer) < TRACE_FLUSH_EVERY:
+            return
+        records = _trace_buffer[:]
+        _trace_buffer.clear()
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="span-writer", daemon=True)
+            _writer.start()
+    _trace_queue.put(records)
+
+def _span_json(record):
+    name, span_id, parent_id, start, elapsed, thread, labels, attrs, error = record
+    out = {"name": name, "span_id": span_id, "parent_id": parent_id, "start": round(start, 6),
+           "duration_ms": round(elapsed * 1000, 3), "thread": thread}
+    if labels:
+        out["labels"] = list(labels)
+    if attrs:
+        out["attrs"] = attrs
+    if error is not None:
+        out["error"] = error.__name__
+    return json.dumps(out, default=str)
+
+def _write(records):
+    path = Path(TRACE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = "".join(_span_json(r) + "\n" for r in records)
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+def _write_loop():
+    while True:
+        records = _trace_queue.get()
+        try:
+            _write(records)
+        except OSError as e:
+            print(f"Error writing spans: {e}")
+
+def flush_spans():
+    """Writes buffered spans to TRACE_PATH."""
+    with _trace_lock:
+        records = _trace_buffer[:]
+        _trace_buffer.clear()
+    # Batches still queued for the writer thread go first
+    while True:
+        try:
+            records = _trace_queue.get_nowait() + records
+        except queue.Empty:
+            break
+    if records and TRACE_PATH:
+        _write(records)
+
+atexit.register(flush_spans)
+
+# --- DB instrumentation -----------------------------------------------------------
+
+def count_query():
+    """Counts one execute/executemany on this thread (see database.CountingCursor)."""
+    _local.queries = getattr(_local, "queries", 0) + 1
+
+def db_operation(fn):
+    """Decorator for task_manager functions: latency plus the queries they ran."""
+    name = fn.__name__
+    labels = (name,)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not METRICS_ENABLED:
+            return fn(*args, **kwargs)
+        before = getattr(_local, "queries", 0)
+        with span("db." + name, DB_SECONDS, labels):
+            result = fn(*args, **kwargs)
+        DB_QUERIES.inc(labels, getattr(_local, "queries", 0) - before)
+        return result
+    return wrapper
@@ -0,0 +1,123 @@
+from datetime import date
+from functools import lru_cache
+
+# Columns of the tasks table, in table order
+TASK_FIELDS = ("id", "task_name", "duration_minutes", "priority", "deadline",
+               "created_at", "status", "scheduled_date", "revision")
+_FIELD_SET = frozenset(TASK_FIELDS)
+
+# Older JSON records (task_collector) used these names
+LEGACY_FIELDS = {"name": "task_name", "duration": "duration_minutes"}
+
+# Low-cardinality values (dates, priority, status) are shared between tasks
+# instead of each row holding its own copy of the same string / date. The
+# caches are LRUs, so a long-running process doesn't keep every value it
+# has ever seen.
+INTERN_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=INTERN_CACHE_SIZE)
+def _intern(value):
+    return value
+
+def share(value):
+    if value is None:
+        return None
+    return _intern(value)
+
+@lru_cache(maxsize=INTERN_CACHE_SIZE)
+def _parse_day(value):
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+def parse_day(value):
+    """YYYY-MM-DD (or an ISO datetime) as a date, cached; None if missing or invalid."""
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    return _parse_day(value)
+
+class Task:
+    """
+    One task. Attributes mirror the tasks table; `due` and `scheduled_on`
+    are the parsed dates of `deadline` and `scheduled_date`.
+
+    Tasks can also be read like the dicts they replace (task["id"],
+    task.get("deadline"), dict(task)), limited to the fields that were
+    loaded when a query selected only some columns. to_dict() is the JSON
+    form, produced only at the API boundary.
+    """
+
+    __slots__ = TASK_FIELDS + ("_fields",)
+
+    def __init__(self, id=None, task_name=None, duration_minutes=None, priority=None, deadline=None,
+                 created_at=None, status="pending", scheduled_date=None, revision=0, _fields=TASK_FIELDS):
+        self.id = id
+        self.task_name = task_name
+        self.duration_minutes = duration_minutes
+        self.priority = share(priority)
+        self.deadline = share(deadline)
+        self.created_at = created_at
+        self.status = share(status)
+        self.scheduled_date = share(scheduled_date)
+        self.revision = revision
+        self._fields = _fields
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Task from a dict in either schema (task_name/duration_minutes or name/duration)."""
+        values = {LEGACY_FIELDS.get(k, k): v for k, v in data.items()}
+        values = {k: v for k, v in values.items() if k in _FIELD_SET}
+        return cls(**values, _fields=tuple(f for f in TASK_FIELDS if f in values))
+
+    @property
+    def due(self):
+        return parse_day(self.deadline)
+
+    @property
+    def scheduled_on(self):
+        return parse_day(self.scheduled_date)
+
+    def to_dict(self, fields=None):
+        return {f: getattr(self, f) for f in (fields or self._fields)}
+
+    # -- dict-style access ------------------------------------------------------
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return [(f, getattr(self, f)) for f in self._fields]
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self._fields:
+            return default
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if isinstance(other, Task):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Task({', '.join(f'{f}={getattr(self, f)!r}' for f in self._fields)})"
+
+def json_default(obj):
+    """`default=` hook for json.dumps that serializes Task objects."""
+    if isinstance(obj, Task):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
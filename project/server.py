@@ -0,0 +1,115 @@
+"""
+Production entry point for the web app (app.py).
+
+    python project/server.py [--host 0.0.0.0] [--port 8000] [--workers N] [--threads N]
+
+Runs under gunicorn with threaded (gthread) workers where gunicorn is
+available; elsewhere (e.g. Windows) it falls back to a threaded WSGI
+server in a single process. `gunicorn app:app` also works directly, with
+the same environment; job workers then start with the first request that
+queues a job, rather than with the process.
+
+Worker processes share nothing in memory, so state that has to be common
+to all of them lives in SQLite: tasks (TASKS_DB_PATH), chat history
+(CHAT_HISTORY_PATH) and the LLM response cache (LLM_CACHE_PATH). The
+last two default to files under project/data here.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WEB_HOST = os.environ.get("HOST", "0.0.0.0")
+WEB_PORT = int(os.environ.get("PORT", "8000"))
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Threads per worker; each request waiting on the LLM holds one
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "16"))
+WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", "120"))
+
+def _shared_state_defaults():
+    # Must run before app is imported: these modules read their config on import
+    os.environ.setdefault("CHAT_HISTORY_PATH", os.path.join("project", "data", "chat_history.db"))
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join("project", "data", "llm_cache.db"))
+
+def _load_app():
+    from app import app
+    return app
+
+def _start_jobs(worker=None):
+    # Per process, after any fork: threads don't survive one
+    from project import jobs
+    jobs.JOBS.start()
+
+def _migrate():
+    """
+    Brings the database schema up to date once, in the master, before the
+    workers fork. The master's connection is closed again so no worker
+    inherits it.
+    """
+    from project import database
+    database.close_db_connection()
+
+def run_gunicorn(host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "gthread",
+        "threads": threads,
+        "timeout": WEB_TIMEOUT,
+        "keepalive": 5,
+        # Each worker imports the app itself; SQLite connections must not
+        # be inherited across fork. The schema is migrated before forking
+        # (_migrate), and init_db serializes itself for `gunicorn app:app`
+        "preload_app": False,
+        "accesslog": os.environ.get("WEB_ACCESS_LOG"),
+        "post_worker_init": _start_jobs,
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return _load_app()
+
+    Server().run()
+
+def run_threaded(host, port):
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, _load_app(), threaded=True)
+    _start_jobs()
+    print(f"Serving on http://{host}:{port} (single process, threaded)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the task manager web app")
+    parser.add_argument("--host", default=WEB_HOST)
+    parser.add_argument("--port", type=int, default=WEB_PORT)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--threads", type=int, default=WEB_THREADS)
+    args = parser.parse_args(argv)
+
+    _shared_state_defaults()
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        if args.workers > 1:
+            print("gunicorn not available; serving from a single threaded process")
+        run_threaded(args.host, args.port)
+        return
+    _migrate()
+    run_gunicorn(args.host, args.port, args.workers, args.threads)
+
+if __name__ == "__main__":
+    main()
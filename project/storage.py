@@ -0,0 +1,347 @@
+"""
+Task storage backends behind one interface.
+
+TaskStore is what agents program against; SQLiteTaskStore wraps
+task_manager (the default, and the backend the scheduler, prioritizer and
+API use), JSONLTaskStore keeps tasks in an append-only log so an add is
+one appended line instead of a rewrite of the whole file. get_store()
+picks the backend from TASK_STORE.
+
+migrate_json() streams a legacy tasks.json array into a store in batches:
+
+    python -m project.storage migrate [data/tasks.json]
+"""
+import json
+import os
+import sys
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from project.models import TASK_FIELDS, Task
+from project.agents import task_manager
+from project.agents.prioritizer import rank_key
+
+TASK_STORE = os.environ.get("TASK_STORE", "sqlite")
+JSONL_PATH = Path(os.environ.get("TASKS_JSONL_PATH", "project/data/tasks.jsonl"))
+LEGACY_JSON = Path("data/tasks.json")
+MIGRATE_BATCH_SIZE = 1000
+
+class TaskStore(ABC):
+    """Interface shared by the storage backends. Tasks go in and come out as Task objects."""
+
+    def add(self, task):
+        """Stores a new task (an id is generated if missing) and returns it as stored."""
+        task = _prepare(task)
+        self.add_many([task])
+        return self.get(task.id)
+
+    @abstractmethod
+    def add_many(self, tasks):
+        """Stores tasks in one write (existing ids are overwritten); returns how many."""
+
+    @abstractmethod
+    def get(self, task_id):
+        """The Task with this id, or None."""
+
+    @abstractmethod
+    def all(self):
+        """Every stored task."""
+
+    @abstractmethod
+    def update(self, task_id, updates):
+        """
+        Applies `updates` to a task; returns the updated Task or None if it
+        doesn't exist. Keys outside task_manager.UPDATE_FIELDS raise ValueError.
+        """
+
+    @abstractmethod
+    def delete(self, task_id):
+        """Returns True if the task existed."""
+
+    def summary_stats(self, start, end, limit=5):
+        """
+        Summary aggregates for the window [start, end), in the shape of
+        task_manager.get_summary_stats. This version scans all(); backends
+        that can aggregate in place override it.
+        """
+        by_priority = {p: {"count": 0, "minutes": 0} for p in ("high", "medium", "low")}
+        done = 0
+        open_tasks = []
+        for task in self.all():
+            if task.status == "done":
+                done += 1
+                continue
+            open_tasks.append(task)
+            priority = (task.priority or "").lower()
+            group = by_priority[priority if priority in ("high", "low") else "medium"]
+            group["count"] += 1
+            group["minutes"] += task.duration_minutes or 0
+        open_tasks.sort(key=rank_key)
+
+        def window(matches):
+            tasks = [t for t in open_tasks if matches(t)]
+            return {"count": len(tasks), "minutes": sum(t.duration_minutes or 0 for t in tasks),
+                    "tasks": tasks[:limit]}
+
+        def within(day):
+            return day is not None and start <= day < end
+
+        return {
+            "open": len(open_tasks),
+            "done": done,
+            "open_minutes": sum(p["minutes"] for p in by_priority.values()),
+            "by_priority": by_priority,
+            "due_soon": window(lambda t: within(t.deadline)),
+            "overdue": window(lambda t: t.deadline is not None and t.deadline < start),
+            "week_minutes": window(lambda t: within(t.deadline) or within(t.scheduled_date))["minutes"],
+            "focus": open_tasks[:limit],
+        }
+
+def _prepare(task):
+    """Fills in the id / created_at a new task needs (and serializes them)."""
+    if task.id is None:
+        task.id = str(uuid.uuid4())
+    if task.created_at is None:
+        task.created_at = datetime.utcnow().isoformat()
+    # A Task built from a partial dict only serializes the keys it came with
+    fields = set(task._fields) | {"id", "created_at"}
+    task._fields = tuple(f for f in TASK_FIELDS if f in fields)
+    return task
+
+class SQLiteTaskStore(TaskStore):
+    """The tasks table, through task_manager (so change events and revisions still apply)."""
+
+    def add_many(self, tasks):
+        # import_tasks, unlike the dashboard's upsert, keeps status and created_at
+        results = task_manager.import_tasks([_prepare(t).to_dict() for t in tasks])
+        return sum(r["status"] != "error" for r in results)
+
+    def get(self, task_id):
+        return task_manager.get_task_by_id(task_id)
+
+    def all(self):
+        return task_manager.get_all_tasks()
+
+    def update(self, task_id, updates):
+        if task_manager.get_task_by_id(task_id) is None:
+            return None
+        return task_manager.update_task(task_id, updates)
+
+    def delete(self, task_id):
+        return task_manager.delete_task(task_id)
+
+    def summary_stats(self, start, end, limit=5):
+        return task_manager.get_summary_stats(start, end, limit)
+
+class JSONLTaskStore(TaskStore):
+    """
+    Append-only JSON Lines file. Each line is a full task, a partial update
+    ({"id", changed fields...}) or a deletion ({"id", "deleted": true});
+    the current state is the replay of the log, kept in memory and caught
+    up with lines appended by other processes before each operation.
+    compact() rewrites the log down to one line per live task.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or JSONL_PATH)
+        self._tasks = {}
+        self._offset = 0
+        self._revision = 0
+        self._lock = threading.Lock()
+
+    def _catch_up(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-append; pick it up next time
+                self._offset += len(line)
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, TypeError, KeyError) as e:
+                    print(f"Skipping bad line in {self.path}: {e}")
+
+    def _apply(self, record):
+        task_id = record["id"]
+        self._revision = max(self._revision, record.get("revision") or 0)
+        if record.get("deleted"):
+            self._tasks.pop(task_id, None)
+        elif task_id in self._tasks:
+            self._tasks[task_id].update(record)
+        else:
+            self._tasks[task_id] = Task.from_dict(record).to_dict()
+
+    def _append(self, records):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            for record in records:
+                self._revision += 1
+                record["revision"] = self._revision
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                self._offset += len(line)
+                self._apply(record)
+
+    def add_many(self, tasks):
+        with self._lock:
+            self._catch_up()
+            records = [_prepare(t).to_dict() for t in tasks]
+            self._append(records)
+            return len(records)
+
+    def get(self, task_id):
+        with self._lock:
+            self._catch_up()
+            data = self._tasks.get(task_id)
+        return Task.from_dict(data) if data else None
+
+    def all(self):
+        with self._lock:
+            self._catch_up()
+            return [Task.from_dict(data) for data in self._tasks.values()]
+
+    def update(self, task_id, updates):
+        with self._lock:
+            self._catch_up()
+            if task_id not in self._tasks:
+                return None
+            unknown = set(updates) - set(task_manager.UPDATE_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields {sorted(unknown)}")
+            self._append([{**Task.from_dict(updates).to_dict(), "id": task_id}])
+            return Task.from_dict(self._tasks[task_id])
+
+    def delete(self, task_id):
+        with self._lock:
+            self._catch_up()
+            if task_id not in self._tasks:
+                return False
+            self._append([{"id": task_id, "deleted": True}])
+            return True
+
+    def compact(self):
+        """
+        Rewrites the log as one line per live task (atomically, via a temp
+        file). Other processes holding the store must be restarted after.
+        """
+        with self._lock:
+            self._catch_up()
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for data in self._tasks.values():
+                    f.write(json.dumps(data, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._offset = self.path.stat().st_size
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(kind=None):
+    """The shared store for `kind` ("sqlite" or "jsonl"; default TASK_STORE)."""
+    kind = kind or TASK_STORE
+    with _stores_lock:
+        if kind not in _stores:
+            if kind == "sqlite":
+                _stores[kind] = SQLiteTaskStore()
+            elif kind == "jsonl":
+                _stores[kind] = JSONLTaskStore()
+            else:
+                raise ValueError(f"Unknown task store '{kind}'")
+        return _stores[kind]
+
+def iter_json_array(f, chunk_size=64 * 1024):
+    """
+    Yields the elements of the top-level JSON array in file `f` one at a
+    time, reading `chunk_size` characters at a time, so the file never has
+    to fit in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    fill()
+    skip(" \t\r\n")
+    if buf[pos:pos + 1] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buf):
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if not eof and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+            fill()  # a number or literal cut off by the chunk boundary
+            continue
+        pos = end
+        yield value
+
+def migrate_json(path=None, store=None, batch_size=MIGRATE_BATCH_SIZE):
+    """
+    Imports a legacy tasks.json (an array of tasks in either schema) into
+    `store` (default: the SQLite store), batch_size tasks per transaction.
+    Ids are kept, so re-running it updates rather than duplicates. The file
+    is renamed to *.migrated afterwards.
+    Returns {"imported": n, "skipped": n}.
+    """
+    path = Path(path or LEGACY_JSON)
+    store = store or get_store("sqlite")
+    imported = skipped = 0
+    batch = []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for record in iter_json_array(f):
+            task = Task.from_dict(record) if isinstance(record, dict) else None
+            if task is None or not task.task_name:
+                skipped += 1
+                continue
+            batch.append(task)
+            if len(batch) >= batch_size:
+                imported += store.add_many(batch)
+                batch = []
+        if batch:
+            imported += store.add_many(batch)
+
+    path.replace(path.with_name(path.name + ".migrated"))
+    return {"imported": imported, "skipped": skipped}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python -m project.storage migrate [path/to/tasks.json]")
+        sys.exit(1)
+    source = Path(sys.argv[2]) if len(sys.argv) > 2 else LEGACY_JSON
+    if not source.exists():
+        print(f"Nothing to migrate: {source} not found")
+        sys.exit(0)
+    result = migrate_json(source)
+    print(f"Imported {result['imported']} tasks from {source} ({result['skipped']} skipped)")
@@ -7,15 +7,25 @@ DATA_DIR = Path("data")
 TASKS_FILE = DATA_DIR / "tasks.json"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def load_tasks():
-    if not TASKS_FILE.exists():
-        return []
+def load_json(path, default=None):
+    """Parsed contents of the JSON file at `path`; `default` ([] if not given) if missing or invalid."""
+    path = Path(path)
+    if not path.exists():
+        return [] if default is None else default
     try:
-        with open(TASKS_FILE, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except (json.JSONDecodeError, IOError):
-        return []
+        return [] if default is None else default
+
+def save_json(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def load_tasks():
+    return load_json(TASKS_FILE)
 
 def save_tasks(tasks):
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, indent=2, ensure_ascii=False)
+    save_json(TASKS_FILE, tasks)
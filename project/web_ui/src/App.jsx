@@ -27,7 +27,7 @@ function App() {
                         <ChatWidget onTaskUpdate={handleTaskUpdate} />
                     </div>
                     <div className="h-[30%]">
-                        <TodaysTodo />
+                        <TodaysTodo refreshTrigger={refreshTrigger} />
                     </div>
                     <div className="h-[30%]">
                         <Notepad />
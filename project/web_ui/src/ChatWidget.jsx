@@ -1,5 +1,28 @@
 import React, { useState, useRef, useEffect } from 'react';
 
+// Reads a Server-Sent Events body from fetch(), calling onEvent(name, data) per frame
+async function readSSE(res, onEvent) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buf += decoder.decode(value, { stream: true });
+        let idx;
+        while ((idx = buf.indexOf("\n\n")) !== -1) {
+            const frame = buf.slice(0, idx);
+            buf = buf.slice(idx + 2);
+            let event = "message", data = "";
+            for (const line of frame.split("\n")) {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            }
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 export default function ChatWidget({ onTaskUpdate }) {
     const [messages, setMessages] = useState([
         { role: 'assistant', text: 'Hello! I can help you manage your tasks. Try "Add a high priority task to study".' }
@@ -25,20 +48,28 @@ export default function ChatWidget({ onTaskUpdate }) {
         setMessages(prev => [...prev, { role: 'user', text: userMsg }]);
         setLoading(true);
 
+        // Replaces the text of the streaming (last) assistant message
+        const setReply = (fn) => setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', text: fn(prev[prev.length - 1].text) }]);
+
         try {
-            const res = await fetch('/api/chat', {
+            const res = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ message: userMsg })
             });
-            const data = await res.json();
-
-            setMessages(prev => [...prev, { role: 'assistant', text: data.response }]);
+            setMessages(prev => [...prev, { role: 'assistant', text: '' }]);
+            setLoading(false);
 
-            // If the action was something that modifies tasks, trigger a refresh
-            if (['add_task', 'delete_task', 'update_task', 'reschedule_task'].includes(data.action)) {
-                if (onTaskUpdate) onTaskUpdate();
-            }
+            await readSSE(res, (event, data) => {
+                if (event === 'token') setReply(t => t + data.text);
+                if (event === 'done') {
+                    setReply(() => data.response);
+                    // If the action was something that modifies tasks, trigger a refresh
+                    if (['add_task', 'delete_task', 'update_task', 'reschedule_task'].includes(data.action)) {
+                        if (onTaskUpdate) onTaskUpdate();
+                    }
+                }
+            });
 
         } catch (err) {
             setMessages(prev => [...prev, { role: 'assistant', text: "Error connecting to server." }]);
@@ -1,8 +1,23 @@
 import React, { useState, useEffect } from 'react';
 
-export default function TodaysTodo() {
+function localDate() {
+    const d = new Date();
+    const pad = (n) => String(n).padStart(2, "0");
+    return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+}
+
+export default function TodaysTodo({ refreshTrigger }) {
     const [todos, setTodos] = useState([]);
     const [newTodo, setNewTodo] = useState("");
+    const [today, setToday] = useState(null);
+
+    // Tasks planned for today, from the server's day totals
+    useEffect(() => {
+        fetch(`/api/today?date=${localDate()}&limit=20`)
+            .then(res => res.json())
+            .then(setToday)
+            .catch(e => console.error("Failed to fetch today", e));
+    }, [refreshTrigger]);
 
     useEffect(() => {
         const saved = localStorage.getItem("planner_daily_todos");
@@ -36,6 +51,23 @@ export default function TodaysTodo() {
             </div>
 
             <div className="flex-1 overflow-y-auto p-2">
+                {today && today.count > 0 && (
+                    <div className="mb-2 pb-2 border-b">
+                        <div className="flex justify-between text-xs text-gray-500 px-2 mb-1">
+                            <span>Planned: {today.count} · {Math.round(today.minutes / 6) / 10} h</span>
+                            {today.overdue.count > 0 && <span className="text-red-600">{today.overdue.count} overdue</span>}
+                        </div>
+                        <ul className="space-y-1">
+                            {today.tasks.map(t => (
+                                <li key={t.id} className="flex items-center gap-2 px-2 py-1 text-sm text-gray-700">
+                                    <span className="flex-1 truncate">{t.task_name}</span>
+                                    <span className="text-xs text-gray-400">{t.duration_minutes}m</span>
+                                </li>
+                            ))}
+                            {today.count > today.tasks.length && <li className="px-2 text-xs text-gray-400">+{today.count - today.tasks.length} more</li>}
+                        </ul>
+                    </div>
+                )}
                 {todos.length === 0 && <div className="text-center text-gray-400 text-xs mt-4">No daily goals set.</div>}
                 <ul className="space-y-1">
                     {todos.map(t => (
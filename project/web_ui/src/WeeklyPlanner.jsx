@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 
 // Weekly Planner React component
 // Updated to use API for persistence
@@ -12,7 +12,9 @@ function uid() {
 }
 
 function isoDate(d) {
-    return d.toISOString().slice(0, 10);
+    // Local calendar date (toISOString would give the UTC one)
+    const pad = (n) => String(n).padStart(2, "0");
+    return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
 }
 
 function minutesToHM(mins) {
@@ -35,77 +37,47 @@ function defaultWeekStart() {
     return monday;
 }
 
-function scheduleTasksIntoWeek(tasks, weekStartDate) {
-    // tasks: array of {id, task_name, duration_minutes, priority, deadline (YYYY-MM-DD|null)}
-    // Note: Backend uses 'task_name', frontend used 'name'. We need to map.
-
-    const PR = { high: 0, medium: 1, low: 2 };
-    const parseDate = (s) => (s ? new Date(s + "T00:00:00") : null);
-
-    const tasksSorted = [...tasks].sort((a, b) => {
-        const da = parseDate(a.deadline);
-        const db = parseDate(b.deadline);
-        if (da && db) {
-            if (da - db !== 0) return da - db;
-        } else if (da && !db) return -1;
-        else if (!da && db) return 1;
-
-        // Default priority to medium if missing
-        const pA = a.priority ? a.priority.toLowerCase() : 'medium';
-        const pB = b.priority ? b.priority.toLowerCase() : 'medium';
-
-        if ((PR[pA] || 1) - (PR[pB] || 1) !== 0)
-            return (PR[pA] || 1) - (PR[pB] || 1);
-
-        return (Number(a.duration_minutes) || 60) - (Number(b.duration_minutes) || 60);
+function layoutWeek(days, weekStartDate, undated = []) {
+    // days: /api/week's per-day lists, already in priority order. Each
+    // day's tasks are stacked from WEEK_START_HOUR on the day they're
+    // planned for (scheduled date, else deadline) and clipped at
+    // WEEK_END_HOUR. Tasks with no date at all then go into the first
+    // day with room left for them.
+    const events = [];
+    const free = [];
+    const event = (t, dayIndex, start, end, isUndated) => ({
+        id: uid(),
+        taskId: t.id,
+        dayIndex,
+        start,
+        end,
+        summary: t.task_name,
+        priority: t.priority,
+        undated: isUndated
     });
-
-    const slots = [];
-    for (let i = 0; i < 7; i++) {
+    days.forEach((day, i) => {
         const dayStart = new Date(weekStartDate);
         dayStart.setDate(weekStartDate.getDate() + i);
         dayStart.setHours(WEEK_START_HOUR, 0, 0, 0);
-        const dayEnd = new Date(weekStartDate);
-        dayEnd.setDate(weekStartDate.getDate() + i);
+        const dayEnd = new Date(dayStart);
         dayEnd.setHours(WEEK_END_HOUR, 0, 0, 0);
-        slots.push({ start: dayStart, end: dayEnd });
-    }
-
-    const events = [];
-    for (const t of tasksSorted) {
-        const dur = Number(t.duration_minutes) || 60;
-        let placed = false;
-        for (const s of slots) {
-            const avail = (s.end - s.start) / 60000;
-            if (avail >= dur) {
-                const evStart = new Date(s.start);
-                const evEnd = new Date(evStart.getTime() + dur * 60000);
-                events.push({
-                    id: uid(),
-                    taskId: t.id,
-                    start: evStart,
-                    end: evEnd,
-                    summary: t.task_name || t.name, // Handle both keys
-                    priority: t.priority
-                });
-                s.start = new Date(evEnd);
-                placed = true;
-                break;
-            }
-        }
-        if (!placed) {
-            const lastDay = new Date(slots[6].end);
-            const evStart = new Date(lastDay);
-            const evEnd = new Date(evStart.getTime() + dur * 60000);
-            events.push({
-                id: uid(),
-                taskId: t.id,
-                start: evStart,
-                end: evEnd,
-                summary: t.task_name || t.name,
-                priority: t.priority
-            });
+        let cursor = dayStart;
+        for (const t of day.tasks) {
+            if (cursor >= dayEnd) break;
+            const dur = Number(t.duration_minutes) || 60;
+            const evEnd = new Date(Math.min(cursor.getTime() + dur * 60000, dayEnd.getTime()));
+            events.push(event(t, i, cursor, evEnd, false));
+            cursor = evEnd;
         }
+        free.push({ dayIndex: i, start: cursor, end: dayEnd });
+    });
+    for (const t of undated) {
+        const dur = Number(t.duration_minutes) || 60;
+        const slot = free.find((s) => (s.end - s.start) / 60000 >= dur);
+        if (!slot) continue;
+        const evEnd = new Date(slot.start.getTime() + dur * 60000);
+        events.push(event(t, slot.dayIndex, slot.start, evEnd, true));
+        slot.start = evEnd;
     }
     return events;
 }
@@ -127,45 +99,62 @@ function buildIcs(events) {
 
 export default function WeeklyPlanner({ refreshTrigger }) {
     const [weekStart, setWeekStart] = useState(defaultWeekStart());
-    const [tasks, setTasks] = useState([]);
+    const [week, setWeek] = useState(null);
     const [events, setEvents] = useState([]);
+    const [backlog, setBacklog] = useState(null); // loaded when "All Tasks" is opened
     const [showAdd, setShowAdd] = useState(false);
     const [form, setForm] = useState({ name: "", duration_minutes: 60, priority: "medium", deadline: "" });
     const [selectedEvent, setSelectedEvent] = useState(null);
 
-    // Fetch tasks from API
-    const fetchTasks = async () => {
+    const backlogCursorRef = useRef(null);
+
+    // Only the visible week: per-day tasks and totals, computed by the server
+    const fetchWeek = async () => {
+        try {
+            const res = await fetch(`/api/week?start=${isoDate(weekStart)}&today=${isoDate(new Date())}`);
+            setWeek(await res.json());
+        } catch (e) {
+            console.error("Failed to fetch week", e);
+        }
+    };
+
+    // The backlog, a page at a time in priority order
+    const fetchBacklog = async (more = false) => {
         try {
-            const res = await fetch('/api/tasks');
-            const data = await res.json();
-            setTasks(data);
+            const columns = "id,task_name,duration_minutes,priority,deadline,scheduled_date";
+            const cursor = more && backlogCursorRef.current ? `&cursor=${backlogCursorRef.current}` : "";
+            const res = await fetch(`/api/tasks?status=pending&limit=50&columns=${columns}${cursor}`);
+            const page = await res.json();
+            backlogCursorRef.current = page.next_cursor;
+            setBacklog((prev) => (more && prev ? [...prev, ...page.tasks] : page.tasks));
         } catch (e) {
             console.error("Failed to fetch tasks", e);
         }
     };
 
     useEffect(() => {
-        fetchTasks();
-    }, [refreshTrigger]); // Re-fetch when trigger changes
+        fetchWeek();
+        if (backlog !== null) fetchBacklog();
+    }, [refreshTrigger, weekStart]); // Re-fetch when trigger changes
 
-    // Save tasks to API
-    const saveTasksToApi = async (newTasks) => {
+    // Send changed / deleted tasks as one delta, then reload what's shown
+    const saveChanges = async (upsert, del = []) => {
         try {
             await fetch('/api/tasks', {
-                method: 'POST',
+                method: 'PATCH',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(newTasks)
+                body: JSON.stringify({ upsert, delete: del })
             });
-            setTasks(newTasks);
+            fetchWeek();
+            if (backlog !== null) fetchBacklog();
         } catch (e) {
             console.error("Failed to save tasks", e);
         }
     };
 
     useEffect(() => {
-        const ev = scheduleTasksIntoWeek(tasks, weekStart);
-        setEvents(ev);
-    }, [tasks, weekStart]);
+        setEvents(week ? layoutWeek(week.days, weekStart, week.undated.tasks) : []);
+    }, [week]);
 
     function addTaskFromForm() {
         const newTask = {
@@ -176,15 +165,13 @@ export default function WeeklyPlanner({ refreshTrigger }) {
             deadline: form.deadline || null,
             created_at: new Date().toISOString()
         };
-        const newTasks = [...tasks, newTask];
-        saveTasksToApi(newTasks);
+        saveChanges([newTask]);
         setForm({ name: "", duration_minutes: 60, priority: "medium", deadline: "" });
         setShowAdd(false);
     }
 
     function deleteTaskById(taskId) {
-        const newTasks = tasks.filter((t) => t.id !== taskId);
-        saveTasksToApi(newTasks);
+        saveChanges([], [taskId]);
     }
 
     function prevWeek() {
@@ -214,15 +201,12 @@ export default function WeeklyPlanner({ refreshTrigger }) {
     }
 
     function saveEventEdits(edited) {
-        const taskIdx = tasks.findIndex((t) => t.id === edited.taskId);
-        if (taskIdx !== -1) {
-            const t = { ...tasks[taskIdx] };
-            t.earliest_start = edited.start.toISOString();
-            const newDur = Math.round((edited.end - edited.start) / 60000);
-            t.duration_minutes = newDur;
-            const newTasks = [...tasks];
-            newTasks[taskIdx] = t;
-            saveTasksToApi(newTasks);
+        const task = week && [...week.days.flatMap((d) => d.tasks), ...week.undated.tasks].find((t) => t.id === edited.taskId);
+        if (task) {
+            // Moving the event to another day schedules the task for that day
+            const t = { ...task, scheduled_date: isoDate(edited.start) };
+            t.duration_minutes = Math.round((edited.end - edited.start) / 60000);
+            saveChanges([t]);
             setSelectedEvent(null);
         }
     }
@@ -237,6 +221,9 @@ export default function WeeklyPlanner({ refreshTrigger }) {
                     <button className="px-3 py-1 bg-gray-100 hover:bg-gray-200 rounded text-sm font-medium transition-colors" onClick={prevWeek}>Prev</button>
                     <div className="font-semibold text-lg">Week of {isoDate(weekStart)}</div>
                     <button className="px-3 py-1 bg-gray-100 hover:bg-gray-200 rounded text-sm font-medium transition-colors" onClick={nextWeek}>Next</button>
+                    {week && <div className="text-sm text-gray-500">{(week.minutes / 60).toFixed(1)} h planned</div>}
+                    {week && week.overdue.count > 0 && <div className="text-xs bg-red-100 text-red-700 px-2 py-0.5 rounded">{week.overdue.count} overdue</div>}
+                    {week && week.undated.count > 0 && <div className="text-xs bg-gray-100 text-gray-600 px-2 py-0.5 rounded">{week.undated.count} undated</div>}
                     <div className="ml-auto flex gap-2">
                         <button className="px-4 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-md text-sm font-medium shadow-sm transition-colors" onClick={() => setShowAdd(true)}>+ Add Task</button>
                         <button className="px-4 py-2 bg-green-600 hover:bg-green-700 text-white rounded-md text-sm font-medium shadow-sm transition-colors" onClick={exportIcs}>Export .ics</button>
@@ -246,25 +233,35 @@ export default function WeeklyPlanner({ refreshTrigger }) {
                 <div className="flex-1 overflow-auto">
                     <div className="grid grid-cols-8 gap-0 min-w-[800px]">
                         <div className="border-r border-b p-2 bg-gray-50 text-xs text-gray-500 font-medium uppercase tracking-wider text-center py-3 sticky top-0 z-20">Time</div>
-                        {DAYS.map((d, i) => (
-                            <div key={d} className="border-r border-b p-2 text-center bg-white sticky top-0 z-20 shadow-sm">
-                                <div className="text-sm font-semibold text-gray-900">{d}</div>
-                                <div className="text-xs text-gray-500 mt-1">{isoDate(new Date(weekStart).setDate(weekStart.getDate() + i)).slice(5)}</div>
-                            </div>
-                        ))}
+                        {DAYS.map((d, i) => {
+                            const day = week && week.days[i];
+                            const shown = events.filter((ev) => ev.dayIndex === i && !ev.undated).length;
+                            const date = new Date(weekStart);
+                            date.setDate(weekStart.getDate() + i);
+                            return (
+                                <div key={d} className="border-r border-b p-2 text-center bg-white sticky top-0 z-20 shadow-sm">
+                                    <div className="text-sm font-semibold text-gray-900">{d}</div>
+                                    <div className="text-xs text-gray-500 mt-1">{isoDate(date).slice(5)}</div>
+                                    {day && day.count > 0 && (
+                                        <div className="text-[10px] text-gray-500 mt-0.5">
+                                            {day.count} · {minutesToHM(day.minutes)}
+                                            {day.count > shown && ` (+${day.count - shown})`}
+                                        </div>
+                                    )}
+                                </div>
+                            );
+                        })}
 
                         {hours.map((h) => (
                             <React.Fragment key={h}>
                                 <div className="border-r border-b p-2 text-xs text-gray-500 bg-gray-50 text-right pr-3 -mt-2.5">{String(h).padStart(2, '0')}:00</div>
                                 {DAYS.map((d, i) => (
                                     <div key={d + h} className="border-r border-b min-h-[60px] relative group hover:bg-gray-50 transition-colors">
-                                        {events.filter(ev => {
-                                            const dayIndex = Math.floor((ev.start - weekStart) / (24 * 60 * 60 * 1000));
-                                            return dayIndex === i && ev.start.getHours() === h;
-                                        }).map(ev => (
+                                        {events.filter(ev => ev.dayIndex === i && ev.start.getHours() === h).map(ev => (
                                             <div key={ev.id}
                                                 className={`absolute left-1 right-1 top-1 rounded p-2 text-xs shadow-sm border cursor-pointer transition-all hover:shadow-md hover:scale-[1.02] z-10
-                            ${ev.priority === 'high' ? 'bg-red-100 border-red-200 text-red-800' : ev.priority === 'medium' ? 'bg-blue-100 border-blue-200 text-blue-800' : 'bg-green-100 border-green-200 text-green-800'}`}
+                            ${ev.priority === 'high' ? 'bg-red-100 border-red-200 text-red-800' : ev.priority === 'medium' ? 'bg-blue-100 border-blue-200 text-blue-800' : 'bg-green-100 border-green-200 text-green-800'}
+                            ${ev.undated ? 'border-dashed opacity-80' : ''}`}
                                                 onClick={() => openEditEvent(ev)}>
                                                 <div className="font-semibold truncate">{ev.summary}</div>
                                                 <div className="text-[10px] opacity-80">{minutesToHM((ev.end - ev.start) / 60000)}m</div>
@@ -281,11 +278,13 @@ export default function WeeklyPlanner({ refreshTrigger }) {
                 <div className="p-4 border-t bg-gray-50 max-h-60 overflow-y-auto flex-shrink-0">
                     <div className="flex items-center justify-between mb-3">
                         <h3 className="font-semibold text-gray-800">All Tasks</h3>
-                        <div className="text-xs text-gray-500">Manage your backlog here</div>
+                        {backlog === null
+                            ? <button className="text-xs text-blue-600 hover:underline" onClick={() => fetchBacklog()}>Show</button>
+                            : <div className="text-xs text-gray-500">Manage your backlog here</div>}
                     </div>
-                    <div className="grid gap-2">
-                        {tasks.map(t => (
-                            <div key={t.id} className="p-3 bg-white border rounded-md shadow-sm flex justify-between items-center hover:shadow-md transition-shadow">
+                    {backlog !== null && <div className="grid gap-2">
+                        {backlog.map(t => (
+                            <div key={t.id} className="group p-3 bg-white border rounded-md shadow-sm flex justify-between items-center hover:shadow-md transition-shadow">
                                 <div>
                                     <div className="font-medium text-gray-900">{t.task_name || t.name}</div>
                                     <div className="text-xs text-gray-500 mt-0.5 flex items-center gap-2">
@@ -299,8 +298,9 @@ export default function WeeklyPlanner({ refreshTrigger }) {
                                 </div>
                             </div>
                         ))}
-                        {tasks.length === 0 && <div className="text-center text-gray-400 text-sm py-4">No tasks yet. Add one to get started!</div>}
-                    </div>
+                        {backlog.length === 0 && <div className="text-center text-gray-400 text-sm py-4">No tasks yet. Add one to get started!</div>}
+                        {backlogCursorRef.current && <button className="text-xs text-blue-600 hover:underline py-1" onClick={() => fetchBacklog(true)}>Load more</button>}
+                    </div>}
                 </div>
 
                 {/* add modal */}
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Keep the tests off project/data: every module importing the database
+# gets a throwaway file, and no job workers are started
+os.environ.setdefault("TASKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="tasks_tests_"), "tasks.db"))
+os.environ.setdefault("JOB_WORKERS", "0")
@@ -0,0 +1,172 @@
+import unittest
+from datetime import date
+from unittest import mock
+
+import app as flask_app
+from project import jobs, metrics
+from project.agents import scheduler, task_manager
+from project.database import db_session
+
+class ApiTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        self.client = flask_app.app.test_client()
+
+class BulkSyncTest(ApiTestCase):
+    def test_post_upserts_in_one_call(self):
+        task_manager.upsert_tasks([{"id": "s1", "task_name": "old name"}])
+        resp = self.client.post("/api/tasks", json=[
+            {"id": "s1", "task_name": "new name"},
+            {"id": "s2", "task_name": "fresh", "duration_minutes": 20},
+            {"id": "s3"},
+        ])
+        self.assertEqual(resp.get_json()["results"], [
+            {"id": "s1", "status": "updated"},
+            {"id": "s2", "status": "created"},
+            {"id": "s3", "status": "error", "error": "task_name is required"},
+        ])
+        self.assertEqual(sorted((t.id, t.task_name) for t in task_manager.get_all_tasks()),
+                         [("s1", "new name"), ("s2", "fresh")])
+
+class DeltaSyncTest(ApiTestCase):
+    def test_unchanged_list_is_not_modified(self):
+        task_manager.upsert_tasks([{"id": "d1", "task_name": "water plants"}])
+        first = self.client.get("/api/tasks")
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get("/api/tasks", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
+
+        task_manager.upsert_tasks([{"id": "d2", "task_name": "feed cat"}])
+        changed = self.client.get("/api/tasks", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertGreater(int(changed.headers["X-Revision"]), int(first.headers["X-Revision"]))
+
+    def test_changes_since_a_revision(self):
+        task_manager.upsert_tasks([{"id": "d1", "task_name": "a"}, {"id": "d2", "task_name": "b"}])
+        since = int(self.client.get("/api/tasks").headers["X-Revision"])
+
+        resp = self.client.patch("/api/tasks", json={"upsert": [{"id": "d1", "task_name": "a2"}],
+                                                     "delete": ["d2", "missing"]})
+        result = resp.get_json()
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(resp.headers["X-Revision"], str(result["revision"]))
+
+        delta = self.client.get(f"/api/tasks?since={since}").get_json()
+        self.assertEqual([(t["id"], t["task_name"]) for t in delta["tasks"]], [("d1", "a2")])
+        self.assertEqual(delta["deleted"], ["d2"])
+        self.assertEqual(self.client.get(f"/api/tasks?since={delta['revision']}").get_json(),
+                         {"revision": delta["revision"], "tasks": [], "deleted": []})
+
+    def test_bad_delta_is_rejected(self):
+        for body in ([], {"upsert": [1]}, {"delete": [1]}):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.patch("/api/tasks", json=body).status_code, 400)
+
+class AsyncChatTest(ApiTestCase):
+    def test_without_workers_the_reply_is_inline(self):
+        self.assertFalse(jobs.JOBS.running)  # JOB_WORKERS=0 under the tests
+        resp = self.client.post("/api/chat?async=1", json={"message": "add water plants 10 min"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["action"], "add_task")
+        self.assertEqual([t.task_name for t in task_manager.get_all_tasks()], ["water plants"])
+
+    def test_with_workers_a_job_is_queued(self):
+        with mock.patch.object(jobs.JOBS, "start"), mock.patch.object(jobs.JOBS, "running", True), \
+                mock.patch.object(jobs.JOBS, "enqueue", return_value="job-1") as enqueue:
+            resp = self.client.post("/api/chat", json={"message": "add water plants", "async": True})
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.headers["Location"], "/api/jobs/job-1")
+        self.assertEqual(enqueue.call_args.args[0], "chat")
+
+class RequestSpanTest(ApiTestCase):
+    def record_spans(self):
+        ended = []
+        real_exit = metrics.span.__exit__
+
+        def exit_span(span, *exc_info):
+            ended.append((span.name, span.labels))
+            return real_exit(span, *exc_info)
+        patcher = mock.patch.object(metrics.span, "__exit__", exit_span)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return ended
+
+    def test_span_ends_with_the_response(self):
+        ended = self.record_spans()
+        self.client.get("/api/tasks")
+        self.assertIn(("http.request", ("GET", "/api/tasks", "200")), ended)
+
+    def test_streamed_span_covers_the_body(self):
+        ended = self.record_spans()
+        resp = self.client.get("/api/schedule.ics", buffered=False)
+        self.assertTrue(resp.is_streamed)
+        self.assertNotIn("http.request", [name for name, _ in ended])
+        self.assertIn(b"BEGIN:VCALENDAR", resp.get_data())
+        resp.close()
+        self.assertIn(("http.request", ("GET", "/api/schedule.ics", "200")), ended)
+
+class CalendarEtagTest(ApiTestCase):
+    def test_calendar_etag_is_weak(self):
+        resp = self.client.get("/api/schedule.ics")
+        etag, weak = resp.get_etag()
+        self.assertTrue(weak)
+        again = self.client.get("/api/schedule.ics", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.get_etag(), (etag, True))
+
+class ScheduleTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        # Shared placements don't see tasks cleared behind task_manager's back
+        scheduler.reset_incremental_schedulers()
+
+    def test_calendar_follows_task_changes(self):
+        first = self.client.get("/api/schedule.ics?start=2026-10-19")
+        self.assertNotIn("BEGIN:VEVENT", first.get_data(as_text=True))
+        task_manager.add_task("write report", duration_minutes=90)
+        second = self.client.get("/api/schedule.ics?start=2026-10-19",
+                                 headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.get_etag(), first.get_etag())
+        self.assertIn("SUMMARY:write report\r\n", second.get_data(as_text=True))
+
+    def test_free_and_busy_cover_the_working_hours(self):
+        task = task_manager.add_task("write report", duration_minutes=90)
+        view = self.client.get("/api/schedule/free?start=2026-10-19").get_json()
+        self.assertEqual([(b["task_id"], b["start"], b["end"]) for b in view["busy"]],
+                         [(task.id, "2026-10-19T09:00:00", "2026-10-19T10:30:00")])
+        self.assertEqual(view["free"][0], {"start": "2026-10-19T10:30:00", "end": "2026-10-19T18:00:00",
+                                           "minutes": 450})
+        self.assertEqual(sum(slot["minutes"] for slot in view["free"]) + 90, 7 * 9 * 60)
+        self.assertEqual(self.client.get("/api/schedule/free?start=2026-10-19&min_minutes=500")
+                         .get_json()["free"][0]["start"], "2026-10-20T09:00:00")
+
+    def test_bad_horizon_is_rejected(self):
+        for query in ("weeks=0", "weeks=53", "start=next-week"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/schedule/free?{query}").status_code, 400)
+                self.assertEqual(self.client.get(f"/api/schedule.ics?{query}").status_code, 400)
+
+class LimitTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        today = date.today().isoformat()
+        task_manager.upsert_tasks([{"id": f"t{i}", "task_name": f"task {i}", "duration_minutes": 30,
+                                    "scheduled_date": today} for i in range(3)])
+
+    def test_non_positive_limit_lists_one_task(self):
+        for limit in (0, -1):
+            with self.subTest(limit=limit):
+                view = self.client.get(f"/api/today?limit={limit}").get_json()
+                self.assertEqual((view["count"], len(view["tasks"])), (3, 1))
+                page = self.client.get(f"/api/tasks?status=pending&limit={limit}").get_json()
+                self.assertEqual(len(page["tasks"]), 1)
+                self.assertIsNotNone(page["next_cursor"])
+
+    def test_bad_page_limit_is_rejected(self):
+        self.assertEqual(self.client.get("/api/tasks?limit=many").status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from datetime import date
+
+from benchmarks.generate import START, generate_tasks
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class GenerateTest(unittest.TestCase):
+    def test_reproducible_with_the_requested_mix(self):
+        tasks = generate_tasks(2000, seed=3, deadline_share=0.5, overdue_share=0.2, priority_weights=(1, 0, 1))
+        self.assertEqual(tasks, generate_tasks(2000, seed=3, deadline_share=0.5, overdue_share=0.2,
+                                               priority_weights=(1, 0, 1)))
+        self.assertNotEqual(tasks, generate_tasks(2000, seed=4))
+        deadlines = [date.fromisoformat(t["deadline"]) for t in tasks if t["deadline"]]
+        self.assertAlmostEqual(len(deadlines) / 2000, 0.5, delta=0.05)
+        self.assertAlmostEqual(sum(d < START for d in deadlines) / len(deadlines), 0.2, delta=0.05)
+        self.assertEqual(set(Counter(t["priority"] for t in tasks)), {"high", "low"})
+        self.assertFalse(any(t["deadline"] and t["scheduled_date"] for t in tasks))
+
+class SuiteTest(unittest.TestCase):
+    """Runs a few cheap cases of benchmarks/suite.py end to end."""
+
+    def suite(self, *args):
+        return subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "suite.py"), "--size", "30",
+                               "--repeat", "1", "--only", "crud.add,crud.get", *args],
+                              cwd=tempfile.mkdtemp(prefix="bench_suite_test_"), capture_output=True, text=True,
+                              timeout=120)
+
+    def test_results_and_baseline_comparison(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_suite_test_"), "base.json")
+        run = self.suite("--json", path)
+        self.assertEqual(run.returncode, 0, run.stderr)
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(set(report["results"]), {"crud.add_task", "crud.get_all_tasks"})
+        self.assertEqual(report["meta"]["size"], 30)
+
+        # A baseline far faster than anything real makes every case a regression
+        for result in report["results"].values():
+            result["median_ms"] = 1e-6
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        run = self.suite("--baseline", path)
+        self.assertEqual(run.returncode, 1, run.stderr)
+        self.assertIn("2 regressions", run.stdout)
+
+if __name__ == "__main__":
+    unittest.main()
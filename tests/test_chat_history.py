@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import app as flask_app
+from project import chat_history
+from project.agents import ai_agent
+from project.chat_history import ChatHistoryStore
+from project.database import db_session
+
+def texts(messages):
+    return [m["text"] for m in messages]
+
+class ChatHistoryStoreTest(unittest.TestCase):
+    def test_each_session_keeps_its_last_messages(self):
+        store = ChatHistoryStore(max_messages=3)
+        for i in range(5):
+            store.append("a", "user", f"a{i}")
+        store.append("b", "assistant", "b0")
+        self.assertEqual(texts(store.get("a")), ["a2", "a3", "a4"])
+        self.assertEqual(store.get("b"), [{"role": "assistant", "text": "b0"}])
+        store.append("a", "user", "x" * 10000)
+        self.assertEqual(len(store.get("a")[-1]["text"]), chat_history.CHAT_MAX_MESSAGE_CHARS)
+
+    def test_sessions_are_an_lru_with_a_ttl(self):
+        store = ChatHistoryStore(max_sessions=2, ttl=60)
+        for session_id in ("a", "b"):
+            store.append(session_id, "user", session_id)
+        store.get("a")
+        store.append("c", "user", "c")  # evicts b, the least recently used
+        self.assertEqual((texts(store.get("a")), texts(store.get("b"))), (["a"], []))
+        later = time.time() + 61
+        with mock.patch.object(chat_history.time, "time", return_value=later):
+            self.assertEqual(store.get("a"), [])
+            store.prune()
+        self.assertEqual(store.stats()["sessions"], 1)
+
+    def test_sqlite_history_is_shared_and_trimmed(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="chat_history_test_"), "chat.db")
+        first, second = ChatHistoryStore(max_messages=3, path=path), ChatHistoryStore(max_messages=3, path=path)
+        for i in range(5):
+            (first if i % 2 else second).append("s", "user", f"m{i}")
+        self.assertEqual(texts(first.get("s")), ["m2", "m3", "m4"])
+        self.assertEqual(first._db.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0], 3)
+        second.clear("s")
+        self.assertEqual(first.get("s"), [])
+
+class PromptHistoryTest(unittest.TestCase):
+    def test_history_is_cut_to_the_token_budget(self):
+        history = [{"role": "user", "text": f"message {i} " + "x" * 30} for i in range(100)]
+        text = ai_agent.build_history(history, budget=50)
+        self.assertTrue(text.endswith("USER: message 99 " + "x" * 30 + "\n"))
+        self.assertLessEqual(sum(ai_agent.estimate_tokens(line + "\n") for line in text.splitlines()), 50)
+        self.assertNotIn("message 95", text)
+        self.assertEqual(ai_agent.build_history(None), "")
+
+class ChatSessionTest(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        self.client = flask_app.app.test_client()
+
+    def test_cookie_keeps_a_conversation_apart(self):
+        resp = self.client.post("/api/chat", json={"message": "add water plants 10 min"})
+        session_id = resp.headers["Set-Cookie"].split(";")[0].split("=")[1]
+        self.client.post("/api/chat", json={"message": "add sort mail 5 min"})
+        self.client.post("/api/chat", json={"message": "add feed cat 5 min", "session_id": "other"})
+        self.assertEqual(texts(flask_app.CHAT_HISTORY.get(session_id))[::2],
+                         ["add water plants 10 min", "add sort mail 5 min"])
+        self.assertEqual(texts(flask_app.CHAT_HISTORY.get("other"))[::2], ["add feed cat 5 min"])
+
+if __name__ == "__main__":
+    unittest.main()
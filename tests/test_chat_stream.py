@@ -0,0 +1,82 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import app as flask_app
+from project import llm_wrapper
+from project.agents import ai_agent, task_manager
+from project.agents.ai_agent import ResponseFieldExtractor
+from project.database import db_session
+
+REPLY = json.dumps({
+    "action": "chat",
+    "parameters": {"response": "nested, not relayed"},
+    "response": "Café \"quoted\"\nnext line \\ done",
+})
+
+def feed_in_chunks(text, size):
+    extractor = ResponseFieldExtractor()
+    return "".join(extractor.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+class ResponseFieldExtractorTest(unittest.TestCase):
+    def test_any_chunking_yields_the_decoded_field(self):
+        expected = json.loads(REPLY)["response"]
+        for size in (1, 2, 3, 5, len(REPLY)):
+            with self.subTest(size=size):
+                self.assertEqual(feed_in_chunks(REPLY, size), expected)
+
+    def test_unicode_escape_split_across_chunks(self):
+        self.assertEqual(feed_in_chunks('{"response": "\\u00e9t\\u00e9"}', 1), "été")
+
+    def test_response_as_a_value_is_not_a_key(self):
+        self.assertEqual(feed_in_chunks('{"action": "response", "x": ["response"], "response": "yes"}', 4), "yes")
+
+class SseParsingTest(unittest.TestCase):
+    def test_events_split_across_chunks(self):
+        async def chunks():
+            for chunk in (b"data: {\"a\"", b": 1}\r\n\r\ndata: line one\n", b"data: line two\n\n: comment\n\n",
+                          b"data: last\n"):
+                yield chunk
+
+        async def collect():
+            return [event async for event in llm_wrapper._iter_sse_data(chunks())]
+        self.assertEqual(asyncio.run(collect()), ['{"a": 1}', "line one\nline two", "last"])
+
+class ChatStreamEndpointTest(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        self.client = flask_app.app.test_client()
+
+    def events(self, message, deltas=None):
+        with mock.patch.object(ai_agent, "stream_llm_system", lambda prompt: iter(deltas or [])):
+            resp = self.client.post("/api/chat/stream", json={"message": message})
+        self.assertEqual(resp.mimetype, "text/event-stream")
+        events = []
+        for block in resp.get_data(as_text=True).strip().split("\n\n"):
+            kind, data = block.split("\n")
+            events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+        return events
+
+    def test_tokens_then_done(self):
+        deltas = [REPLY[i:i + 7] for i in range(0, len(REPLY), 7)]
+        events = self.events("how is my week looking?", deltas)
+        tokens = [data["text"] for kind, data in events if kind == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), json.loads(REPLY)["response"])
+        self.assertEqual(events[-1], ("done", {"response": json.loads(REPLY)["response"], "action": "chat"}))
+
+    def test_fast_path_applies_the_action(self):
+        events = self.events("add water plants 10 min")
+        self.assertEqual(events[-1][0], "done")
+        self.assertEqual(events[-1][1]["action"], "add_task")
+        self.assertEqual([t.task_name for t in task_manager.get_all_tasks()], ["water plants"])
+
+    def test_failed_stream_falls_back_to_the_local_parser(self):
+        failure = llm_wrapper._error_response("LLM API Error: upstream unavailable")
+        events = self.events("remind me to pay rent by the 1st", [failure])
+        self.assertEqual(events[-1][1]["action"], "add_task")
+
+if __name__ == "__main__":
+    unittest.main()
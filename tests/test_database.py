@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from project.database import after_commit, db_session, get_db_connection
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class DbSessionTest(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+
+    def count_from_another_connection(self):
+        conn = get_db_connection()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        finally:
+            conn.close()
+
+    def insert(self, conn, task_id):
+        conn.execute("INSERT INTO tasks (id, task_name) VALUES (?, 'x')", (task_id,))
+
+    def test_wal_mode(self):
+        with db_session() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_connection_is_reused_per_thread(self):
+        with db_session() as first:
+            pass
+        with db_session() as second:
+            self.assertIs(first, second)
+        other = []
+
+        def run():
+            with db_session() as conn:
+                other.append(conn)
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+
+    def test_nested_sessions_commit_once(self):
+        with db_session() as conn:
+            with db_session() as inner:
+                self.insert(inner, "n1")
+            self.assertEqual(self.count_from_another_connection(), 0)
+            self.insert(conn, "n2")
+        self.assertEqual(self.count_from_another_connection(), 2)
+
+    def test_error_rolls_back_the_whole_session(self):
+        with self.assertRaises(RuntimeError):
+            with db_session() as conn:
+                self.insert(conn, "r1")
+                with db_session() as inner:
+                    self.insert(inner, "r2")
+                    raise RuntimeError("boom")
+        self.assertEqual(self.count_from_another_connection(), 0)
+
+    def test_after_commit(self):
+        calls = []
+        with db_session():
+            after_commit(lambda: calls.append("committed"))
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ["committed"])
+
+        with self.assertRaises(RuntimeError):
+            with db_session():
+                after_commit(lambda: calls.append("rolled back"))
+                raise RuntimeError("boom")
+        self.assertEqual(calls, ["committed"])
+
+class MigrationTest(unittest.TestCase):
+    def test_workers_starting_together_migrate_once(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="migration_test_"), "tasks.db")
+        conn = sqlite3.connect(path)
+        # The tasks table as it was before the revision column
+        conn.execute('''
+            CREATE TABLE tasks (
+                id TEXT PRIMARY KEY, task_name TEXT NOT NULL, duration_minutes INTEGER, priority TEXT,
+                deadline TEXT, created_at TEXT, status TEXT DEFAULT 'pending', scheduled_date TEXT
+            )
+        ''')
+        conn.executemany("INSERT INTO tasks (id, task_name, duration_minutes) VALUES (?, ?, 30)",
+                         [(f"t{i}", f"task {i}") for i in range(500)])
+        conn.commit()
+        conn.close()
+
+        env = dict(os.environ, TASKS_DB_PATH=path)
+        workers = [subprocess.Popen([sys.executable, "-c", "import project.database"], cwd=ROOT, env=env,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) for _ in range(6)]
+        errors = [w.communicate(timeout=60)[1].decode() for w in workers]
+        self.assertEqual([w.returncode for w in workers], [0] * 6, errors)
+
+        conn = sqlite3.connect(path)
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+            self.assertEqual(columns.count("revision"), 1)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0], 500)
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from project.agents.scheduler import iter_ics, write_ics
+
+EVENT = {"uid": "t1", "start": datetime(2026, 10, 19, 9), "end": datetime(2026, 10, 19, 10),
+         "summary": "Café; lunch, notes\\draft\n" + "é" * 60}
+
+def unfold(text):
+    return text.replace("\r\n ", "")
+
+class IcsTest(unittest.TestCase):
+    def test_lines_are_folded_and_text_escaped(self):
+        text = "".join(iter_ics([EVENT], dtstamp=datetime(2026, 10, 18, 12)))
+        lines = text.split("\r\n")
+        self.assertEqual(lines[-1], "")
+        self.assertTrue(all(len(line.encode("utf-8")) <= 75 for line in lines))
+        self.assertIn("SUMMARY:Café\\; lunch\\, notes\\\\draft\\n" + "é" * 60 + "\r\n", unfold(text))
+        self.assertIn("DTSTART:20261019T090000\r\nDTEND:20261019T100000\r\n", text)
+        self.assertIn("DTSTAMP:20261018T120000Z\r\n", text)
+
+    def test_write_replaces_the_file_whole(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="ics_test_"), "schedule.ics")
+        write_ics([EVENT], path)
+        write_ics([], path)
+        with open(path, encoding="utf-8", newline="") as f:
+            self.assertNotIn("BEGIN:VEVENT", f.read())
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["schedule.ics"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import random
+import unittest
+from datetime import date
+
+from project.agents import task_manager
+from project.agents.prioritizer import get_prioritized_tasks
+from project.agents.scheduler import IncrementalScheduler, schedule_tasks
+from project.database import db_session
+
+START = date(2026, 10, 19)
+ONE_DAY = {day: [("09:00", "12:00")] for day in range(7)}
+
+class IncrementalSchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+            conn.execute("DELETE FROM deleted_tasks")
+
+    def scheduler(self, **kwargs):
+        scheduler = IncrementalScheduler(START, **kwargs)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def placed(self, result):
+        return {e["task_id"] for e in result["events"]}
+
+class RepairTest(IncrementalSchedulerTestCase):
+    def test_random_changes_stay_consistent_without_rebuilds(self):
+        rng = random.Random(11)
+        scheduler = self.scheduler(days=14)
+        ids = []
+        for step in range(150):
+            roll = rng.random()
+            if roll < 0.5 or not ids:
+                deadline = rng.choice([None, "2026-10-21", "2026-10-25", "2026-11-30"])
+                task = task_manager.add_task(f"task {step}", duration_minutes=rng.choice([30, 60, 120, 240]),
+                                             deadline=deadline, priority=rng.choice(["high", "medium", "low"]))
+                ids.append(task.id)
+            elif roll < 0.8:
+                task_manager.update_task(rng.choice(ids), rng.choice([
+                    {"priority": rng.choice(["high", "low"])},
+                    {"duration_minutes": rng.choice([15, 90, 300])},
+                    {"scheduled_date": rng.choice([None, "2026-10-23"])},
+                    {"status": "done"}]))
+            else:
+                task_manager.delete_task(ids.pop(rng.randrange(len(ids))))
+            self.assertEqual(scheduler.check(repair=False), [], f"after step {step}")
+
+        result = scheduler.result()
+        self.assertEqual(scheduler.rebuilds, 1)
+        self.assertEqual(result["revision"], task_manager.get_revision())
+        open_ids = {t["id"] for t in get_prioritized_tasks() if (t["status"] or "pending") != "done"}
+        overflow = {o["task_id"] for o in result["overflow"]}
+        self.assertEqual(self.placed(result) | overflow, open_ids)
+        self.assertFalse(self.placed(result) & overflow)
+
+    def test_higher_ranked_task_evicts_the_lowest(self):
+        scheduler = self.scheduler(days=1, working_hours=ONE_DAY)
+        for name, priority in (("medium one", "medium"), ("low one", "low"), ("medium two", "medium")):
+            task_manager.add_task(name, duration_minutes=60, priority=priority)
+        urgent = task_manager.add_task("urgent", duration_minutes=60, priority="high")
+
+        result = scheduler.result()
+        self.assertIn(urgent.id, self.placed(result))
+        self.assertEqual([o["task_name"] for o in result["overflow"]], ["low one"])
+
+        task_manager.delete_task(urgent.id)
+        result = scheduler.result()
+        self.assertEqual(result["overflow"], [])
+        self.assertEqual(scheduler.check(repair=False), [])
+
+    def test_final_placement_matches_a_full_recompute_for_appends(self):
+        # Tasks added in rank order never evict anything, so the repaired
+        # placement is exactly what schedule_tasks computes from scratch
+        scheduler = self.scheduler(days=7, split=False)
+        for i, minutes in enumerate([240, 120, 300, 60, 480, 30, 180, 90] * 3):
+            task_manager.add_task(f"task {i:02d}", duration_minutes=minutes, deadline=f"2026-12-{i + 1:02d}")
+        full = schedule_tasks(get_prioritized_tasks(), START, days=7, split=False)
+        result = scheduler.result()
+        strip = lambda events: [(e["task_id"], e["start"], e["end"]) for e in events]
+        self.assertEqual(strip(result["events"]), strip(full["events"]))
+        self.assertEqual(result["overflow"], full["overflow"])
+
+class CatchUpTest(IncrementalSchedulerTestCase):
+    def test_unsubscribed_scheduler_catches_up_from_the_change_feed(self):
+        scheduler = self.scheduler(subscribe=False)
+        kept = task_manager.add_task("kept", duration_minutes=60)
+        gone = task_manager.add_task("gone", duration_minutes=60)
+        task_manager.delete_task(gone.id)
+
+        result = scheduler.result()
+        self.assertEqual(self.placed(result), {kept.id})
+        self.assertEqual((scheduler.rebuilds, scheduler.repairs), (1, 1))
+
+    def test_check_repairs_a_corrupted_placement(self):
+        scheduler = self.scheduler()
+        task = task_manager.add_task("write report", duration_minutes=60)
+        scheduler._pieces[task.id] = [(0, 60)]  # midnight, outside working hours
+        self.assertTrue(scheduler.check())
+        self.assertEqual(scheduler.rebuilds, 2)
+        self.assertEqual(scheduler.check(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from datetime import date
+
+from project.agents.intent_parser import FAST_PATH_THRESHOLD, parse_intent
+
+TODAY = date(2026, 10, 14)  # a Wednesday
+
+class ParseAddTest(unittest.TestCase):
+    def parse(self, message):
+        parsed, confidence = parse_intent(message, TODAY)
+        self.assertIsNotNone(parsed)
+        self.assertEqual(parsed["action"], "add_task")
+        return parsed["parameters"], confidence
+
+    def test_date_word_is_cut_from_the_name(self):
+        params, confidence = self.parse("add buy milk tomorrow")
+        self.assertEqual(params["task_name"], "buy milk")
+        self.assertEqual(params["scheduled_date"], "2026-10-15")
+        self.assertGreaterEqual(confidence, FAST_PATH_THRESHOLD)
+
+    def test_deadline_duration_and_priority(self):
+        params, _ = self.parse("add write report due friday 45 min high priority")
+        self.assertEqual(params["task_name"], "write report")
+        self.assertEqual(params["deadline"], "2026-10-16")
+        self.assertEqual(params["duration_minutes"], 45)
+        self.assertEqual(params["priority"], "high")
+
+    def test_possessive_date_word_stays_in_the_name(self):
+        for message in ("add read today's paper", "add read today’s paper"):
+            params, confidence = self.parse(message)
+            self.assertEqual(params["task_name"], message[4:])
+            self.assertNotIn("scheduled_date", params)
+            self.assertGreaterEqual(confidence, FAST_PATH_THRESHOLD)
+
+    def test_possessive_next_to_a_real_date(self):
+        params, _ = self.parse("add review friday's notes due monday")
+        self.assertEqual(params["task_name"], "review friday's notes")
+        self.assertEqual(params["deadline"], "2026-10-19")
+
+    def test_ambiguous_message_is_left_to_the_llm(self):
+        _, confidence = self.parse("add gym every monday")
+        self.assertLess(confidence, FAST_PATH_THRESHOLD)
+
+class FalsePositiveTest(unittest.TestCase):
+    """Messages that must not be written straight to the DB as new tasks."""
+
+    def test_not_an_add(self):
+        for message in ("I need to know what's due tomorrow", "put it off until monday", "new york trip ideas",
+                        "schedule dentist friday"):
+            with self.subTest(message=message):
+                self.assertEqual(parse_intent(message, TODAY), (None, 0.0))
+
+    def test_partial_parse_is_left_to_the_llm(self):
+        for message in ("remind me to pay rent by the 1st", "add buy 2 m of rope", "add walk dog 2 h"):
+            with self.subTest(message=message):
+                _, confidence = parse_intent(message, TODAY)
+                self.assertLess(confidence, FAST_PATH_THRESHOLD)
+
+    def test_explicit_imperatives(self):
+        for message in ("create task fix sink", "remind me to fix sink", "add a new task: fix sink"):
+            with self.subTest(message=message):
+                parsed, confidence = parse_intent(message, TODAY)
+                self.assertEqual(parsed["parameters"]["task_name"], "fix sink")
+                self.assertGreaterEqual(confidence, FAST_PATH_THRESHOLD)
+
+    def test_invalid_date_is_no_parse(self):
+        for message in ("move abc1234 to 2026-02-30", "add file taxes due 2026-13-01"):
+            with self.subTest(message=message):
+                self.assertEqual(parse_intent(message, TODAY), (None, 0.0))
+
+if __name__ == "__main__":
+    unittest.main()
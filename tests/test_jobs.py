@@ -0,0 +1,126 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import app as flask_app
+from project import jobs
+from project.jobs import JobQueue
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ran = []
+        handlers = mock.patch.dict(jobs._handlers)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+        @jobs.job_handler("test.echo")
+        def echo(value=None):
+            self.ran.append(value)
+            return {"value": value}
+
+        @jobs.job_handler("test.local", local=True)
+        def local(value=None):
+            self.ran.append(value)
+
+        @jobs.job_handler("test.fail")
+        def fail():
+            raise RuntimeError("boom")
+
+        self.path = os.path.join(tempfile.mkdtemp(prefix="jobs_test_"), "jobs.db")
+        self.queue = JobQueue(self.path)
+
+    def other_process(self, pid=None):
+        """A second queue on the same database, as another worker process would have."""
+        queue = JobQueue(self.path)
+        queue.pid = pid if pid is not None else os.getpid() + 1
+        return queue
+
+    def age(self, job_id, **columns):
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        self.queue._db().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+class QueueTest(JobQueueTestCase):
+    def test_identical_waiting_jobs_are_merged(self):
+        first = self.queue.enqueue("test.echo", {"value": 1}, delay=60)
+        again = self.other_process().enqueue("test.echo", {"value": 1}, priority=jobs.PRIORITY_INTERACTIVE)
+        self.assertEqual(again, first)
+        job = self.queue.get(first)
+        self.assertEqual(job["priority"], jobs.PRIORITY_INTERACTIVE)
+        self.assertLessEqual(job["run_after"], time.time())
+        self.assertNotEqual(self.queue.enqueue("test.echo", {"value": 2}), first)
+        self.assertNotEqual(self.queue.enqueue("test.echo", {"value": 1}, dedupe=False), first)
+
+        self.assertEqual(self.queue.run_pending(), 3)
+        self.assertNotEqual(self.queue.enqueue("test.echo", {"value": 1}), first)  # the first one already ran
+
+    def test_priority_then_due_time(self):
+        self.queue.enqueue("test.echo", {"value": "background"}, priority=jobs.PRIORITY_BACKGROUND)
+        self.queue.enqueue("test.echo", {"value": "default"})
+        self.queue.enqueue("test.echo", {"value": "interactive"}, priority=jobs.PRIORITY_INTERACTIVE)
+        self.queue.enqueue("test.echo", {"value": "later"}, priority=jobs.PRIORITY_INTERACTIVE, delay=60)
+        self.queue.run_pending()
+        self.assertEqual(self.ran, ["interactive", "default", "background"])
+
+    def test_results_and_failures(self):
+        done = self.queue.enqueue("test.echo", {"value": 7})
+        failed = self.queue.enqueue("test.fail")
+        self.queue.run_pending()
+        self.assertEqual((self.queue.get(done)["status"], self.queue.get(done)["result"]), ("done", {"value": 7}))
+        self.assertEqual((self.queue.get(failed)["status"], self.queue.get(failed)["error"]),
+                         ("failed", "RuntimeError: boom"))
+        self.assertEqual(self.queue.latest("test.echo", {"value": 7})["id"], done)
+        with self.assertRaises(ValueError):
+            self.queue.enqueue("test.unknown")
+
+    def test_local_jobs_stay_with_their_process(self):
+        job_id = self.queue.enqueue("test.local", {"value": "mine"})
+        self.assertEqual(self.other_process().run_pending(), 0)
+        self.assertEqual(self.queue.run_pending(), 1)
+        self.assertEqual(self.queue.get(job_id)["status"], "done")
+
+    def test_workers_run_jobs_in_the_background(self):
+        self.queue.start(workers=2)
+        self.addCleanup(self.queue.stop)
+        job = self.queue.wait(self.queue.enqueue("test.echo", {"value": "bg"}), timeout=10)
+        self.assertEqual(job["status"], "done")
+
+class SweepTest(JobQueueTestCase):
+    def test_jobs_of_a_lost_worker_are_requeued_then_failed(self):
+        job_id = self.queue.enqueue("test.echo", {"value": "lost"})
+        self.queue.claim()
+        self.age(job_id, started_at=time.time() - jobs.JOB_LEASE - 1)
+        self.queue.prune()
+        self.assertEqual(self.queue.get(job_id)["status"], "queued")
+
+        self.queue.claim()
+        self.age(job_id, started_at=time.time() - jobs.JOB_LEASE - 1, attempts=jobs.JOB_MAX_ATTEMPTS)
+        self.queue.prune()
+        job = self.queue.get(job_id)
+        self.assertEqual((job["status"], job["error"]), ("failed", "worker lost"))
+        self.assertEqual((self.queue.counters["requeued"], self.queue.counters["failed"]), (1, 1))
+
+    def test_old_results_and_orphaned_local_jobs_are_deleted(self):
+        old = time.time() - jobs.JOB_RETENTION - 1
+        finished = self.queue.enqueue("test.echo", {"value": "old"})
+        self.queue.run_pending()
+        self.age(finished, finished_at=old)
+        orphan = self.other_process(pid=1).enqueue("test.local", {"value": "orphan"})
+        self.age(orphan, created_at=old)
+        recent = self.queue.enqueue("test.local", {"value": "recent"})
+
+        self.queue.prune()
+        self.assertEqual((self.queue.get(finished), self.queue.get(orphan)), (None, None))
+        self.assertEqual(self.queue.get(recent)["status"], "queued")
+
+class JobsEndpointTest(unittest.TestCase):
+    def test_only_client_kinds_can_be_queued(self):
+        client = flask_app.app.test_client()
+        for body in ({"kind": "chat"}, {"kind": "summary", "args": {"x": 1}}, {"kind": "summary", "priority": "hi"}, []):
+            with self.subTest(body=body):
+                self.assertEqual(client.post("/api/jobs", json=body).status_code, 400)
+        self.assertEqual(client.get("/api/jobs/no-such-job").status_code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from project import llm_wrapper
+from project.llm_cache import make_key
+
+class MicroBatchTest(unittest.TestCase):
+    def setUp(self):
+        patches = [mock.patch.object(llm_wrapper, "LLM_API_URL", "http://llm.test/v1/chat"),
+                   mock.patch.object(llm_wrapper, "LLM_API_KEY", "test"),
+                   mock.patch.object(llm_wrapper, "LLM_BATCH_MAX", 2)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def fake_llm(self, reply):
+        async def acall_llm_system(prompt, max_tokens=512, temperature=0.0, timeout=None, use_cache=True):
+            return reply(prompt)
+        patcher = mock.patch.object(llm_wrapper, "acall_llm_system", acall_llm_system)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_batch_answers_every_caller(self):
+        def reply(prompt):
+            raise RuntimeError("upstream parser blew up")
+        self.fake_llm(reply)
+        start = time.monotonic()
+        results = llm_wrapper.call_llm_many("prefix\n", ["one", "two"])
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(llm_wrapper.is_error_response(r) for r in results))
+
+    def test_split_answers_are_not_cached(self):
+        self.fake_llm(lambda prompt: json.dumps([{"answer": 1}, {"answer": 2}]))
+        results = llm_wrapper.call_llm_many("cache prefix\n", ["a", "b"])
+        self.assertEqual([json.loads(r) for r in results], [{"answer": 1}, {"answer": 2}])
+        for item in ("a", "b"):
+            key = make_key(llm_wrapper.LLM_API_URL, "cache prefix\n" + item, 0.0, 512)
+            self.assertIsNone(llm_wrapper._cache.get(key))
+
+    def test_short_reply_falls_back_to_single_calls(self):
+        def reply(prompt):
+            if "### Request" in prompt:
+                return json.dumps(["only one"])
+            return "single: " + prompt.rsplit("\n", 1)[-1]
+        self.fake_llm(reply)
+        self.assertEqual(llm_wrapper.call_llm_many("p\n", ["x", "y"]), ["single: x", "single: y"])
+
+if __name__ == "__main__":
+    unittest.main()
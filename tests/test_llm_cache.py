@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from project import llm_cache, llm_wrapper
+from project.llm_cache import LLMCache, make_key
+
+class LLMCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(prefix="llm_cache_test_"), "cache.db")
+
+    def test_key_ignores_layout_only(self):
+        self.assertEqual(make_key("u", "add  milk\n", 0.0, 10), make_key("u", "add milk", 0, 10))
+        self.assertNotEqual(make_key("u", "add milk", 0.0, 10), make_key("u", "add milk", 0.5, 10))
+        self.assertNotEqual(make_key("u", "add milk", 0.0, 10), make_key("u", "add milk", 0.0, 20))
+
+    def test_lru_and_ttl(self):
+        cache = LLMCache(max_entries=2, ttl=60)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")  # evicts b, the least recently used
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), ("1", None, "3"))
+        with mock.patch.object(llm_cache.time, "time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"hits": 3, "misses": 2, "size": 1})
+
+    def test_disk_tier_survives_a_restart(self):
+        cache = LLMCache(path=self.path)
+        cache.set("k", "reply")
+        cache.flush()
+        self.assertEqual(LLMCache(path=self.path).get("k"), "reply")
+
+        cache.clear()
+        self.assertIsNone(LLMCache(path=self.path).get("k"))
+
+    def test_disk_tier_is_capped(self):
+        with mock.patch.object(llm_cache, "PRUNE_EVERY", 1):
+            cache = LLMCache(path=self.path, max_disk_entries=3)
+            for i in range(10):
+                cache.set(f"k{i}", str(i))
+                cache.flush()
+        reopened = LLMCache(max_entries=1, path=self.path)
+        self.assertEqual([reopened.get(f"k{i}") for i in range(10)], [None] * 7 + ["7", "8", "9"])
+
+    def test_expired_rows_are_pruned_on_open(self):
+        cache = LLMCache(ttl=-1, path=self.path)
+        cache.set("old", "stale")
+        cache.flush()
+        reopened = LLMCache(path=self.path)
+        self.assertEqual(reopened._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0], 0)
+
+class WrapperCacheTest(unittest.TestCase):
+    def setUp(self):
+        patches = [mock.patch.object(llm_wrapper, "LLM_API_URL", "http://llm.test/v1/chat"),
+                   mock.patch.object(llm_wrapper, "LLM_API_KEY", "test"),
+                   mock.patch.object(llm_wrapper, "_cache", LLMCache())]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.upstream = []
+
+    def fake_upstream(self, reply, ok=True):
+        async def request_completion(prompt, max_tokens, temperature, timeout):
+            self.upstream.append(prompt)
+            return reply, ok
+        patcher = mock.patch.object(llm_wrapper, "_request_completion", request_completion)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_deterministic_replies_are_cached(self):
+        self.fake_upstream('{"action": "chat"}')
+        self.assertEqual(llm_wrapper.call_llm("list  my tasks"), '{"action": "chat"}')
+        self.assertEqual(llm_wrapper.call_llm("list my tasks\n"), '{"action": "chat"}')
+        self.assertEqual(len(self.upstream), 1)
+        llm_wrapper.call_llm("list my tasks", temperature=0.7)
+        self.assertEqual(len(self.upstream), 2)
+
+    def test_errors_are_not_cached(self):
+        self.fake_upstream(llm_wrapper._error_response("LLM API Error: HTTP Error 503"), ok=False)
+        llm_wrapper.call_llm("list my tasks")
+        llm_wrapper.call_llm("list my tasks")
+        self.assertEqual(len(self.upstream), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+from project.llm_http import ConnectionPool, HTTPError
+
+OVERLONG = b"x" * (2 ** 17)  # past asyncio's 64 KiB line limit
+
+class MalformedResponseTest(unittest.TestCase):
+    """Whatever the server sends, the client raises HTTPError and drops the connection."""
+
+    def fetch(self, response):
+        async def handle(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(response)
+            await writer.drain()
+            await reader.read()  # hold the socket until the client gives up on it
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            pool = ConnectionPool()
+            try:
+                with self.assertRaises(HTTPError):
+                    await pool.request("POST", f"http://127.0.0.1:{port}/", body=b"{}")
+                self.assertEqual(sum(len(idle) for idle in pool._idle.values()), 0)
+            finally:
+                pool.close()
+                server.close()
+                await server.wait_closed()
+        asyncio.run(run())
+
+    def test_overlong_status_line(self):
+        self.fetch(b"HTTP/1.1 200 " + OVERLONG + b"\r\n\r\n")
+
+    def test_malformed_status_line(self):
+        self.fetch(b"SSH-2.0-OpenSSH_9.6\r\n\r\n")
+
+    def test_overlong_header(self):
+        self.fetch(b"HTTP/1.1 200 OK\r\nX-Big: " + OVERLONG + b"\r\n\r\n")
+
+    def test_overlong_chunk_size(self):
+        self.fetch(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n" + OVERLONG + b"\r\n")
+
+    def test_malformed_chunk_size(self):
+        self.fetch(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\nhello\r\n0\r\n\r\n")
+
+class KeepAliveTest(unittest.TestCase):
+    def serve(self, responses, check):
+        """Runs `check(pool, url)` against a server answering each request with the next of `responses`."""
+        replies = iter(responses)
+
+        async def handle(reader, writer):
+            try:
+                while True:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    length = int(next(line for line in head.split(b"\r\n")
+                                      if line.lower().startswith(b"content-length")).split(b":")[1])
+                    await reader.readexactly(length)
+                    reply = next(replies)
+                    if reply is None:  # drop the connection instead of answering
+                        break
+                    writer.write(reply)
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            pool = ConnectionPool()
+            try:
+                await check(pool, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/")
+            finally:
+                pool.close()
+                server.close()
+                await server.wait_closed()
+        asyncio.run(run())
+
+    def test_bodies_and_connection_reuse(self):
+        async def check(pool, url):
+            first = await pool.request("POST", url, body=b"{}")
+            second = await pool.request("POST", url, body=b"{}")
+            self.assertEqual((first.status, first.text()), (200, "hello"))
+            self.assertEqual((second.status, second.text()), (200, "chunked body"))
+            self.assertEqual(pool.opened, 1)
+        self.serve([b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello",
+                    b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                    b"7\r\nchunked\r\n5\r\n body\r\n0\r\n\r\n"], check)
+
+    def test_stale_connection_is_retried_once(self):
+        async def check(pool, url):
+            await pool.request("POST", url, body=b"{}")
+            resp = await pool.request("POST", url, body=b"{}")
+            self.assertEqual(resp.text(), "again")
+            self.assertEqual(pool.opened, 2)
+        ok = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+        self.serve([ok, None, b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nagain"], check)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import asyncio
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+from project import llm_transport
+from project.llm_http import HTTPError
+from project.llm_transport import CircuitBreaker, CircuitOpenError, Transport, parse_retry_after
+
+class Response:
+    def __init__(self, status, headers=None, body="ok"):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+def attempts(*outcomes):
+    """An attempt() factory yielding each outcome in turn: a status, a (status, headers) pair or an exception."""
+    outcomes = iter(outcomes)
+    calls = []
+
+    async def attempt():
+        calls.append(len(calls))
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, tuple):
+            return Response(*outcome)
+        return Response(outcome)
+    return attempt, calls
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+
+        async def sleep(delay):
+            self.sleeps.append(delay)
+        patcher = mock.patch.object(llm_transport.asyncio, "sleep", sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send(self, transport, attempt):
+        return asyncio.run(transport.send(attempt, timeout=5))
+
+    def test_server_errors_are_retried_with_capped_backoff(self):
+        transport = Transport(retries=3, retry_base=1, retry_max=1.5)
+        attempt, calls = attempts(503, 502, 200)
+        self.assertEqual(self.send(transport, attempt).status, 200)
+        self.assertEqual((len(calls), transport.counters["retries"]), (3, 2))
+        self.assertTrue(all(0 <= s <= 1.5 for s in self.sleeps))
+        self.assertEqual(transport.breaker.failures, 0)
+
+    def test_last_error_response_is_returned(self):
+        attempt, calls = attempts(500, 500, 500)
+        self.assertEqual(self.send(Transport(retries=2), attempt).status, 500)
+        self.assertEqual(len(calls), 3)
+
+    def test_client_errors_and_timeouts_are_not_retried(self):
+        attempt, calls = attempts(400)
+        self.assertEqual(self.send(Transport(), attempt).status, 400)
+        attempt, calls = attempts(asyncio.TimeoutError())
+        with self.assertRaises(asyncio.TimeoutError):
+            self.send(Transport(), attempt)
+        self.assertEqual(len(calls), 1)
+
+    def test_connection_errors_are_retried_then_raised(self):
+        attempt, calls = attempts(ConnectionResetError(), HTTPError("bad status line"), OSError("refused"))
+        with self.assertRaises(OSError):
+            self.send(Transport(retries=2), attempt)
+        self.assertEqual(len(calls), 3)
+
+    def test_retry_after(self):
+        attempt, _ = attempts((429, {"retry-after": "3"}), 200)
+        self.assertEqual(self.send(Transport(retry_base=0.01), attempt).status, 200)
+        self.assertEqual(self.sleeps, [3.0])
+        # Too long to wait for: the 429 goes back to the caller
+        attempt, calls = attempts((429, {"retry-after": "120"}), 200)
+        self.assertEqual(self.send(Transport(retry_after_max=30), attempt).status, 429)
+        self.assertEqual(len(calls), 1)
+
+    def test_parse_retry_after(self):
+        now = time.time()
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertAlmostEqual(parse_retry_after(formatdate(now + 60, usegmt=True), now=now), 60, delta=1)
+        self.assertEqual(parse_retry_after(formatdate(now - 60, usegmt=True), now=now), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+class BreakerTest(unittest.TestCase):
+    def test_open_half_open_closed(self):
+        clock = Clock()
+        transport = Transport(retries=0, breaker=CircuitBreaker(threshold=2, cooldown=30, clock=clock))
+        attempt, calls = attempts(503, OSError("refused"), 503, 200)
+        send = lambda: asyncio.run(transport.send(attempt, timeout=5))
+
+        self.assertEqual(send().status, 503)
+        with self.assertRaises(OSError):
+            send()
+        self.assertEqual(transport.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            send()
+        self.assertEqual((len(calls), transport.counters["short_circuited"]), (2, 1))
+
+        clock.now = 30  # cooldown over: one probe, which fails and re-opens
+        self.assertEqual(send().status, 503)
+        self.assertEqual((transport.breaker.state, transport.breaker.opens), ("open", 2))
+        clock.now = 60
+        self.assertEqual(send().status, 200)
+        self.assertEqual(transport.breaker.state, "closed")
+
+    def test_half_open_allows_a_single_probe(self):
+        clock = Clock()
+        breaker = CircuitBreaker(threshold=1, cooldown=5, clock=clock)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        clock.now = 5
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+class HedgeTest(unittest.TestCase):
+    def test_slow_request_is_hedged(self):
+        transport = Transport(retries=0, hedge=True, hedge_quantile=0.9)
+        transport.latencies.extend([0.01] * llm_transport.LLM_HEDGE_MIN_SAMPLES)
+        delays = iter([1.0, 0.0])
+
+        async def attempt():
+            delay = next(delays)
+            await asyncio.sleep(delay)
+            return Response(200, body=f"after {delay}")
+
+        start = time.monotonic()
+        resp = asyncio.run(transport.send(attempt, timeout=5))
+        self.assertEqual(resp.body, "after 0.0")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual((transport.counters["hedged"], transport.counters["hedge_wins"]), (1, 1))
+
+    def test_no_hedging_until_warmed_up(self):
+        transport = Transport(hedge=True)
+        self.assertIsNone(transport.hedge_delay())
+        transport.latencies.extend(i / 100 for i in range(100))
+        self.assertEqual(transport.hedge_delay(), 0.95)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import app as flask_app
+from project import metrics
+from project.agents import task_manager
+
+class MetricTypesTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(metrics, "_registry", [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+        for value in (0.1, 0.5, 0.7, 30):
+            histogram.observe(value, ("/a",))
+        self.assertEqual(histogram.count(("/a",)), 4)
+        self.assertEqual(histogram.render()[2:], [
+            't_seconds_bucket{route="/a",le="0.1"} 1',
+            't_seconds_bucket{route="/a",le="1.0"} 3',
+            't_seconds_bucket{route="/a",le="+Inf"} 4',
+            't_seconds_sum{route="/a"} 31.300000',
+            't_seconds_count{route="/a"} 4',
+        ])
+
+    def test_counter_and_label_text(self):
+        counter = metrics.Counter("t_total", "test", ("kind",))
+        counter.inc(("a\nb",), 2)
+        counter.inc(("a\nb",))
+        self.assertEqual(counter.render(), ["# HELP t_total test", "# TYPE t_total counter", 't_total{kind="a b"} 3'])
+
+class DbOperationTest(unittest.TestCase):
+    def test_latency_and_queries_per_function(self):
+        labels = ("add_task",)
+        calls, queries = metrics.DB_SECONDS.count(labels), metrics.DB_QUERIES.value(labels)
+        task_manager.add_task("water plants")
+        self.assertEqual(metrics.DB_SECONDS.count(labels), calls + 1)
+        self.assertGreater(metrics.DB_QUERIES.value(labels), queries)
+
+class SpanExportTest(unittest.TestCase):
+    def test_nested_spans_are_written_with_their_parent(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="spans_test_"), "spans.jsonl")
+        with mock.patch.object(metrics, "TRACE_PATH", path):
+            with metrics.span("outer", route="/x") as outer:
+                with self.assertRaises(KeyError):
+                    with metrics.span("inner"):
+                        raise KeyError("x")
+            metrics.flush_spans()
+        with open(path, encoding="utf-8") as f:
+            inner, outer_record = [json.loads(line) for line in f]
+        self.assertEqual((inner["name"], inner["parent_id"], inner["error"]), ("inner", outer.span_id, "KeyError"))
+        self.assertEqual((outer_record["parent_id"], outer_record["attrs"]), (None, {"route": "/x"}))
+
+class MetricsEndpointTest(unittest.TestCase):
+    def test_exposition(self):
+        client = flask_app.app.test_client()
+        client.get("/api/tasks")
+        text = client.get("/metrics").get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/api/tasks",status="200"}', text)
+        self.assertIn("# TYPE db_operation_duration_seconds histogram", text)
+        self.assertIn("# TYPE llm_request_duration_seconds histogram", text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+from datetime import date
+
+from project.agents import task_manager
+from project.database import db_session, task_row_factory
+from project.models import Task, json_default
+
+class TaskTest(unittest.TestCase):
+    def test_legacy_fields_and_unknown_keys(self):
+        task = Task.from_dict({"id": "a", "name": "water plants", "duration": 10, "colour": "green"})
+        self.assertEqual((task.task_name, task.duration_minutes), ("water plants", 10))
+        self.assertEqual(task.to_dict(), {"id": "a", "task_name": "water plants", "duration_minutes": 10})
+        self.assertNotIn("colour", task)
+
+    def test_dict_access_is_limited_to_loaded_fields(self):
+        task = Task.from_dict({"id": "a", "task_name": "x", "deadline": "2026-10-20"})
+        self.assertEqual((task["id"], task.get("deadline"), task.get("status", "unset")), ("a", "2026-10-20", "unset"))
+        with self.assertRaises(KeyError):
+            task["status"]
+        self.assertEqual(dict(task), {"id": "a", "task_name": "x", "deadline": "2026-10-20"})
+        self.assertEqual(task, {"id": "a", "task_name": "x", "deadline": "2026-10-20"})
+        self.assertEqual(task.to_dict(["id"]), {"id": "a"})
+
+    def test_parsed_dates(self):
+        task = Task(deadline="2026-10-20T18:00", scheduled_date="not a date")
+        self.assertEqual((task.due, task.scheduled_on), (date(2026, 10, 20), None))
+
+    def test_values_are_shared(self):
+        first = Task(priority="".join(["hi", "gh"]), deadline="-".join(["2026", "10", "20"]))
+        second = Task(priority="high", deadline="2026-10-20")
+        self.assertIs(first.priority, second.priority)
+        self.assertIs(first.deadline, second.deadline)
+
+    def test_json(self):
+        task = Task.from_dict({"id": "a", "task_name": "x"})
+        self.assertEqual(json.loads(json.dumps([task], default=json_default)), [{"id": "a", "task_name": "x"}])
+
+class RowFactoryTest(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+
+    def test_rows_become_tasks(self):
+        added = task_manager.add_task("write report", duration_minutes=60, deadline="2026-10-20")
+        with db_session() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = task_row_factory
+            full = cursor.execute("SELECT * FROM tasks").fetchone()
+            partial = cursor.execute("SELECT task_name, 1 AS extra, id FROM tasks").fetchone()
+        self.assertEqual(full, added)
+        self.assertEqual(full.due, date(2026, 10, 20))
+        self.assertEqual(partial.to_dict(), {"task_name": "write report", "id": added.id})
+
+if __name__ == "__main__":
+    unittest.main()
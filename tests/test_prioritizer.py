@@ -0,0 +1,77 @@
+import random
+import unittest
+from datetime import date
+from unittest import mock
+
+from project.agents import prioritizer, task_manager
+from project.agents.prioritizer import TaskColumns, default_score, rank_key, rank_tasks, score_order
+from project.database import db_session
+
+TODAY = date(2026, 10, 18)
+
+def tasks_with_ties(n, seed):
+    rng = random.Random(seed)
+    return [{
+        "id": f"t{i:04d}",
+        "task_name": f"task {i}",
+        "duration_minutes": rng.choice([None, 0, 15, 30, 60]),
+        "priority": rng.choice(["high", "medium", "low", "Low", None, "urgent"]),
+        "deadline": rng.choice([None, "2026-10-17", "2026-10-20", "2026-10-21", "2027-01-01"]),
+    } for i in range(n)]
+
+class RankingTestMixin:
+    def ids(self, tasks):
+        return [t["id"] for t in tasks]
+
+    def test_full_ranking_matches_rank_key(self):
+        tasks = tasks_with_ties(500, 1)
+        self.assertEqual(self.ids(rank_tasks(tasks)), self.ids(sorted(tasks, key=rank_key)))
+
+    def test_top_k_is_a_prefix(self):
+        tasks = tasks_with_ties(300, 2)
+        full = self.ids(rank_tasks(tasks))
+        for k in (0, 1, 7, 299, 300, 400):
+            with self.subTest(k=k):
+                self.assertEqual(self.ids(rank_tasks(tasks, k=k)), full[:k])
+
+    def test_score_order(self):
+        tasks = tasks_with_ties(300, 3)
+        scores = list(default_score(TaskColumns.from_tasks(tasks), TODAY))
+        expected = sorted(range(len(tasks)), key=lambda i: -scores[i])
+        for k in (None, 10):
+            with self.subTest(k=k):
+                order = list(score_order(TaskColumns.from_tasks(tasks), k=k, today=TODAY))
+                self.assertEqual(order, expected[:k])
+        by_score = rank_tasks(tasks, k=5, score=default_score, today=TODAY)
+        self.assertEqual(self.ids(by_score), [tasks[i]["id"] for i in expected[:5]])
+
+    def test_urgency_priority_and_duration_weighting(self):
+        tasks = [{"id": "later", "deadline": "2026-10-25", "priority": "high", "duration_minutes": 60},
+                 {"id": "overdue", "deadline": "2026-10-01", "priority": "low", "duration_minutes": 60},
+                 {"id": "quick", "deadline": "2026-10-25", "priority": "high", "duration_minutes": 15},
+                 {"id": "someday", "deadline": None, "priority": "high", "duration_minutes": 60}]
+        self.assertEqual(self.ids(rank_tasks(tasks, score=default_score, today=TODAY)),
+                         ["overdue", "quick", "later", "someday"])
+
+class NumpyRankingTest(RankingTestMixin, unittest.TestCase):
+    pass
+
+class PurePythonRankingTest(RankingTestMixin, unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(prioritizer, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+class SqlOrderTest(unittest.TestCase):
+    def test_matches_get_prioritized_tasks(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        tasks = tasks_with_ties(200, 4)
+        task_manager.upsert_tasks(tasks)
+        self.assertEqual([t.id for t in prioritizer.get_prioritized_tasks()],
+                         [t["id"] for t in rank_tasks(tasks)])
+        self.assertEqual([t.id for t in prioritizer.get_prioritized_tasks(limit=10)],
+                         [t["id"] for t in rank_tasks(tasks, k=10)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta
+
+from project.agents.prioritizer import rank_key
+from project.agents.scheduler import MINUTES_PER_DAY, FreeTimeIndex, schedule_tasks
+
+START = date(2026, 10, 19)  # a Monday
+
+def first_fit_week(tasks, start_date):
+    """The scheduler as it was before the free-time index: 7 days of 09:00-18:00, first fit, no overflow."""
+    slots = []
+    for i in range(7):
+        slot_start = datetime.combine(start_date + timedelta(days=i), datetime.min.time()).replace(hour=9)
+        slots.append([slot_start, slot_start.replace(hour=18)])
+    events = []
+    for t in tasks:
+        dur = int(t.get("duration_minutes") or 60)
+        for s in slots:
+            if int((s[1] - s[0]).total_seconds() // 60) >= dur:
+                events.append({"uid": t["id"], "start": s[0], "end": s[0] + timedelta(minutes=dur),
+                               "summary": t["task_name"]})
+                s[0] += timedelta(minutes=dur)
+                break
+    return events
+
+def unpinned_tasks(n, seed):
+    rng = random.Random(seed)
+    tasks = [{
+        "id": f"t{i:03d}",
+        "task_name": f"task {i}",
+        "duration_minutes": rng.choice([None, 15, 45, 60, 120, 300, 600]),
+        "priority": rng.choice(["high", "medium", "low"]),
+        # The old scheduler ignored deadlines, so only use ones past the week
+        "deadline": rng.choice([None, "2026-11-02", "2026-12-01"]),
+        "scheduled_date": None,
+    } for i in range(n)]
+    return sorted(tasks, key=rank_key)
+
+class FirstFitTest(unittest.TestCase):
+    def test_matches_the_old_first_fit(self):
+        for n, seed in ((5, 1), (30, 2), (60, 3), (120, 4)):
+            with self.subTest(n=n, seed=seed):
+                tasks = unpinned_tasks(n, seed)
+                expected = first_fit_week(tasks, START)
+                result = schedule_tasks(tasks, START, split=False)
+                key = lambda e: (e["start"], e["uid"])
+                self.assertEqual(sorted(({k: e[k] for k in ("uid", "start", "end", "summary")}
+                                         for e in result["events"]), key=key), sorted(expected, key=key))
+                placed = {e["uid"] for e in expected}
+                self.assertEqual([o["task_id"] for o in result["overflow"]],
+                                 [t["id"] for t in tasks if t["id"] not in placed])
+
+class ConstraintTest(unittest.TestCase):
+    def task(self, task_id, minutes, **fields):
+        return dict({"id": task_id, "task_name": task_id, "duration_minutes": minutes,
+                     "deadline": None, "scheduled_date": None}, **fields)
+
+    def test_pinned_deadlines_busy_time_and_done_tasks(self):
+        monday = datetime.combine(START, datetime.min.time())
+        tasks = [self.task("first", 60), self.task("pinned", 60, scheduled_date="2026-10-21"),
+                 self.task("done", 60, status="done"), self.task("late", 60, deadline="2026-10-01")]
+        result = schedule_tasks(tasks, START, busy=[(monday.replace(hour=9), monday.replace(hour=10))])
+        starts = {e["uid"]: e["start"] for e in result["events"]}
+        self.assertEqual(starts, {"first": monday.replace(hour=10),
+                                  "pinned": monday.replace(hour=9) + timedelta(days=2)})
+        self.assertEqual([(o["task_id"], o["reason"]) for o in result["overflow"]], [("late", "deadline passed")])
+
+    def test_split_into_pieces(self):
+        hours = {0: [("09:00", "10:00"), ("11:00", "12:00")]}
+        tasks = [self.task("long", 90)]
+        self.assertEqual(schedule_tasks(tasks, START, days=1, working_hours=hours, split=False)["overflow"][0]["reason"],
+                         "no room in horizon")
+        events = schedule_tasks(tasks, START, days=1, working_hours=hours)["events"]
+        self.assertEqual([(e["uid"], e["start"].hour, (e["end"] - e["start"]).seconds // 60) for e in events],
+                         [("long-1", 9, 60), ("long-2", 11, 30)])
+
+class FreeTimeIndexTest(unittest.TestCase):
+    def test_matches_a_minute_grid(self):
+        days = 10
+        hours = {day: [("08:00", "12:00"), ("13:00", "17:30")] for day in range(5)}
+        index = FreeTimeIndex(START, days, hours)
+        free = [False] * (days * MINUTES_PER_DAY)
+        for i in range(days):
+            if (START + timedelta(days=i)).weekday() < 5:
+                for s, e in ((480, 720), (780, 1050)):
+                    free[i * MINUTES_PER_DAY + s:i * MINUTES_PER_DAY + e] = [True] * (e - s)
+
+        def grid_slot(minutes, start, end):
+            run = 0
+            for m in range(start, end):
+                run = run + 1 if free[m] else 0
+                if run == minutes:
+                    return m - minutes + 1
+            return None
+
+        rng = random.Random(5)
+        reserved = []
+        for _ in range(300):
+            if reserved and rng.random() < 0.3:
+                s, e = reserved.pop(rng.randrange(len(reserved)))
+                index.release(s, e)
+                free[s:e] = [True] * (e - s)
+            else:
+                minutes = rng.choice([15, 30, 60, 200, 400])
+                start = rng.randrange(days * MINUTES_PER_DAY)
+                end = min(days * MINUTES_PER_DAY, start + rng.randrange(1, 4) * MINUTES_PER_DAY)
+                slot = index.find_slot(minutes, start, end)
+                self.assertEqual(slot, grid_slot(minutes, start, end))
+                self.assertEqual(index.free_minutes(start, end), sum(free[start:end]))
+                if slot is not None:
+                    index.reserve(slot, slot + minutes)
+                    free[slot:slot + minutes] = [False] * minutes
+                    reserved.append((slot, slot + minutes))
+        self.assertEqual(sum(e - s for s, e in index.intervals()), sum(free))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+
+import app as flask_app
+from project import database
+from project.agents import task_manager
+from project.agents.task_manager import resolve_task_reference, search_tasks
+from project.database import db_session
+
+NAMES = {
+    "dentist": "book dentist appointment",
+    "report": "write quarterly report",
+    "meetings": "prepare team meetings agenda",
+    "call_mom": "call mom",
+    "call_dad": "call dad",
+    "call_bank": "call the bank about the card",
+    "groceries": "buy groceries",
+}
+
+def names(tasks):
+    return [t.task_name for t in tasks]
+
+class SearchTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        task_manager.upsert_tasks([{"id": task_id, "task_name": name} for task_id, name in NAMES.items()])
+
+class SearchTest(SearchTestCase):
+    def test_stems_prefixes_and_stop_words(self):
+        self.assertEqual(names(search_tasks("meeting")), [NAMES["meetings"]])
+        self.assertEqual(names(search_tasks("the dent")), [NAMES["dentist"]])
+        self.assertEqual(names(search_tasks("REPORT!")), [NAMES["report"]])
+        # A query of nothing but stop words still searches for them
+        self.assertEqual(names(search_tasks("the")), [NAMES["call_bank"]])
+        self.assertEqual(search_tasks(""), [])
+
+    def test_all_words_before_any_word(self):
+        self.assertEqual(names(search_tasks("call bank")), [NAMES["call_bank"]])
+        self.assertEqual(set(names(search_tasks("bank mom"))), {NAMES["call_bank"], NAMES["call_mom"]})
+
+    def test_index_follows_writes(self):
+        task_manager.update_task("groceries", {"task_name": "buy vegetables"})
+        task_manager.delete_task("dentist")
+        task_manager.add_task("renew passport")
+        self.assertEqual(search_tasks("groceries"), [])
+        self.assertEqual(names(search_tasks("vegetables")), ["buy vegetables"])
+        self.assertEqual(search_tasks("dentist"), [])
+        self.assertEqual(names(search_tasks("passport")), ["renew passport"])
+        database.rebuild_search_index()
+        self.assertEqual(names(search_tasks("vegetables")), ["buy vegetables"])
+
+    def test_status_filter(self):
+        task_manager.update_task("call_mom", {"status": "done"})
+        self.assertNotIn(NAMES["call_mom"], names(search_tasks("call", status="open")))
+        self.assertEqual(names(search_tasks("call", status="done")), [NAMES["call_mom"]])
+
+    def test_like_fallback(self):
+        with mock.patch.object(task_manager, "FTS_AVAILABLE", False):
+            self.assertEqual(names(search_tasks("dent")), [NAMES["dentist"]])
+            self.assertEqual(names(search_tasks("call bank")), [NAMES["call_bank"]])
+
+    def test_endpoint(self):
+        client = flask_app.app.test_client()
+        tasks = client.get("/api/tasks/search?q=report&limit=0").get_json()["tasks"]
+        self.assertEqual([t["id"] for t in tasks], ["report"])
+
+class ResolveTest(SearchTestCase):
+    def test_clear_and_ambiguous_references(self):
+        task, _ = resolve_task_reference("the dentist")
+        self.assertEqual(task.id, "dentist")
+        task, candidates = resolve_task_reference("call")
+        self.assertIsNone(task)
+        self.assertEqual({t.id for t in candidates}, {"call_mom", "call_dad", "call_bank"})
+        self.assertEqual(resolve_task_reference("tax return"), (None, []))
+
+    def test_open_tasks_are_preferred(self):
+        task_manager.import_tasks([{"id": "dentist_2025", "task_name": NAMES["dentist"], "status": "done"}])
+        self.assertEqual(resolve_task_reference("dentist")[0].id, "dentist")
+        task_manager.update_task("call_mom", {"status": "done"})
+        self.assertEqual(resolve_task_reference("call mom")[0].id, "call_mom")
+
+    def test_chat_deletes_by_description(self):
+        client = flask_app.app.test_client()
+        reply = client.post("/api/chat", json={"message": "delete the task about the dentist"}).get_json()
+        self.assertEqual(reply["action"], "delete_task")
+        self.assertIsNone(task_manager.get_task_by_id("dentist"))
+
+        reply = client.post("/api/chat", json={"message": "delete the call task"}).get_json()
+        self.assertEqual(reply["action"], "chat")
+        self.assertIn("Which task do you mean?", reply["response"])
+        self.assertIsNotNone(task_manager.get_task_by_id("call_mom"))
+
+if __name__ == "__main__":
+    unittest.main()
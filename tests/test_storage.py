@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+from project.agents import task_manager
+from project.database import db_session
+from project.models import Task
+from project.storage import JSONLTaskStore, SQLiteTaskStore, TaskStore, migrate_json
+
+class MigrateJsonTest(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        self.dir = tempfile.mkdtemp(prefix="storage_test_")
+
+    def migrate(self, records, store):
+        path = os.path.join(self.dir, "tasks.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        return migrate_json(path, store)
+
+    def test_done_task_round_trips(self):
+        records = [
+            {"id": "a1", "name": "file taxes", "duration": 30, "status": "done",
+             "created_at": "2025-03-01T08:00:00"},
+            {"id": "a2", "task_name": "book dentist"},
+        ]
+        for store in (SQLiteTaskStore(), JSONLTaskStore(os.path.join(self.dir, "tasks.jsonl"))):
+            with self.subTest(store=type(store).__name__):
+                self.assertEqual(self.migrate(records, store), {"imported": 2, "skipped": 0})
+                done = store.get("a1")
+                self.assertEqual(done.status, "done")
+                self.assertEqual(done.created_at, "2025-03-01T08:00:00")
+                self.assertEqual(done.duration_minutes, 30)
+                self.assertEqual(store.get("a2").status, "pending")
+
+    def stores(self):
+        return (SQLiteTaskStore(), JSONLTaskStore(os.path.join(self.dir, "tasks.jsonl")))
+
+    def test_add_generates_id(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                task = store.add(Task.from_dict({"task_name": "water plants", "duration_minutes": 10}))
+                self.assertIsNotNone(task)
+                self.assertEqual(store.get(task.id).task_name, "water plants")
+                self.assertIsNotNone(task.created_at)
+
+    def test_records_without_id_are_imported(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                self.assertEqual(self.migrate([{"name": "renew passport"}], store), {"imported": 1, "skipped": 0})
+                self.assertEqual([t.task_name for t in store.all()], ["renew passport"])
+            with db_session() as conn:
+                conn.execute("DELETE FROM tasks")
+
+    def test_update_rejects_unknown_fields(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                task = store.add(Task.from_dict({"task_name": "sort mail"}))
+                with self.assertRaises(ValueError):
+                    store.update(task.id, {"created_at": "1999-01-01"})
+                self.assertEqual(store.update(task.id, {"status": "done"}).status, "done")
+
+    def test_dashboard_sync_keeps_status(self):
+        SQLiteTaskStore().add_many(Task.from_dict(r) for r in
+                                   [{"id": "b1", "task_name": "call bank", "status": "done"}])
+        task_manager.upsert_tasks([{"id": "b1", "task_name": "call the bank", "status": "pending"}])
+        task = task_manager.get_task_by_id("b1")
+        self.assertEqual((task.task_name, task.status), ("call the bank", "done"))
+
+    def test_task_store_is_abstract(self):
+        with self.assertRaises(TypeError):
+            TaskStore()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import random
+import unittest
+from datetime import date
+from unittest import mock
+
+from project import llm_wrapper
+from project.agents import ai_summary, summary_agent, task_manager
+from project.database import db_session
+from project.storage import SQLiteTaskStore, TaskStore
+
+TODAY = date(2026, 10, 19)
+
+def stats_ids(stats):
+    """The stats with task lists reduced to ids, for comparing across backends."""
+    result = dict(stats)
+    for key in ("due_soon", "overdue"):
+        result[key] = dict(stats[key], tasks=[t.id for t in stats[key]["tasks"]])
+    result["focus"] = [t.id for t in stats["focus"]]
+    return result
+
+class SummaryTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+        rng = random.Random(3)
+        task_manager.upsert_tasks([{
+            "id": f"t{i:03d}",
+            "task_name": f"task {i} " + "x" * rng.choice([0, 100]),
+            "duration_minutes": rng.choice([None, 30, 90]),
+            "priority": rng.choice(["high", "medium", "Low", None]),
+            "deadline": rng.choice([None, "2026-10-01", "2026-10-19", "2026-10-25", "2026-10-26"]),
+            "scheduled_date": rng.choice([None, "2026-10-20", "2026-11-10"]),
+        } for i in range(80)])
+        for i in range(0, 80, 7):
+            task_manager.update_task(f"t{i:03d}", {"status": "done"})
+
+class StatsTest(SummaryTestCase):
+    def test_sql_aggregates_match_a_scan(self):
+        store = SQLiteTaskStore()
+        for limit in (0, 5, 100):
+            with self.subTest(limit=limit):
+                sql = store.summary_stats("2026-10-19", "2026-10-26", limit)
+                scan = TaskStore.summary_stats(store, "2026-10-19", "2026-10-26", limit)
+                self.assertEqual(stats_ids(sql), stats_ids(scan))
+        self.assertEqual((sql["open"], sql["done"]), (68, 12))
+
+    def test_compact_stats_fit_the_budget(self):
+        stats = summary_agent.weekly_stats(TODAY)
+        for max_chars in (400, 1500):
+            with self.subTest(max_chars=max_chars):
+                compact = summary_agent.compact_stats(stats, max_chars)
+                self.assertLessEqual(len(json.dumps(compact, separators=(",", ":"))), max_chars)
+                self.assertEqual(compact["overdue"]["count"], stats["overdue"]["count"])
+                names = [t["name"] for t in compact["suggested_focus"]]
+                self.assertTrue(all(len(n) <= summary_agent.NAME_MAX_CHARS for n in names))
+
+    def test_local_text(self):
+        text = summary_agent.generate_summary(TODAY)
+        self.assertIn("Total Tasks: 80 (68 open, 12 done)", text)
+        self.assertIn("Overdue:", text)
+
+class NarratedSummaryTest(SummaryTestCase):
+    def setUp(self):
+        super().setUp()
+        ai_summary._summary_cache["key"] = None
+        self.prompts = []
+
+    def llm(self, reply):
+        def call(prompt, timeout=None):
+            self.prompts.append(prompt)
+            return reply
+        return mock.patch.object(ai_summary, "call_llm_system", call)
+
+    def test_local_mode_never_calls_the_llm(self):
+        with self.llm("prose"):
+            text = ai_summary.generate_summary(mode="local")
+        self.assertEqual(self.prompts, [])
+        self.assertTrue(text.startswith("=== Task Summary ==="))
+
+    def test_prose_is_cached_per_revision(self):
+        with self.llm("prose"):
+            self.assertEqual(ai_summary.generate_summary(mode="llm"), "prose")
+            self.assertEqual(ai_summary.generate_summary(mode="llm"), "prose")
+            self.assertEqual(len(self.prompts), 1)
+            self.assertLessEqual(len(self.prompts[0]), len(ai_summary.SUMMARY_PROMPT) + 2 + summary_agent.SUMMARY_MAX_CHARS)
+            task_manager.add_task("one more")
+            ai_summary.generate_summary(mode="llm")
+            self.assertEqual(len(self.prompts), 2)
+
+    def test_llm_failure_falls_back_to_local_text(self):
+        with self.llm(llm_wrapper._error_response("LLM API Error: timeout")):
+            text = ai_summary.generate_summary(mode="llm")
+            self.assertTrue(text.startswith("=== Task Summary ==="))
+            ai_summary.generate_summary(mode="llm")
+        self.assertEqual(len(self.prompts), 2)  # failures aren't cached
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import unittest
+from unittest import mock
+
+import app as flask_app
+from project.agents import task_importer, task_manager
+from project.agents.task_importer import import_tasks, split_lines
+from project.database import db_session
+
+class ImporterTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+
+    def fake_llm(self, reply=None):
+        """Replaces the LLM batch call; returns the list of batches it was sent."""
+        batches = []
+
+        def process_user_messages(messages, use_fast_path=True):
+            batches.append(list(messages))
+            return [reply(m) if reply else {"action": "chat", "response": "no idea"} for m in messages]
+        patcher = mock.patch.object(task_importer, "process_user_messages", process_user_messages)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return batches
+
+class ImportTest(ImporterTestCase):
+    def test_list_markers_and_blank_lines(self):
+        self.assertEqual(split_lines("- a\n\n  2) b\n[x] c\n* [ ] d\n"), [(1, "a"), (3, "b"), (4, "c"), (5, "d")])
+
+    def test_local_import_keeps_line_order_across_chunks(self):
+        lines = [f"chore {i} {i % 50 + 5} min" for i in range(3 * task_importer.IMPORT_CHUNK_SIZE + 7)]
+        batches = self.fake_llm()
+        summary = import_tasks("\n".join(lines), use_llm=False, concurrency=4)
+        self.assertEqual(batches, [])
+        self.assertEqual((summary["imported"], summary["failed"]), (len(lines), 0))
+        self.assertEqual([r["line"] for r in summary["results"]], list(range(1, len(lines) + 1)))
+        saved = {t.id: t for t in task_manager.get_all_tasks()}
+        self.assertEqual([(saved[r["id"]].task_name, saved[r["id"]].duration_minutes) for r in summary["results"]],
+                         [(f"chore {i}", i % 50 + 5) for i in range(len(lines))])
+
+    def test_only_unsure_lines_go_to_the_llm(self):
+        def reply(message):
+            if "rent" in message:
+                return {"action": "add_task", "parameters": {"task_name": "pay rent", "deadline": "2026-11-01",
+                                                             "priority": "URGENT"}}
+            return {"action": "chat", "response": "no idea"}
+        batches = self.fake_llm(reply)
+        summary = import_tasks("buy milk 10 min\npay rent by the 1st\nremind me to water plants by the 3rd")
+        self.assertEqual(batches, [["add pay rent by the 1st", "remind me to water plants by the 3rd"]])
+        self.assertEqual([r["status"] for r in summary["results"]], ["created", "created", "error"])
+        self.assertEqual(summary["results"][2]["error"], "not understood as a task: no idea")
+        rent = task_manager.get_task_by_id(summary["results"][1]["id"])
+        self.assertEqual((rent.deadline, rent.priority, rent.duration_minutes), ("2026-11-01", "medium", 60))
+
+    def test_failed_llm_chunk_marks_its_lines(self):
+        with mock.patch.object(task_importer, "process_user_messages", side_effect=RuntimeError("down")):
+            summary = import_tasks("pay rent by the 1st")
+        self.assertEqual(summary["results"][0]["error"], "not understood as a task: parse failed (down)")
+
+class ImportEndpointTest(ImporterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = flask_app.app.test_client()
+
+    def test_plain_text_and_json_bodies(self):
+        resp = self.client.post("/api/tasks/import?llm=0", data="buy milk\nsort mail", content_type="text/plain")
+        self.assertEqual(resp.get_json()["imported"], 2)
+        self.assertEqual(resp.headers["X-Revision"], str(task_manager.get_revision()))
+        resp = self.client.post("/api/tasks/import", json={"lines": ["feed cat"], "use_llm": False})
+        self.assertEqual(resp.get_json()["results"][0]["task_name"], "feed cat")
+
+    def test_streamed_progress(self):
+        lines = [f"task {i}" for i in range(task_importer.IMPORT_CHUNK_SIZE + 1)]
+        resp = self.client.post("/api/tasks/import?llm=0&stream=1", json={"lines": lines})
+        self.assertEqual(resp.mimetype, "text/event-stream")
+        events = [block.split("\n") for block in resp.get_data(as_text=True).strip().split("\n\n")]
+        kinds = [kind[len("event: "):] for kind, _ in events]
+        self.assertEqual(kinds, ["progress", "progress", "done"])
+        self.assertEqual(json.loads(events[-1][1][len("data: "):])["imported"], len(lines))
+
+    def test_too_many_lines(self):
+        with mock.patch.object(flask_app, "IMPORT_MAX_LINES", 2):
+            resp = self.client.post("/api/tasks/import?llm=0", data="a\nb\nc", content_type="text/plain")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(task_manager.get_all_tasks(), [])
+
+if __name__ == "__main__":
+    unittest.main()
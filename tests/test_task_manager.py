@@ -0,0 +1,84 @@
+import random
+import unittest
+
+from project.agents import task_manager
+from project.agents.prioritizer import rank_key
+from project.database import db_session
+
+class TaskManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+            conn.execute("DELETE FROM deleted_tasks")
+
+class UpdateTaskTest(TaskManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = task_manager.add_task("write report", duration_minutes=60, priority="medium")
+
+    def test_known_fields_are_updated(self):
+        task = task_manager.update_task(self.task.id, {"priority": "high", "status": "done"})
+        self.assertEqual((task.priority, task.status), ("high", "done"))
+
+    def test_unknown_keys_are_rejected(self):
+        for updates in ({"revision": 0}, {"id": "other"}, {"status = 'done', task_name": "x"}):
+            with self.subTest(updates=updates):
+                with self.assertRaises(ValueError):
+                    task_manager.update_task(self.task.id, updates)
+        self.assertEqual(task_manager.get_task_by_id(self.task.id), self.task)
+
+def random_tasks(n, seed=7):
+    rng = random.Random(seed)
+    return [{
+        "id": f"task{i:03d}",
+        "task_name": f"task {i}",
+        "duration_minutes": rng.choice([None, 15, 30, 60, 120]),
+        "priority": rng.choice(["high", "medium", "low", "HIGH", None]),
+        "deadline": rng.choice([None, "2026-10-20", "2026-10-21", "2026-11-01"]),
+        "scheduled_date": rng.choice([None, "2026-10-19", "2026-10-22"]),
+    } for i in range(n)]
+
+class PaginationTest(TaskManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = random_tasks(40)
+        task_manager.upsert_tasks(self.tasks)
+
+    def pages(self, limit, **query):
+        ids, cursor = [], None
+        while True:
+            page = task_manager.query_tasks_page(limit=limit, cursor=cursor, **query)
+            self.assertLessEqual(len(page["tasks"]), limit)
+            ids += [t.id for t in page["tasks"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_follow_the_rank_order(self):
+        expected = [t["id"] for t in sorted(self.tasks, key=rank_key)]
+        for limit in (1, 3, 7, 40, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.pages(limit), expected)
+
+    def test_filters(self):
+        unscheduled = sorted((t for t in self.tasks if t["scheduled_date"] is None), key=rank_key)
+        self.assertEqual(self.pages(5, scheduled="0"), [t["id"] for t in unscheduled])
+        high = [t["id"] for t in sorted(self.tasks, key=rank_key) if (t["priority"] or "").lower() == "high"]
+        self.assertEqual(self.pages(4, priority="High"), high)
+        by_deadline = task_manager.query_tasks_page(order="deadline", deadline_from="2026-10-21")["tasks"]
+        self.assertEqual(sorted(t.deadline for t in by_deadline), [t.deadline for t in by_deadline])
+        self.assertTrue(all(t.deadline >= "2026-10-21" for t in by_deadline))
+
+    def test_columns(self):
+        page = task_manager.query_tasks_page(limit=2, columns=["id", "task_name"])
+        self.assertEqual([set(t.to_dict()) for t in page["tasks"]], [{"id", "task_name"}] * 2)
+
+    def test_bad_queries_raise_value_error(self):
+        for query in ({"order": "random()"}, {"colour": "red"}, {"cursor": "not a cursor"},
+                      {"cursor": task_manager._encode_cursor([1])}, {"columns": ["id", "1; DROP TABLE tasks"]}):
+            with self.subTest(query=query):
+                with self.assertRaises(ValueError):
+                    task_manager.query_tasks_page(**query)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import random
+import unittest
+from collections import Counter
+from datetime import date, timedelta
+
+import app as flask_app
+from project.agents import task_manager
+from project.agents.prioritizer import rank_key
+from project.database import db_session, rebuild_day_totals
+
+TODAY = date(2026, 10, 21)
+DAYS = [(TODAY + timedelta(days=i)).isoformat() for i in range(-5, 10)]
+
+def day_totals():
+    with db_session() as conn:
+        return sorted(tuple(r) for r in conn.execute('SELECT day, kind, tasks, minutes FROM day_totals'))
+
+def recomputed_totals():
+    """day_totals from scratch, in Python: open tasks per plan day and per deadline."""
+    tasks, minutes = Counter(), Counter()
+    for t in task_manager.get_all_tasks():
+        if (t.status or "pending") == "done":
+            continue
+        for kind, day in (("planned", t.scheduled_date or t.deadline), ("due", t.deadline)):
+            if day is not None:
+                tasks[day, kind] += 1
+                minutes[day, kind] += t.duration_minutes or 0
+    return sorted((day, kind, n, minutes[day, kind]) for (day, kind), n in tasks.items())
+
+def open_tasks():
+    return sorted((t for t in task_manager.get_all_tasks() if (t.status or "pending") != "done"), key=rank_key)
+
+class ViewsTestCase(unittest.TestCase):
+    def setUp(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM tasks")
+            conn.execute("DELETE FROM deleted_tasks")
+
+    def add_random_tasks(self, n, seed):
+        rng = random.Random(seed)
+        for i in range(n):
+            task = task_manager.add_task(f"task {i}", duration_minutes=rng.choice([None, 15, 60, 120]),
+                                         deadline=rng.choice([None] + DAYS),
+                                         priority=rng.choice(["high", "medium", "low"]),
+                                         scheduled_date=rng.choice([None, None] + DAYS))
+            if rng.random() < 0.2:
+                task_manager.update_task(task.id, {"status": "done"})
+
+class DayTotalsTest(ViewsTestCase):
+    def test_triggers_match_a_recompute_after_every_write(self):
+        rng = random.Random(3)
+        ids = []
+
+        def fields(i):
+            return {"task_name": f"task {i}", "duration_minutes": rng.choice([None, 30, 90]),
+                    "deadline": rng.choice([None] + DAYS), "scheduled_date": rng.choice([None] + DAYS),
+                    "priority": "medium"}
+
+        for step in range(200):
+            roll = rng.random()
+            if roll < 0.3 or not ids:
+                f = fields(step)
+                ids.append(task_manager.add_task(f["task_name"], f["duration_minutes"], f["deadline"],
+                                                 scheduled_date=f["scheduled_date"]).id)
+            elif roll < 0.55:
+                task_manager.update_task(rng.choice(ids), rng.choice([
+                    {"deadline": rng.choice([None] + DAYS)},
+                    {"scheduled_date": rng.choice([None] + DAYS)},
+                    {"duration_minutes": rng.choice([None, 10, 240])},
+                    {"status": rng.choice(["done", "pending"])},
+                    {"priority": "high"}]))
+            elif roll < 0.65:
+                task_manager.upsert_tasks([dict(fields(step), id=rng.choice(ids)), dict(fields(step), id=f"u{step}")])
+                ids.append(f"u{step}")
+            elif roll < 0.75:
+                task_manager.import_tasks([dict(fields(step), id=rng.choice(ids), status=rng.choice(["done", "pending"])),
+                                           dict(fields(step), id=f"i{step}", status="done")])
+                ids.append(f"i{step}")
+            elif roll < 0.85:
+                gone = ids.pop(rng.randrange(len(ids)))
+                task_manager.apply_changes(upserts=[dict(fields(step), id=rng.choice(ids))] if ids else (),
+                                           deletes=[gone])
+            elif roll < 0.95:
+                task_manager.delete_task(ids.pop(rng.randrange(len(ids))))
+            else:
+                task_manager.delete_tasks([ids.pop(rng.randrange(len(ids))) for _ in range(min(3, len(ids)))])
+            totals = day_totals()
+            self.assertEqual(totals, recomputed_totals(), f"after step {step}")
+            self.assertFalse([row for row in totals if row[2] == 0], f"empty rows after step {step}")
+
+        before = day_totals()
+        rebuild_day_totals()
+        self.assertEqual(day_totals(), before)
+
+class DayViewTest(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_random_tasks(80, seed=5)
+
+    def test_day_view_matches_the_tasks(self):
+        for day in DAYS:
+            with self.subTest(day=day):
+                planned = [t for t in open_tasks() if (t.scheduled_date or t.deadline) == day]
+                view = task_manager.get_day_view(date.fromisoformat(day), limit=3, overdue_limit=4)
+                self.assertEqual((view["date"], view["count"]), (day, len(planned)))
+                self.assertEqual(view["minutes"], sum(t.duration_minutes or 0 for t in planned))
+                self.assertEqual(view["due"], sum(1 for t in open_tasks() if t.deadline == day))
+                self.assertEqual([t.id for t in view["tasks"]], [t.id for t in planned[:3]])
+
+                overdue = [t for t in open_tasks() if t.deadline and t.deadline < day]
+                self.assertEqual(view["overdue"]["count"], len(overdue))
+                self.assertEqual(view["overdue"]["minutes"], sum(t.duration_minutes or 0 for t in overdue))
+                self.assertEqual([t.id for t in view["overdue"]["tasks"]], [t.id for t in overdue[:4]])
+
+    def test_week_view_matches_the_day_views(self):
+        start = TODAY - timedelta(days=2)
+        week = task_manager.get_week_view(start, limit=5, today=TODAY, undated_limit=3)
+        days = [task_manager.get_day_view(start + timedelta(days=i), limit=5) for i in range(7)]
+        self.assertEqual((week["start"], week["end"]), (start.isoformat(), (start + timedelta(days=7)).isoformat()))
+        strip = lambda view: {k: view[k] for k in ("date", "count", "minutes", "due", "tasks")}
+        self.assertEqual(week["days"], [strip(d) for d in days])
+        self.assertEqual(week["minutes"], sum(d["minutes"] for d in days))
+        today = task_manager.get_day_view(TODAY)["overdue"]
+        self.assertEqual(week["overdue"], {"count": today["count"], "minutes": today["minutes"]})
+
+        undated = [t for t in open_tasks() if t.scheduled_date is None and t.deadline is None]
+        self.assertEqual(week["undated"]["count"], len(undated))
+        self.assertEqual(week["undated"]["minutes"], sum(t.duration_minutes or 0 for t in undated))
+        self.assertEqual([t.id for t in week["undated"]["tasks"]], [t.id for t in undated[:3]])
+
+class ViewEndpointTest(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = flask_app.app.test_client()
+        self.task = task_manager.add_task("write report", duration_minutes=45, deadline=TODAY.isoformat())
+
+    def test_today(self):
+        resp = self.client.get(f"/api/today?date={TODAY.isoformat()}")
+        self.assertEqual(resp.status_code, 200)
+        body = resp.get_json()
+        self.assertEqual((body["count"], body["minutes"], body["due"]), (1, 45, 1))
+        self.assertEqual([t["id"] for t in body["tasks"]], [self.task.id])
+        self.assertEqual(resp.headers["X-Revision"], str(task_manager.get_revision()))
+
+        again = self.client.get(f"/api/today?date={TODAY.isoformat()}", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        task_manager.update_task(self.task.id, {"status": "done"})
+        changed = self.client.get(f"/api/today?date={TODAY.isoformat()}", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json()["count"], 0)
+
+    def test_week(self):
+        start = TODAY - timedelta(days=TODAY.weekday())
+        resp = self.client.get(f"/api/week?today={TODAY.isoformat()}")
+        self.assertEqual(resp.status_code, 200)
+        body = resp.get_json()
+        self.assertEqual(body["start"], start.isoformat())
+        self.assertEqual([d["date"] for d in body["days"]], [(start + timedelta(days=i)).isoformat() for i in range(7)])
+        self.assertEqual(body["minutes"], 45)
+        self.assertEqual(self.client.get("/api/week?today=2026-10-21",
+                                         headers={"If-None-Match": resp.headers["ETag"]}).status_code, 304)
+        # The ETag covers the query, not just the revision
+        self.assertEqual(self.client.get("/api/week?today=2026-10-21&limit=3",
+                                         headers={"If-None-Match": resp.headers["ETag"]}).status_code, 200)
+
+    def test_bad_dates_are_rejected(self):
+        for url in ("/api/today?date=tomorrow", "/api/week?start=2026-13-01", "/api/week?today=21/10/2026"):
+            with self.subTest(url=url):
+                resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn("error", resp.get_json())
+
+if __name__ == "__main__":
+    unittest.main()